@@ -0,0 +1,122 @@
+'''Build time and peak memory of the linear expressions of the CP models, Python sum() against the bulk helpers
+linear_sum and weighted_sum of constraint_programming.
+
+The rows without projects build one weighted sum of terms random BoolVars. The others build the linear part of
+build_project_planning_model (contractor capacity, staffing and the profit margin) on generated portfolios, the
+previous way (reproduced below: a sum over a list of products per project, nested in a sum over the projects) and with
+the helpers. Every construction runs in a fresh process; its memory is the growth of the peak resident set size
+while it runs (Linux only: the peak is reset through /proc/self/clear_refs), which also counts the expression nodes
+OR-Tools allocates in C++. Run from the repository root with: python -m benchmarks.linear_expressions
+'''
+import gc
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from constraint_programming import build_project_planning_model, linear_sum, project_planning_data, weighted_sum
+from instance_generators import project_planning_instance
+
+
+def profit_with_sum(data, model, project_taken, selection, cost):
+    project_month_contractor = data['project_month_contractor']
+    contractor_month_vars = {}
+    for (contractor, project, month), variable in selection.items():
+        contractor_month_vars.setdefault((contractor, month), []).append(variable)
+    for variables in contractor_month_vars.values():
+        if len(variables) > 1:
+            model.Add(sum(variables) <= 1)
+    for project in project_month_contractor:
+        for month in project_month_contractor[project]:
+            model.Add(sum([selection[(contractor, project, month)]
+                           for contractor in project_month_contractor[project][month]]) == 1). \
+                OnlyEnforceIf(project_taken[project])
+    profit = sum([
+        (int(data['values'][project]) * project_taken[project]) -
+        sum([int(cost[(contractor, project, month)]) * selection[(contractor, project, month)]
+             for month in project_month_contractor[project]
+             for contractor in project_month_contractor[project][month]])
+        for project in data['projects']
+    ])
+    model.Add(profit >= 2500)
+
+
+def profit_with_helpers(data, model, project_taken, selection, cost):
+    project_month_contractor = data['project_month_contractor']
+    contractor_month_vars = {}
+    for (contractor, project, month), variable in selection.items():
+        contractor_month_vars.setdefault((contractor, month), []).append(variable)
+    for variables in contractor_month_vars.values():
+        if len(variables) > 1:
+            model.Add(linear_sum(variables) <= 1)
+    for project in project_month_contractor:
+        for month in project_month_contractor[project]:
+            model.Add(linear_sum(selection[(contractor, project, month)]
+                                 for contractor in project_month_contractor[project][month]) == 1). \
+                OnlyEnforceIf(project_taken[project])
+    profit = (weighted_sum((project_taken[project] for project in data['projects']),
+                           (data['values'][project] for project in data['projects'])) -
+              weighted_sum(selection.values(), cost.values()))
+    model.Add(profit >= 2500)
+
+
+def _status(field):
+    with open('/proc/self/status') as f:
+        return int(f.read().split(field + ':')[1].split()[0])
+
+
+def _measure(case, size, helpers):
+    # Seconds and peak memory growth (MB) of one construction, run in its own process, and its number of terms
+    model = cp_model.CpModel()
+    terms = size
+    if case == 'terms':
+        variables = [model.NewBoolVar('x{}'.format(k)) for k in range(size)]
+        coefficients = np.random.default_rng(size).integers(1, 1000, size).tolist()
+        if helpers:
+            def build():
+                model.Add(weighted_sum(variables, coefficients) >= 1)
+        else:
+            def build():
+                model.Add(sum([c * x for c, x in zip(coefficients, variables)]) >= 1)
+    else:
+        data = project_planning_data(project_planning_instance(*size, seed=size[0]))
+        project_taken, selection, cost, _ = build_project_planning_model(data, model, min_profit=None)
+        terms = len(project_taken) + len(selection)
+
+        def build():
+            (profit_with_helpers if helpers else profit_with_sum)(data, model, project_taken, selection, cost)
+    gc.collect()
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    resident = _status('VmRSS')
+    start = time.perf_counter()
+    build()
+    seconds = time.perf_counter() - start
+    return seconds, (_status('VmHWM') - resident) / 2 ** 10, terms
+
+
+def measure(case, size, helpers):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_measure, case, size, helpers).result()
+
+
+def compare(case, size):
+    # Terms, then seconds and MB of the sum() construction and of the helpers
+    seconds, memory, terms = measure(case, size, False)
+    return (terms, seconds, memory) + measure(case, size, True)[:2]
+
+
+def main(terms=(10000, 100000, 1000000), sizes=((60, 100, 40, 36), (120, 200, 60, 48), (240, 400, 100, 60))):
+    print("{:>9} {:>12} {:>9} {:>13} {:>13} {:>13} {:>13}".format(
+        "projects", "contractors", "terms", "sum (s)", "sum (MB)", "helper (s)", "helper (MB)"))
+    for n in terms:
+        print("{:>9} {:>12} {:>9} {:>13.3f} {:>13.1f} {:>13.3f} {:>13.1f}".format("-", "-", *compare('terms', n)))
+    for size in sizes:
+        print("{:>9} {:>12} {:>9} {:>13.3f} {:>13.1f} {:>13.3f} {:>13.1f}".format(
+            size[0], size[1], *compare('portfolio', size)))
+
+
+if __name__ == "__main__":
+    main()
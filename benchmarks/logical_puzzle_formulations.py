@@ -0,0 +1,49 @@
+'''Model size and solve time of the boolean (one_hot_assignment) and integer (all_different_assignment) logical
+puzzle formulations as the puzzle grows to more people and attributes.
+
+The puzzles come from logic_puzzle_instance, whose links are added the same way to both models. Run from the
+repository root with: python -m benchmarks.logical_puzzle_formulations
+'''
+import time
+
+from ortools.sat.python import cp_model
+
+from constraint_programming import all_different_assignment, one_hot_assignment
+from instance_generators import logic_puzzle_instance
+
+
+def build(instance, formulation):
+    model = cp_model.CpModel()
+    if formulation == 'integer':
+        assignment, _ = all_different_assignment(model, instance['names'], instance['attributes'])
+    else:
+        assignment = one_hot_assignment(model, instance['names'], instance['attributes'])
+    for a, value_a, b, value_b in instance['links']:
+        for name in instance['names']:
+            model.AddImplication(assignment[a][name][value_a], assignment[b][name][value_b])
+            model.AddImplication(assignment[b][name][value_b], assignment[a][name][value_a])
+    return model
+
+
+def main(sizes=((4, 3), (8, 3), (16, 3), (32, 3), (64, 3), (8, 6), (16, 6), (32, 6)), time_limit=120.0):
+    print("{:>7} {:>10} {:>11} {:>10} {:>12} {:>10} {:>10} {:>10}".format(
+        "people", "attributes", "model", "variables", "constraints", "build (s)", "solve (s)", "status"))
+    for n_people, n_attributes in sizes:
+        instance = logic_puzzle_instance(n_people, n_attributes, seed=n_people * n_attributes)
+        for formulation in ('boolean', 'integer'):
+            start = time.perf_counter()
+            model = build(instance, formulation)
+            build_time = time.perf_counter() - start
+            proto = model.Proto()
+            solver = cp_model.CpSolver()
+            solver.parameters.num_workers = 1
+            solver.parameters.max_time_in_seconds = time_limit
+            start = time.perf_counter()
+            status = solver.Solve(model)
+            print("{:>7} {:>10} {:>11} {:>10} {:>12} {:>10.3f} {:>10.3f} {:>10}".format(
+                n_people, n_attributes, formulation, len(proto.variables), len(proto.constraints), build_time,
+                time.perf_counter() - start, solver.StatusName(status)))
+
+
+if __name__ == "__main__":
+    main()
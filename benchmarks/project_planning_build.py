@@ -0,0 +1,87 @@
+'''Model construction time and size of project_planning against the number of projects and contractors.
+
+Compares the previous construction (reproduced below: a deep copy of the project jobs per contractor, .index month
+lookups and a no double booking row for every contractor and month) with build_project_planning_model, which works
+from the job and (contractor, month) indexes. Both include project_planning_data. The previous construction is only
+run up to legacy_limit projects. Run from the repository root with: python -m benchmarks.project_planning_build
+'''
+import copy
+import time
+
+from ortools.sat.python import cp_model
+
+from constraint_programming import build_project_planning_model, project_planning_data
+from instance_generators import project_planning_instance
+
+
+def build_with_lookups(data, model):
+    projects, contractors, months = data['projects'], data['contractors'], data['months']
+    project_jobs_dict, contractor_job_quotes_dict = data['project_jobs'], data['quotes']
+    contractor_jobs_dict = {contractor: list(job_quote) for contractor, job_quote in contractor_job_quotes_dict.items()}
+    project_month_contractor = {}
+    for proj in project_jobs_dict:
+        month_contractor = {}
+        for month in project_jobs_dict[proj].keys():
+            month_contractor[month] = [contractor for contractor in contractors
+                                       if project_jobs_dict[proj][month] in contractor_jobs_dict[contractor]]
+        project_month_contractor[proj] = month_contractor
+
+    project_taken = {project: model.NewBoolVar(project) for project in projects}
+    selection = {}
+    cost = {}
+    for contractor in contractors:
+        jobs = contractor_jobs_dict[contractor]
+        temp_project_jobs_dict = copy.deepcopy(project_jobs_dict)
+        for project, job_month in temp_project_jobs_dict.items():
+            for job in list(job_month.values()):
+                if job in jobs:
+                    m = list(job_month.keys())[list(job_month.values()).index(job)]
+                    selection[(contractor, project, m)] = model.NewBoolVar(contractor + project + m)
+                    cost[(contractor, project, m)] = contractor_job_quotes_dict[contractor][job]
+                    job_month.pop(m)
+    for contractor in contractors:
+        for month in months:
+            model.Add(sum([selection.get((contractor, projects[i], month), False) for i in range(len(projects))]) <= 1)
+    for project in project_month_contractor:
+        for month in project_month_contractor[project]:
+            model.Add(sum([selection[(contractor, project, month)]
+                           for contractor in project_month_contractor[project][month]]) == 1). \
+                OnlyEnforceIf(project_taken[project])
+            for contractor in project_month_contractor[project][month]:
+                model.AddBoolAnd([selection[(contractor, project, month)].Not()]). \
+                    OnlyEnforceIf(project_taken[project].Not())
+    for project, dependencies in data['dependencies'].items():
+        if dependencies:
+            model.AddBoolAnd([project_taken[name] for name in dependencies]).OnlyEnforceIf(project_taken[project])
+    model.Add(sum([int(data['values'][project]) * project_taken[project] -
+                   sum([int(cost[(contractor, project, month)]) * selection[(contractor, project, month)]
+                        for month in project_month_contractor[project]
+                        for contractor in project_month_contractor[project][month]])
+                   for project in projects]) >= 2500)
+
+
+def measure(task_df, build):
+    start = time.perf_counter()
+    model = cp_model.CpModel()
+    build(project_planning_data(task_df), model)
+    proto = model.Proto()
+    return time.perf_counter() - start, len(proto.variables), len(proto.constraints)
+
+
+def main(sizes=((9, 11, 13, 12), (50, 50, 30, 24), (100, 200, 60, 36), (200, 400, 100, 48), (400, 800, 150, 60)),
+         legacy_limit=200):
+    print("{:>9} {:>12} {:>8} {:>10} {:>12} {:>12} {:>12} {:>12}".format(
+        "projects", "contractors", "months", "variables", "rows before", "rows after", "before (s)", "after (s)"))
+    for n_projects, n_contractors, n_jobs, n_months in sizes:
+        task_df = project_planning_instance(n_projects, n_contractors, n_jobs, n_months, seed=n_projects)
+        after, variables, rows = measure(task_df, build_project_planning_model)
+        before, legacy_rows = '-', '-'
+        if n_projects <= legacy_limit:
+            before, _, legacy_rows = measure(task_df, build_with_lookups)
+            before = "{:.3f}".format(before)
+        print("{:>9} {:>12} {:>8} {:>10} {:>12} {:>12} {:>12} {:>12.3f}".format(
+            n_projects, n_contractors, n_months, variables, legacy_rows, rows, before, after))
+
+
+if __name__ == "__main__":
+    main()
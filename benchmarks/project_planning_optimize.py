@@ -0,0 +1,51 @@
+'''Profit maximization of project_planning on generated portfolios: best plan, bound and gap within the time limit
+for a number of CP-SAT workers, and the time to the top_k best distinct plans.
+
+Also counts the plans over min_profit that the enumeration of project_planning would have to go through, stopped
+at count_limit solutions or time_limit seconds. Run from the repository root with: python -m benchmarks.project_planning_optimize
+'''
+import contextlib
+import io
+import time
+
+from ortools.sat.python import cp_model
+
+from constraint_programming import build_project_planning_model, optimize_project_planning, project_planning_data
+from instance_generators import project_planning_instance
+from solution_sinks import CountSink
+
+
+def count_plans(data, min_profit, count_limit, time_limit):
+    model = cp_model.CpModel()
+    build_project_planning_model(data, model, min_profit)
+    solver = cp_model.CpSolver()
+    solver.parameters.enumerate_all_solutions = True
+    solver.parameters.max_time_in_seconds = time_limit
+    sink = CountSink(count_limit)
+    status = solver.Solve(model, sink)
+    # Anything but a finished enumeration only gives a lower bound on the count
+    return ("{}" if status == cp_model.OPTIMAL else ">={}").format(sink.solutions_)
+
+
+def main(sizes=((9, 11, 13, 12), (30, 40, 20, 24), (60, 100, 40, 36), (120, 200, 60, 48)), workers=(1, 8),
+         time_limit=30.0, top_k=5, min_profit=2500, count_limit=100000):
+    print("{:>9} {:>12} {:>10} {:>8} {:>10} {:>10} {:>8} {:>9} {:>13}".format(
+        "projects", "contractors", "plans", "workers", "objective", "bound", "gap %", "time (s)",
+        "top {} (s)".format(top_k)))
+    for n_projects, n_contractors, n_jobs, n_months in sizes:
+        data = project_planning_data(project_planning_instance(n_projects, n_contractors, n_jobs, n_months,
+                                                               seed=n_projects))
+        plans = count_plans(data, min_profit, count_limit, time_limit)
+        for worker_count in workers:
+            best = optimize_project_planning(data, worker_count, time_limit, log=False)[0]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                found = optimize_project_planning(data, worker_count, time_limit, top_k, log=False)
+            top_time = "{:.2f} ({})".format(time.perf_counter() - start, len(found))
+            print("{:>9} {:>12} {:>10} {:>8} {:>10.0f} {:>10.0f} {:>8.2f} {:>9.2f} {:>13}".format(
+                n_projects, n_contractors, plans, worker_count,
+                best['objective'], best['bound'], 100 * best['gap'], best['wall_time'], top_time))
+
+
+if __name__ == "__main__":
+    main()
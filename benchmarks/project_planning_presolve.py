@@ -0,0 +1,85 @@
+'''What presolve_project_planning removes from generated portfolios and what that does to the time to the most
+profitable plan.
+
+A share of the jobs (uncovered) gets no quotes at all, so the projects that need them, and their dependents, can not
+be staffed. Before that, check_plans enumerates small portfolios with a dependency cycle, an unstaffable job and a
+profit floor that prunes projects, with and without presolve, and checks that the plans are the same. Run from the
+repository root with: python -m benchmarks.project_planning_presolve
+'''
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from constraint_programming import (build_project_planning_model, optimize_project_planning, presolve_project_planning,
+                                    project_planning_columns, project_planning_data)
+from instance_generators import project_planning_instance
+from solution_sinks import solution_sink
+
+
+def plan_rows(data, presolve, min_profit, capacity=100000):
+    # Every plan as a row of the project_planning_columns of data, sorted
+    built = presolve_project_planning(data, min_profit)[0] if presolve else data
+    model = cp_model.CpModel()
+    project_taken, selection, _, _ = build_project_planning_model(built, model, min_profit)
+    variables, _ = project_planning_columns(data, model, project_taken, selection)
+    with solution_sink('array', variables, capacity=capacity) as sink:
+        cp_model.CpSolver().SearchForAllSolutions(model, sink)
+    return sorted(map(tuple, sink.values().tolist()))
+
+
+def check_plans(count=30, n_projects=7, profit_share=0.7):
+    reasons, merged = {}, 0
+    for seed in range(count):
+        rng = np.random.default_rng(seed)
+        task_df = project_planning_instance(n_projects, 5, 10, 6, density=0.35, dependency_density=0.1, seed=seed)
+        # The generator only makes projects depend on earlier ones, two of them now depend on each other
+        first, second = rng.choice(n_projects, size=2, replace=False)
+        task_df['Dependencies'].iloc[first, second + 1] = 'x'
+        task_df['Dependencies'].iloc[second, first + 1] = 'x'
+        quotes = task_df['Quotes']
+        quotes[rng.choice(quotes.columns[1:])] = np.nan
+        data = project_planning_data(task_df)
+
+        min_profit = int(profit_share * presolve_project_planning(data, None)[1]['upper_bound'])
+        report = presolve_project_planning(data, min_profit)[1]
+        without, with_presolve = plan_rows(data, False, min_profit), plan_rows(data, True, min_profit)
+        assert len(without) == len(with_presolve) and without == with_presolve, seed
+        for reason in report['removed'].values():
+            reasons[reason] = reasons.get(reason, 0) + 1
+        merged += len(report['merged'])
+    print("{} portfolios with the same plans with and without presolve, {} projects merged, removed: {}".format(
+        count, merged, reasons))
+
+
+def main(sizes=((30, 40, 20, 24), (60, 100, 40, 36), (120, 200, 60, 48), (240, 400, 100, 60)), uncovered=0.05,
+         dependency_density=0.05, workers=8, time_limit=60.0):
+    check_plans()
+    print("{:>9} {:>8} {:>8} {:>19} {:>19} {:>12} {:>10} {:>11} {:>11}".format(
+        "projects", "removed", "merged", "variables", "constraints", "upper bound", "best", "before (s)", "after (s)"))
+    for n_projects, n_contractors, n_jobs, n_months in sizes:
+        rng = np.random.default_rng(n_projects)
+        task_df = project_planning_instance(n_projects, n_contractors, n_jobs, n_months,
+                                            dependency_density=dependency_density, seed=n_projects)
+        quotes = task_df['Quotes']
+        for job in rng.choice(quotes.columns[1:], size=max(1, int(uncovered * n_jobs)), replace=False):
+            quotes[job] = np.nan
+        data = project_planning_data(task_df)
+
+        start = time.perf_counter()
+        before = optimize_project_planning(data, workers, time_limit, log=False)[0]
+        before_time = time.perf_counter() - start
+        start = time.perf_counter()
+        reduced, report = presolve_project_planning(data, min_profit=None)
+        after = optimize_project_planning(reduced, workers, time_limit, log=False)[0]
+        after_time = time.perf_counter() - start
+        assert before['status'] != 'OPTIMAL' or after['status'] != 'OPTIMAL' or \
+            before['objective'] == after['objective']
+        print("{:>9} {:>8} {:>8} {:>19} {:>19} {:>12} {:>10.0f} {:>11.2f} {:>11.2f}".format(
+            n_projects, len(report['removed']), len(report['merged']), "{} -> {}".format(*report['variables']),
+            "{} -> {}".format(*report['constraints']), report['upper_bound'], after['objective'], before_time,
+            after_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+'''Compile time of puzzle specifications, first compile against the cached clone, and the solutions of the
+logical_puzzle specification against the hand written model.
+
+The larger specifications come from logic_puzzle_spec. Run from the repository root with:
+python -m benchmarks.puzzle_spec
+'''
+import contextlib
+import io
+import time
+
+from ortools.sat.python import cp_model
+
+import constraint_programming
+from constraint_programming import LOGICAL_PUZZLE_SPEC, compile_puzzle_spec, load_puzzle_spec, logical_puzzle
+from instance_generators import logic_puzzle_spec
+
+
+def solutions(**arguments):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sink = logical_puzzle(sink='array', **arguments)
+    return {tuple(row) for row in sink.values().tolist()}
+
+
+def main(sizes=((16, 3), (32, 3), (64, 3), (32, 6)), repeats=20):
+    for formulation in ('boolean', 'integer'):
+        same = solutions(formulation=formulation) == solutions(formulation=formulation, spec=LOGICAL_PUZZLE_SPEC)
+        print("logical_puzzle {} model, same solutions from the specification: {}".format(formulation, same))
+
+    print("\n{:>20} {:>12} {:>12} {:>11} {:>10} {:>10}".format(
+        "specification", "constraints", "compile (s)", "cached (s)", "solve (s)", "status"))
+    specs = [('logical_puzzle', load_puzzle_spec(LOGICAL_PUZZLE_SPEC))]
+    specs += [("{} x {}".format(n, m), logic_puzzle_spec(n, m, seed=n * m)) for n, m in sizes]
+    for name, spec in specs:
+        constraint_programming._puzzle_models.clear()
+        start = time.perf_counter()
+        model, _ = compile_puzzle_spec(spec)
+        compile_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model, _ = compile_puzzle_spec(spec)
+        cached_time = (time.perf_counter() - start) / repeats
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = 1
+        start = time.perf_counter()
+        status = solver.Solve(model)
+        print("{:>20} {:>12} {:>12.4f} {:>11.4f} {:>10.3f} {:>10}".format(
+            name, len(model.Proto().constraints), compile_time, cached_time, time.perf_counter() - start,
+            solver.StatusName(status)))
+
+
+if __name__ == "__main__":
+    main()
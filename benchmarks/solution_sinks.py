@@ -0,0 +1,75 @@
+'''Cost of the solution callback when enumerating many solutions: the Sudoku printer and the per-variable Value reads
+it is built on against the count, array and stream sinks of solution_sinks.
+
+The model is a 9x9 Sudoku with few clues, so it has far more solutions than limit. Run from the repository root with:
+python -m benchmarks.solution_sinks
+'''
+import os
+import tempfile
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from constraint_programming import build_sudoku_model
+from instance_generators import sudoku_puzzles
+from solution_sinks import solution_sink
+
+
+class ValueReader(cp_model.CpSolverSolutionCallback):
+    # What the printers did before the sinks, minus the printing: one Value call per variable
+    def __init__(self, variables, limit):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.variables_ = variables
+        self.limit_ = limit
+        self.solutions_ = 0
+        self.rows_ = []
+
+    def OnSolutionCallback(self):
+        self.solutions_ += 1
+        self.rows_.append([self.Value(variable) for variable in self.variables_])
+        if self.solutions_ >= self.limit_:
+            self.StopSearch()
+
+
+class GridPrinter(ValueReader):
+    # The Sudoku printer: a new array per solution, printed (here to os.devnull)
+    def __init__(self, variables, limit, output):
+        ValueReader.__init__(self, variables, limit)
+        self.output_ = output
+
+    def OnSolutionCallback(self):
+        self.solutions_ += 1
+        print("\nsolution", self.solutions_, file=self.output_)
+        print(np.array([self.Value(variable) for variable in self.variables_]), file=self.output_)
+        if self.solutions_ >= self.limit_:
+            self.StopSearch()
+
+
+def main(clues=12, limit=50000):
+    model = cp_model.CpModel()
+    sudoku = build_sudoku_model(sudoku_puzzles(1, 3, clues, seed=0)[0], 3, model)
+    variables = [cell for cell in sudoku.values() if not isinstance(cell, int)]
+    print("{:>14} {:>10} {:>9} {:>12}".format("callback", "solutions", "time (s)", "solutions/s"))
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        callbacks = [('printer', lambda: GridPrinter(variables, limit, devnull)),
+                     ('value calls', lambda: ValueReader(variables, limit))]
+        for mode in ('count', 'array', 'stream'):
+            callbacks.append((mode, lambda mode=mode: solution_sink(mode, variables, limit=limit, capacity=limit,
+                                                                    path=os.path.join(directory, 'solutions.jsonl'))))
+        for name, make in callbacks:
+            solver = cp_model.CpSolver()
+            solver.parameters.enumerate_all_solutions = True
+            solver.parameters.num_workers = 1
+            callback = make()
+            start = time.perf_counter()
+            solver.Solve(model, callback)
+            if hasattr(callback, 'close'):
+                callback.close()
+            elapsed = time.perf_counter() - start
+            print("{:>14} {:>10} {:>9.2f} {:>12.0f}".format(name, callback.solutions_, elapsed,
+                                                           callback.solutions_ / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+'''Puzzles per second of solve_sudoku_batch on generated puzzle files: with the bitmask engine in front, with the
+singles pre-pass and CP-SAT only (engine_time_limit=None), and CP-SAT alone on every puzzle.
+
+The puzzles are cut from random solved grids, so fewer clues means more search. Run from the repository root with:
+python -m benchmarks.sudoku_batch
+'''
+import os
+import tempfile
+import time
+
+from ortools.sat.python import cp_model
+
+from constraint_programming import build_sudoku_model, format_sudoku, solve_sudoku_batch
+from instance_generators import sudoku_puzzles
+
+
+def cp_sat_only(puzzles, sub_grid_size):
+    # One model and one single thread solve per puzzle, without the pre-pass
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        model = cp_model.CpModel()
+        build_sudoku_model(puzzle, sub_grid_size, model)
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = 1
+        solver.Solve(model)
+    return len(puzzles) / (time.perf_counter() - start)
+
+
+def main(cases=((3, 45, 2000), (3, 30, 2000), (3, 17, 2000), (4, 120, 200), (4, 60, 200)), workers=(1, None)):
+    print("{:>6} {:>6} {:>8} {:>16} {:>8} {:>9} {:>8} {:>11}".format(
+        "size", "clues", "puzzles", "path", "workers", "bitmask", "cp-sat", "puzzles/s"))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'puzzles.txt')
+        output_path = os.path.join(directory, 'solutions.txt')
+        for sub_grid_size, clues, count in cases:
+            puzzles = sudoku_puzzles(count, sub_grid_size, clues, seed=clues)
+            with open(path, 'w') as f:
+                f.writelines(format_sudoku(puzzle) + '\n' for puzzle in puzzles)
+            size = "{0}x{0}".format(sub_grid_size * sub_grid_size)
+            runs = [('bitmask engine', 1.0, worker_count) for worker_count in workers] + [('singles + cp-sat', None, 1)]
+            for name, engine_time_limit, worker_count in runs:
+                stats = solve_sudoku_batch(path, output_path, workers=worker_count,
+                                           engine_time_limit=engine_time_limit)
+                print("{:>6} {:>6} {:>8} {:>16} {:>8} {:>9} {:>8} {:>11.0f}".format(
+                    size, clues, count, name, worker_count or os.cpu_count(), stats['bitmask'], stats['cp-sat'],
+                    stats['puzzles_per_second']))
+            print("{:>6} {:>6} {:>8} {:>16} {:>8} {:>9} {:>8} {:>11.0f}".format(
+                size, clues, count, 'cp-sat alone', 1, '-', count, cp_sat_only(puzzles, sub_grid_size)))
+
+
+if __name__ == "__main__":
+    main()
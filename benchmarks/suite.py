@@ -0,0 +1,352 @@
+'''Load, build, solve and report time of all six tasks on generated instances of growing size.
+
+Every instance comes from instance_generators and is written in the input format of its task first: an Excel
+workbook for task1, task2, task3 and project_planning, a file of puzzle lines for the Sudoku batch and a JSON
+specification for logical_puzzle. The phases are then timed separately:
+  load    reading the file with the task's loader (the workbook cache starts empty)
+  build   the model, after the presolve for project_planning
+  solve   the solver, stopped after time_limit seconds (the greedy allocation of task3 included). task2 goes through
+          solve_tsp with method='auto' like task2() does, which builds its own models and runs to optimality, so its
+          build time is part of solve
+  report  what the task prints, turned into Python values (the answer) without printing it
+
+Every instance is run repeats times and each phase keeps its fastest time, which is the one least disturbed by the
+rest of the machine. The results go to a JSON file that a later run can take as its baseline, which prints the
+ratio of every phase to the baseline and flags those that got slower than tolerance by more than min_slowdown
+seconds. The script then exits with status 1, so that the comparison can gate a CI job. Run from the repository
+root with:
+python -m benchmarks.suite [--tasks task1 sudoku ...] [--output results.json] [--baseline baseline.json]
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import ortools
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+
+import constraint_programming
+from constraint_programming import (build_project_planning_model, build_sudoku_model, compile_puzzle_spec,
+                                    format_sudoku, load_project_planning_data, load_puzzle_spec, parse_sudoku,
+                                    presolve_project_planning, project_planning_data)
+from instance_generators import (airport_instance, distance_matrix_instance, logic_puzzle_spec,
+                                 project_planning_instance, sudoku_puzzles, supply_chain_instance, write_workbook)
+from linear_programming import (add_objective_cutoff, airport_allocation, airport_conflicts, airport_taxi_distance,
+                                build_compact_airport_model, build_supply_chain_model, greedy_airport_allocation,
+                                load_airport_data, load_distances, load_supply_chain_data, solution_values, solve_tsp,
+                                supply_chain_arrays, supply_chain_unit_costs, tsp_route)
+
+PHASES = ('load', 'build', 'solve', 'report')
+
+LP_STATUS = {pywraplp.Solver.OPTIMAL: 'OPTIMAL', pywraplp.Solver.FEASIBLE: 'FEASIBLE',
+             pywraplp.Solver.INFEASIBLE: 'INFEASIBLE', pywraplp.Solver.UNBOUNDED: 'UNBOUNDED',
+             pywraplp.Solver.ABNORMAL: 'ABNORMAL', pywraplp.Solver.NOT_SOLVED: 'NOT_SOLVED'}
+
+
+# task1: size is (suppliers, materials, factories, products, customers)
+
+def supply_chain_write(size, seed, path):
+    write_workbook(supply_chain_instance(*size, seed=seed), path)
+
+
+def supply_chain_build(task1_df):
+    solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+    arrays = supply_chain_arrays(task1_df)
+    return solver, arrays, build_supply_chain_model(arrays, solver)
+
+
+def supply_chain_solve(state, time_limit, workers):
+    solver, _, _ = state
+    solver.SetTimeLimit(int(time_limit * 1000))
+    return solver.Solve()
+
+
+def supply_chain_report(state, status):
+    solver, arrays, model = state
+    if status != pywraplp.Solver.OPTIMAL:
+        return LP_STATUS[status], None, None
+    answer = {'orders': solution_values(model['orders'], arrays, ('materials', 'factories', 'suppliers')),
+              'production': solution_values(model['production'], arrays, ('products', 'factories')),
+              'unit_costs': supply_chain_unit_costs(arrays, model)}
+    return LP_STATUS[status], solver.Objective().Value(), answer
+
+
+# task2: size is the number of towns, the tour starts from the first one, solved as task2(method='auto') solves it
+
+def tsp_write(size, seed, path):
+    write_workbook({'Distances': distance_matrix_instance(size, seed=seed)}, path)
+
+
+def tsp_build(distances):
+    # solve_tsp builds the model of the method it picks
+    return distances, list(distances.index)
+
+
+def tsp_solve(state, time_limit, workers):
+    distances, cities_to_visit = state
+    return solve_tsp(distances, cities_to_visit, cities_to_visit[0], 'auto', workers=workers)
+
+
+def tsp_report(state, solved):
+    _, cities_to_visit = state
+    _, status, successors, cost, _ = solved
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return LP_STATUS[status], None, None
+    return LP_STATUS[status], cost, tsp_route(successors, cities_to_visit[0])
+
+
+# task3: size is the number of flights, on 3 runways and 3 terminals, solved with the compact formulation
+
+def airport_write(size, seed, path):
+    write_workbook(airport_instance(size, seed=seed), path)
+
+
+def airport_build(task3_df):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    return solver, task3_df, build_compact_airport_model(task3_df, solver)
+
+
+def airport_solve(state, time_limit, workers):
+    solver, task3_df, model = state
+    greedy = greedy_airport_allocation(task3_df)
+    if greedy is not None:
+        add_objective_cutoff(solver, airport_taxi_distance(task3_df, greedy))
+    solver.SetTimeLimit(int(time_limit * 1000))
+    return solver.Solve()
+
+
+def airport_report(state, status):
+    solver, task3_df, model = state
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return LP_STATUS[status], None, None
+    allocation = airport_allocation(task3_df, model)
+    assert not airport_conflicts(task3_df, allocation)
+    return LP_STATUS[status], airport_taxi_distance(task3_df, allocation), allocation
+
+
+# Sudoku: size is (sub grid size, clues, puzzles), one model per puzzle
+
+def sudoku_write(size, seed, path):
+    sub_grid_size, clues, count = size
+    with open(path, 'w') as f:
+        f.writelines(format_sudoku(grid) + '\n' for grid in sudoku_puzzles(count, sub_grid_size, clues, seed))
+
+
+def sudoku_load(path):
+    with open(path) as f:
+        return [parse_sudoku(line)[0] for line in f if line.strip()]
+
+
+def sudoku_build(grids):
+    models = []
+    for grid in grids:
+        model = cp_model.CpModel()
+        models.append((model, build_sudoku_model(grid, int(round(len(grid) ** 0.5)), model)))
+    return models
+
+
+def sudoku_solve(models, time_limit, workers):
+    statuses = []
+    for model, _ in models:
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = workers
+        solver.parameters.max_time_in_seconds = time_limit
+        statuses.append((solver, solver.Solve(model)))
+    return statuses
+
+
+def sudoku_report(models, statuses):
+    answer = []
+    for (_, cells), (solver, status) in zip(models, statuses):
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            size = int(round(len(cells) ** 0.5))
+            answer.append(format_sudoku(np.array([[solver.Value(cells[i, j]) for j in range(size)]
+                                                  for i in range(size)])))
+    status = 'OPTIMAL' if len(answer) == len(models) else '{}/{} solved'.format(len(answer), len(models))
+    return status, len(answer), answer
+
+
+# logical_puzzle: size is (people, attributes), with the integer formulation
+
+def puzzle_write(size, seed, path):
+    with open(path, 'w') as f:
+        json.dump(logic_puzzle_spec(*size, seed=seed), f)
+
+
+def puzzle_build(spec):
+    # A compiled specification is kept, start from an empty cache so that every run builds the model
+    constraint_programming._puzzle_models.clear()
+    return compile_puzzle_spec(spec)
+
+
+def puzzle_solve(state, time_limit, workers):
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    solver.parameters.max_time_in_seconds = time_limit
+    return solver, solver.Solve(state[0])
+
+
+def puzzle_report(state, solved):
+    _, assignment = state
+    solver, status = solved
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver.StatusName(status), None, None
+    answer = {}
+    for attribute, entity_values in assignment.items():
+        for name, values in entity_values.items():
+            answer.setdefault(name, {})[attribute] = [value for value, variable in values.items()
+                                                      if solver.BooleanValue(variable)][0]
+    return solver.StatusName(status), len(answer), answer
+
+
+# project_planning: size is (projects, contractors, jobs, months), solved for the most profitable plan after the
+# presolve, as project_planning(optimize=True) does
+
+def project_planning_write(size, seed, path):
+    write_workbook(project_planning_instance(*size, seed=seed), path)
+
+
+def project_planning_build(task_df):
+    data, _ = presolve_project_planning(project_planning_data(task_df), min_profit=None)
+    model = cp_model.CpModel()
+    project_taken, selection, _, profit = build_project_planning_model(data, model, min_profit=None)
+    model.Maximize(profit)
+    return model, project_taken, selection
+
+
+def project_planning_solve(state, time_limit, workers):
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    solver.parameters.max_time_in_seconds = time_limit
+    return solver, solver.Solve(state[0])
+
+
+def project_planning_report(state, solved):
+    _, project_taken, selection = state
+    solver, status = solved
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver.StatusName(status), None, None
+    answer = {'projects': [project for project, taken in project_taken.items() if solver.BooleanValue(taken)],
+              'assignment': {(project, month): contractor
+                             for (contractor, project, month), variable in selection.items()
+                             if solver.BooleanValue(variable)}}
+    return solver.StatusName(status), solver.ObjectiveValue(), answer
+
+
+# name: (file name, write, load, build, solve, report, sizes). report returns the status, a summary value and the answer
+TASKS = {
+    'task1': ('supply_chain.xlsx', supply_chain_write, load_supply_chain_data, supply_chain_build, supply_chain_solve,
+              supply_chain_report, [(5, 4, 3, 4, 4), (10, 10, 5, 10, 10), (20, 20, 10, 20, 20), (40, 40, 20, 40, 40)]),
+    'task2': ('distances.xlsx', tsp_write, load_distances, tsp_build, tsp_solve, tsp_report, [10, 15, 20, 30]),
+    'task3': ('airport.xlsx', airport_write, load_airport_data, airport_build, airport_solve, airport_report,
+              [26, 100, 200, 400]),
+    'sudoku': ('sudoku.txt', sudoku_write, sudoku_load, sudoku_build, sudoku_solve, sudoku_report,
+               [(3, 30, 20), (4, 120, 20), (5, 350, 20)]),
+    'logical_puzzle': ('puzzle.json', puzzle_write, load_puzzle_spec, puzzle_build, puzzle_solve, puzzle_report,
+                       [(4, 3), (8, 3), (16, 3), (32, 3)]),
+    'project_planning': ('projects.xlsx', project_planning_write, load_project_planning_data, project_planning_build,
+                         project_planning_solve, project_planning_report,
+                         [(9, 11, 13, 12), (30, 40, 20, 24), (60, 100, 40, 36), (120, 200, 60, 48)]),
+}
+
+
+def run_task(name, size, seed=0, time_limit=30.0, workers=8, repeats=3):
+    '''Seconds of every phase of task name on the instance of size made with seed, with the status and the
+    objective (or the number of solved puzzles or entities) of its report. The whole run, from writing the file on,
+    is repeated repeats times and every phase keeps its fastest time.'''
+    file_name, write, load, build, solve, report, _ = TASKS[name]
+    times = {phase: float('inf') for phase in PHASES}
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, file_name)
+            write(size, seed, path)
+            start = time.perf_counter()
+            loaded = load(path)
+            times['load'] = min(times['load'], time.perf_counter() - start)
+            start = time.perf_counter()
+            state = build(loaded)
+            times['build'] = min(times['build'], time.perf_counter() - start)
+            start = time.perf_counter()
+            solved = solve(state, time_limit, workers)
+            times['solve'] = min(times['solve'], time.perf_counter() - start)
+            start = time.perf_counter()
+            status, value, _ = report(state, solved)
+            times['report'] = min(times['report'], time.perf_counter() - start)
+    return dict(task=name, size=size, seed=seed, status=status, value=value, **times)
+
+
+def compare(results, baseline, tolerance=1.25, min_slowdown=0.05):
+    '''Prints the ratio of every phase to the same task and size in baseline (a list of run_task results) and
+    returns the (task, size, phase) entries more than tolerance times and more than min_slowdown seconds slower'''
+    reference = {(entry['task'], json.dumps(entry['size'])): entry for entry in baseline}
+    slower = []
+    print("\n{:>17} {:>24}".format("task", "size") + "".join(" {:>9}".format(phase) for phase in PHASES))
+    for entry in results:
+        base = reference.get((entry['task'], json.dumps(entry['size'])))
+        if base is None:
+            continue
+        ratios = [entry[phase] / max(base[phase], 1e-6) for phase in PHASES]
+        print("{:>17} {:>24}".format(entry['task'], str(entry['size'])) +
+              "".join(" {:>8.2f}x".format(ratio) for ratio in ratios))
+        slower += [(entry['task'], entry['size'], phase) for phase, ratio in zip(PHASES, ratios)
+                   if ratio > tolerance and entry[phase] - base[phase] > min_slowdown]
+    for task, size, phase in slower:
+        print("{} {} {} is slower than the baseline".format(task, size, phase))
+    return slower
+
+
+def main(tasks=None, output=None, baseline=None, seed=0, time_limit=30.0, workers=8, tolerance=1.25, repeats=3,
+         min_slowdown=0.05):
+    '''Runs the size sweep of every task. Returns the results and the (task, size, phase) entries slower than the
+    baseline, none without a baseline.'''
+    results = []
+    print("{:>17} {:>24}".format("task", "size") + "".join(" {:>9}".format(phase + " (s)") for phase in PHASES) +
+          " {:>12} {:>12}".format("status", "value"))
+    for name in tasks or TASKS:
+        for size in TASKS[name][-1]:
+            entry = run_task(name, size, seed, time_limit, workers, repeats)
+            # Sizes as JSON gives them back, so that a run and its baseline compare equal
+            entry['size'] = json.loads(json.dumps(size))
+            results.append(entry)
+            value = "-" if entry['value'] is None else "{:.0f}".format(entry['value'])
+            print("{:>17} {:>24}".format(name, str(size)) +
+                  "".join(" {:>9.3f}".format(entry[phase]) for phase in PHASES) +
+                  " {:>12} {:>12}".format(entry['status'], value))
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump({'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(), 'ortools': ortools.__version__,
+                       'machine': platform.machine(), 'cpus': os.cpu_count(), 'seed': seed,
+                       'time_limit': time_limit, 'workers': workers, 'repeats': repeats, 'results': results}, f,
+                      indent=1)
+        print("\nResults written to {}".format(output))
+    slower = []
+    if baseline is not None:
+        with open(baseline) as f:
+            slower = compare(results, json.load(f)['results'], tolerance, min_slowdown)
+    return results, slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the load, build, solve and report phases of the six tasks")
+    parser.add_argument('--tasks', nargs='+', choices=list(TASKS), help="tasks to run, all of them by default")
+    parser.add_argument('--output', help="JSON file to write the results to")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=30.0, help="seconds per solve")
+    parser.add_argument('--workers', type=int, default=8, help="CP-SAT search workers")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="slowdown ratio flagged against the baseline")
+    parser.add_argument('--repeats', type=int, default=3, help="runs per instance, every phase keeps its fastest")
+    parser.add_argument('--min-slowdown', type=float, default=0.05,
+                        help="seconds a phase must lose on the baseline before it is flagged")
+    arguments = parser.parse_args()
+    _, slower = main(arguments.tasks, arguments.output, arguments.baseline, arguments.seed, arguments.time_limit,
+                     arguments.workers, arguments.tolerance, arguments.repeats, arguments.min_slowdown)
+    sys.exit(1 if slower else 0)
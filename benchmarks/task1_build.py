@@ -0,0 +1,119 @@
+'''Build time of the task1 supply chain LP against instance size.
+
+Compares the previous scalar lookup builder (reproduced below) with linear_programming.build_supply_chain_model.
+Run from the repository root with: python -m benchmarks.task1_build
+'''
+import time
+
+import pandas as pd
+from ortools.linear_solver import pywraplp
+
+from instance_generators import supply_chain_instance
+from linear_programming import build_supply_chain_model, supply_chain_arrays
+
+
+def build_with_scalar_lookups(task1_df, solver):
+    # The task1 model as it was built before, one .loc/pd.isnull lookup at a time
+    supplier_stock = task1_df['Supplier stock']
+    raw_material_costs = task1_df['Raw material costs']
+    raw_material_shipping = task1_df['Raw material shipping']
+    product_requirements = task1_df['Product requirements']
+    production_capacity = task1_df['Production capacity']
+    production_cost = task1_df['Production cost']
+    customer_demand = task1_df['Customer demand']
+    shipping_costs = task1_df['Shipping costs']
+    suppliers = list(supplier_stock.index)
+    materials = list(supplier_stock.columns)
+    factories = list(raw_material_shipping.columns)
+    products = list(product_requirements.index)
+    customers = list(customer_demand.columns)
+
+    orders = {}
+    for supplier in suppliers:
+        for material in materials:
+            if not pd.isnull(supplier_stock.loc[supplier, material]):
+                c = solver.Constraint(0, supplier_stock.loc[supplier, material])
+                for factory in factories:
+                    orders[(material, factory, supplier)] = solver.NumVar(0, solver.infinity(), material+'_'+factory+'_'+supplier)
+                    c.SetCoefficient(orders[(material, factory, supplier)], 1)
+
+    production_volume = {}
+    for factory in factories:
+        for product in products:
+            if not pd.isnull(production_capacity.loc[product, factory]):
+                production_volume[(product, factory)] = solver.NumVar(0, solver.infinity(), factory+'_'+product)
+                c = solver.Constraint(0, production_capacity.loc[product, factory])
+                c.SetCoefficient(production_volume[(product, factory)], 1)
+
+    deliveries = {}
+    for customer in customers:
+        for product in products:
+            if not pd.isnull(customer_demand.loc[product, customer]):
+                c = solver.Constraint(int(customer_demand.loc[product, customer]), int(customer_demand.loc[product, customer]))
+                for factory in factories:
+                    if not pd.isnull(production_capacity.loc[product, factory]):
+                        deliveries[(product, factory, customer)] = solver.NumVar(0, solver.infinity(), product+'_'+factory+'_'+customer)
+                        c.SetCoefficient(deliveries[(product, factory, customer)], 1)
+                        d = solver.Constraint(1, solver.infinity())
+                        d.SetCoefficient(production_volume[(product, factory)], 1)
+                        d.SetCoefficient(deliveries[(product, factory, customer)], -1)
+
+    for factory in factories:
+        for material in materials:
+            c = solver.Constraint(0, solver.infinity())
+            for supplier in suppliers:
+                if not pd.isnull(supplier_stock.loc[supplier, material]):
+                    c.SetCoefficient(orders[(material, factory, supplier)], 1)
+            for product in products:
+                if not pd.isnull(product_requirements.loc[product, material]):
+                    if not pd.isnull(production_capacity.loc[product, factory]):
+                        c.SetCoefficient(production_volume[(product, factory)], -product_requirements.loc[product, material])
+
+    cost = solver.Objective()
+    for supplier in suppliers:
+        for material in materials:
+            if not pd.isnull(supplier_stock.loc[supplier, material]):
+                for factory in factories:
+                    cost.SetCoefficient(orders[(material, factory, supplier)],
+                                        raw_material_costs.loc[supplier, material] + raw_material_shipping.loc[supplier, factory])
+    for factory in factories:
+        for product in products:
+            if not pd.isnull(production_capacity.loc[product, factory]):
+                cost.SetCoefficient(production_volume[(product, factory)], production_cost.loc[product, factory])
+    for customer in customers:
+        for product in products:
+            if not pd.isnull(customer_demand.loc[product, customer]):
+                for factory in factories:
+                    if not pd.isnull(production_capacity.loc[product, factory]):
+                        cost.SetCoefficient(deliveries[(product, factory, customer)], int(shipping_costs.loc[factory, customer]))
+    cost.SetMinimization()
+
+
+def build_with_arrays(task1_df, solver):
+    build_supply_chain_model(supply_chain_arrays(task1_df), solver)
+
+
+def time_build(builder, task1_df):
+    solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+    start = time.perf_counter()
+    builder(task1_df, solver)
+    elapsed = time.perf_counter() - start
+    solver.Solve()
+    return elapsed, solver.NumVariables(), solver.NumConstraints(), solver.Objective().Value()
+
+
+def main(sizes=(5, 20, 50, 100)):
+    print("{:>6} {:>9} {:>9} {:>12} {:>12} {:>9}".format("size", "vars", "rows", "scalar (s)", "arrays (s)", "speedup"))
+    for size in sizes:
+        # size suppliers, factories and customers, with proportionally fewer materials and products
+        task1_df = supply_chain_instance(n_suppliers=size, n_materials=max(size // 5, 2), n_factories=size,
+                                         n_products=max(size // 5, 2), n_customers=size, density=0.3, seed=size)
+        scalar_time, _, _, scalar_cost = time_build(build_with_scalar_lookups, task1_df)
+        array_time, variables, rows, array_cost = time_build(build_with_arrays, task1_df)
+        assert abs(scalar_cost - array_cost) <= 1e-6 * max(1.0, abs(scalar_cost))
+        print("{:>6} {:>9} {:>9} {:>12.3f} {:>12.3f} {:>8.1f}x".format(size, variables, rows, scalar_time, array_time,
+                                                                      scalar_time / array_time))
+
+
+if __name__ == "__main__":
+    main()
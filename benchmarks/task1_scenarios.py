@@ -0,0 +1,47 @@
+'''Throughput of run_scenarios on the task1 supply chain LP against the number of worker processes.
+
+Scenarios are +-10% demand shocks per customer. The first scenarios are checked against a model rebuilt from the
+shocked sheets. Run from the repository root with: python -m benchmarks.task1_scenarios
+'''
+import os
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import supply_chain_instance
+from linear_programming import build_supply_chain_model, demand_shock_scenarios, run_scenarios, supply_chain_arrays
+
+
+def check_against_rebuild(task1_df, scenarios, results, count=10):
+    for scenario in results['scenario'].unique()[:count]:
+        shocked = {sheet: frame.copy() for sheet, frame in task1_df.items()}
+        for _, delta in scenarios[scenarios['scenario'] == scenario].iterrows():
+            shocked[delta['sheet']].loc[delta['row'], delta['column']] *= delta['scale']
+        solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+        build_supply_chain_model(supply_chain_arrays(shocked), solver)
+        solver.Solve()
+        expected = solver.Objective().Value()
+        objective = results.loc[(results['scenario'] == scenario) & (results['variable'] == 'objective'), 'value'].iloc[0]
+        assert abs(objective - expected) <= 1e-6 * max(1.0, abs(expected))
+
+
+def main(size=40, count=200):
+    task1_df = supply_chain_instance(n_suppliers=size, n_materials=max(size // 5, 2), n_factories=size,
+                                     n_products=max(size // 5, 2), n_customers=size, density=0.3, seed=size)
+    scenarios = demand_shock_scenarios(task1_df, count, spread=0.1)
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print("{} scenarios, {} CPUs".format(count, os.cpu_count()))
+    print("{:>8} {:>10} {:>14} {:>8}".format("workers", "time (s)", "scenarios/s", "speedup"))
+    serial = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = run_scenarios(task1_df, scenarios, workers=workers)
+        elapsed = time.perf_counter() - start
+        serial = serial or elapsed
+        print("{:>8} {:>10.2f} {:>14.1f} {:>7.2f}x".format(workers, elapsed, count / elapsed, serial / elapsed))
+    check_against_rebuild(task1_df, scenarios, results)
+
+
+if __name__ == "__main__":
+    main()
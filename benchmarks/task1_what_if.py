@@ -0,0 +1,73 @@
+'''Latency of one what-if change on the task1 supply chain LP.
+
+Rebuilding and cold-solving the model for every change is compared with SupplyChainModel, which updates bounds or
+objective coefficients in place and re-solves from the previous basis. Both must give the same optimal cost.
+Run from the repository root with: python -m benchmarks.task1_what_if
+'''
+import time
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+
+from instance_generators import supply_chain_instance
+from linear_programming import SupplyChainModel, build_supply_chain_model, supply_chain_arrays
+
+
+def rebuild_and_solve(task1_df):
+    solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+    build_supply_chain_model(supply_chain_arrays(task1_df), solver)
+    solver.Solve()
+    return solver.Objective().Value()
+
+
+def what_ifs(task1_df, count, seed):
+    # Alternating demand, stock and shipping cost changes on cells that exist in the network. Demands are set to
+    # fractional values as well, the warm model must keep them exactly like a rebuild from the sheet does
+    rng = np.random.default_rng(seed)
+    demand_cells = task1_df['Customer demand'].stack().dropna().index
+    stock_cells = task1_df['Supplier stock'].stack().dropna().index
+    shipping_cells = task1_df['Shipping costs'].stack().dropna().index
+    changes = []
+    for i in range(count):
+        if i % 3 == 0:
+            product, customer = demand_cells[rng.integers(len(demand_cells))]
+            changes.append(('Customer demand', product, customer, int(rng.integers(1, 10)) + 0.5 * (i % 2)))
+        elif i % 3 == 1:
+            supplier, material = stock_cells[rng.integers(len(stock_cells))]
+            current = task1_df['Supplier stock'].loc[supplier, material]
+            changes.append(('Supplier stock', supplier, material, float(current + rng.integers(0, 20))))
+        else:
+            factory, customer = shipping_cells[rng.integers(len(shipping_cells))]
+            changes.append(('Shipping costs', factory, customer, int(rng.integers(10, 150))))
+    return changes
+
+
+def main(size=60, count=30, seed=0):
+    task1_df = supply_chain_instance(n_suppliers=size, n_materials=max(size // 5, 2), n_factories=size,
+                                     n_products=max(size // 5, 2), n_customers=size, density=0.3, seed=seed)
+    model = SupplyChainModel(task1_df)
+    model.solve()
+    update = {'Customer demand': model.set_demand, 'Supplier stock': model.set_stock,
+              'Shipping costs': model.set_shipping_cost}
+
+    rebuild_times = []
+    update_times = []
+    for sheet, row, column, value in what_ifs(task1_df, count, seed):
+        task1_df[sheet].loc[row, column] = value
+        start = time.perf_counter()
+        expected = rebuild_and_solve(task1_df)
+        rebuild_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        update[sheet](row, column, value)
+        model.solve()
+        update_times.append(time.perf_counter() - start)
+        assert abs(model.objective_value() - expected) <= 1e-6 * max(1.0, abs(expected))
+
+    print("{} what-ifs on {} variables".format(count, model.solver.NumVariables()))
+    print("rebuild + cold solve: median {:.1f} ms".format(1000 * np.median(rebuild_times)))
+    print("update + warm solve:  median {:.1f} ms".format(1000 * np.median(update_times)))
+
+
+if __name__ == "__main__":
+    main()
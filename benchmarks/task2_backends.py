@@ -0,0 +1,39 @@
+'''CBC (lazy subtour elimination) against CP-SAT (circuit constraint) for the task2 TSP as the number of towns grows.
+
+Both backends start from the same heuristic route. CP-SAT runs with the given number of workers and time limit;
+a 'feasible' status means it stopped at the limit. Run from the repository root with:
+python -m benchmarks.task2_backends
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import distance_matrix_instance
+from linear_programming import heuristic_route, solve_tsp_cp_sat, solve_tsp_lazy
+
+STATUS = {pywraplp.Solver.OPTIMAL: 'optimal', pywraplp.Solver.FEASIBLE: 'feasible'}
+
+
+def main(sizes=(10, 30, 60, 100, 150), workers=8, time_limit=120.0):
+    print("{:>6} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "towns", "cbc (s)", "cbc cost", "cp-sat (s)", "cp-sat", "status", "bound"))
+    for n in sizes:
+        distances = distance_matrix_instance(n, seed=n)
+        cities = list(distances.index)
+        route, _ = heuristic_route(distances, cities, cities[0])
+
+        start = time.perf_counter()
+        _, _, cbc_cost, _ = solve_tsp_lazy(distances, cities, route=route)
+        cbc_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status, _, cp_sat_cost, stats = solve_tsp_cp_sat(distances, cities, workers, time_limit, route=route)
+        cp_sat_time = time.perf_counter() - start
+        if status == pywraplp.Solver.OPTIMAL:
+            assert abs(cbc_cost - cp_sat_cost) < 1e-6
+        print("{:>6} {:>10.2f} {:>10.0f} {:>10.2f} {:>10.0f} {:>10} {:>10.0f}".format(
+            n, cbc_time, cbc_cost, cp_sat_time, cp_sat_cost, STATUS.get(status, 'failed'), stats['bound']))
+
+
+if __name__ == "__main__":
+    main()
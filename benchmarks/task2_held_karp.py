@@ -0,0 +1,55 @@
+'''Held-Karp dynamic program against the CBC models of task2 on small instances, to place HELD_KARP_LIMIT.
+
+The CBC columns include the heuristic route that task2 computes for their objective cutoff. Run from the repository root
+with:
+python -m benchmarks.task2_held_karp
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import distance_matrix_instance
+from linear_programming import (add_mtz_constraints, add_objective_cutoff, build_tsp_model, heuristic_route,
+                                solve_tsp_held_karp, solve_tsp_lazy)
+
+
+def _best_of(repeats, solve):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cost = solve()
+        times.append(time.perf_counter() - start)
+    return min(times), cost
+
+
+def main(sizes=(5, 8, 10, 12, 13, 14, 15, 16, 17, 18, 20), repeats=3):
+    print("{:>6} {:>14} {:>10} {:>10} {:>10}".format("towns", "held-karp (s)", "mtz (s)", "lazy (s)", "cost"))
+    for n in sizes:
+        distances = distance_matrix_instance(n, seed=n)
+        cities = list(distances.index)
+
+        def held_karp():
+            return solve_tsp_held_karp(distances, cities, cities[0])[2]
+
+        def mtz():
+            _, length = heuristic_route(distances, cities, cities[0])
+            solver = pywraplp.Solver('TSPSolver', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+            city_pair = build_tsp_model(distances, cities, solver)
+            add_mtz_constraints(solver, city_pair, cities)
+            add_objective_cutoff(solver, length)
+            solver.Solve()
+            return solver.Objective().Value()
+
+        def lazy():
+            route, _ = heuristic_route(distances, cities, cities[0])
+            return solve_tsp_lazy(distances, cities, route=route)[2]
+
+        held_karp_time, cost = _best_of(repeats, held_karp)
+        mtz_time, mtz_cost = _best_of(repeats, mtz)
+        lazy_time, lazy_cost = _best_of(repeats, lazy)
+        assert abs(cost - mtz_cost) < 1e-6 and abs(cost - lazy_cost) < 1e-6
+        print("{:>6} {:>14.4f} {:>10.4f} {:>10.4f} {:>10.0f}".format(n, held_karp_time, mtz_time, lazy_time, cost))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+'''Gap and runtime of the task2 TSP heuristic against the exact lazy subtour elimination solve.
+
+The exact solve is run cold and warm started from the heuristic route. Sizes above exact_limit are only run
+through the heuristic. Run from the repository root with: python -m benchmarks.task2_heuristic
+'''
+import time
+
+from instance_generators import distance_matrix_instance
+from linear_programming import heuristic_route, load_distances, solve_tsp_lazy
+
+BUNDLED_CITIES = ['Cork', 'Athlone', 'Belfast', 'Dublin', 'Galway', 'Limerick', 'Rosslare', 'Waterford', 'Wexford',
+                  'Wicklow']
+
+
+def run(name, distances, cities, exact, time_limit):
+    row = {'instance': name, 'towns': len(cities)}
+    for construction in ('nearest', 'greedy'):
+        start = time.perf_counter()
+        route, length = heuristic_route(distances, cities, cities[0], time_limit, construction)
+        row[construction + ' (s)'] = time.perf_counter() - start
+        row[construction] = length
+    best = min(('nearest', 'greedy'), key=lambda construction: row[construction])
+    if exact:
+        start = time.perf_counter()
+        _, _, optimum, _ = solve_tsp_lazy(distances, cities)
+        row['exact cold (s)'] = time.perf_counter() - start
+        route, _ = heuristic_route(distances, cities, cities[0], time_limit, best)
+        start = time.perf_counter()
+        _, _, warm_optimum, _ = solve_tsp_lazy(distances, cities, route=route)
+        row['exact warm (s)'] = time.perf_counter() - start
+        assert abs(optimum - warm_optimum) < 1e-6
+        row['optimum'] = optimum
+        for construction in ('nearest', 'greedy'):
+            row[construction + ' gap %'] = 100 * (row[construction] - optimum) / optimum
+    return row
+
+
+def main(sizes=(30, 60, 100, 300, 1000), exact_limit=100, time_limit=2.0):
+    rows = [run('bundled', load_distances(), BUNDLED_CITIES, True, time_limit)]
+    for n in sizes:
+        distances = distance_matrix_instance(n, seed=n)
+        rows.append(run('random', distances, list(distances.index), n <= exact_limit, time_limit))
+    columns = ['instance', 'towns', 'nearest', 'nearest (s)', 'nearest gap %', 'greedy', 'greedy (s)', 'greedy gap %',
+               'optimum', 'exact cold (s)', 'exact warm (s)']
+    print(" ".join("{:>14}".format(column) for column in columns))
+    for row in rows:
+        cells = [row.get(column, '-') for column in columns]
+        print(" ".join("{:>14}".format(cell if isinstance(cell, (str, int)) else "{:.2f}".format(cell))
+                       for cell in cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+'''MTZ against lazy subtour elimination for the task2 TSP as the number of towns grows.
+
+Run from the repository root with: python -m benchmarks.task2_subtours
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import distance_matrix_instance
+from linear_programming import add_mtz_constraints, build_tsp_model, solve_tsp_lazy
+
+
+def solve_mtz(distances, cities, time_limit_s):
+    solver = pywraplp.Solver('TSPSolver', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    solver.SetTimeLimit(int(1000 * time_limit_s))
+    city_pair = build_tsp_model(distances, cities, solver)
+    add_mtz_constraints(solver, city_pair, cities)
+    status = solver.Solve()
+    return solver.Objective().Value() if status == pywraplp.Solver.OPTIMAL else None
+
+
+def main(sizes=(10, 30, 60, 100, 150), mtz_time_limit_s=60):
+    print("{:>6} {:>10} {:>10} {:>10} {:>10} {:>6} {:>6} {:>6} {:>7}".format(
+        "towns", "mtz (s)", "lazy (s)", "mtz cost", "lazy cost", "lp", "mip", "cuts", "legs"))
+    for n in sizes:
+        distances = distance_matrix_instance(n, seed=n)
+        cities = list(distances.index)
+        start = time.perf_counter()
+        mtz_cost = solve_mtz(distances, cities, mtz_time_limit_s)
+        mtz_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status, successors, lazy_cost, stats = solve_tsp_lazy(distances, cities)
+        lazy_time = time.perf_counter() - start
+        if mtz_cost is not None:
+            assert abs(mtz_cost - lazy_cost) < 1e-6
+        print("{:>6} {:>10} {:>10.2f} {:>10} {:>10.0f} {:>6} {:>6} {:>6} {:>7}".format(
+            n, "{:.2f}".format(mtz_time) if mtz_cost is not None else "timeout", lazy_time,
+            "{:.0f}".format(mtz_cost) if mtz_cost is not None else "-", lazy_cost,
+            stats['lp_rounds'], stats['mip_rounds'], stats['cuts'], stats['legs']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+'''CBC (compact model) against CP-SAT (interval model) for task3 on scaled schedules with tight gates.
+
+CP-SAT runs with the given number of workers and time limit; a 'feasible' status means it stopped at the limit.
+Run from the repository root with: python -m benchmarks.task3_backends
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import airport_conflicts, build_compact_airport_model, solve_airport_cp_sat
+
+STATUS = {pywraplp.Solver.OPTIMAL: 'optimal', pywraplp.Solver.FEASIBLE: 'feasible'}
+
+
+def main(sizes=(26, 100, 200, 400, 800), workers=8, time_limit=120.0):
+    print("{:>8} {:>10} {:>10} {:>10} {:>8} {:>10} {:>10}".format(
+        "flights", "cbc (s)", "cbc", "cp-sat (s)", "cp-sat", "status", "bound"))
+    for n in sizes:
+        task3_df = airport_instance(n, seed=n, gate_slack=1.0)
+
+        start = time.perf_counter()
+        solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+        solver.SetTimeLimit(int(time_limit * 1000))
+        build_compact_airport_model(task3_df, solver)
+        cbc_status = solver.Solve()
+        cbc_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status, allocation, distance, stats = solve_airport_cp_sat(task3_df, workers, time_limit)
+        cp_sat_time = time.perf_counter() - start
+        assert allocation is not None and not airport_conflicts(task3_df, allocation)
+        if status == cbc_status == pywraplp.Solver.OPTIMAL:
+            assert distance == solver.Objective().Value()
+        print("{:>8} {:>10.2f} {:>10.0f} {:>10.2f} {:>8} {:>10} {:>10.0f}".format(
+            n, cbc_time, solver.Objective().Value(), cp_sat_time, distance, STATUS.get(status, 'failed'),
+            stats['bound']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''Rows, nonzeros and build time of the task3 runway (I) and gate (J) constraints against schedule size.
+
+Compares the previous per slot, per flight .loc scan (reproduced below) with the sweep-line index used by
+linear_programming.build_airport_model. The previous scan is only run up to legacy_limit flights. Run from the
+repository root with: python -m benchmarks.task3_build
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import airport_time_index, model_size
+
+
+def add_capacity_rows_with_lookups(task3_df, solver, arrival, departure, terminal_allocation):
+    # Blocks I and J as they were built before: every runway/terminal, every slot (duplicates included), every flight
+    flight_schedule = task3_df['Flight schedule']
+    terminal_capacity = task3_df['Terminal capacity']
+    flights = list(flight_schedule.index)
+    time_slots = list(set(flight_schedule['Arrival'])) + list(set(flight_schedule['Departure']))
+    for runway in task3_df['Taxi distances'].index:
+        for slot in time_slots:
+            c = solver.Constraint(0, 1)
+            for flight in flights:
+                if slot == flight_schedule.loc[flight, 'Arrival']:
+                    c.SetCoefficient(arrival[(flight, runway)], 1)
+                    c.SetCoefficient(departure[(flight, runway)], 0)
+                elif slot == flight_schedule.loc[flight, 'Departure']:
+                    c.SetCoefficient(arrival[(flight, runway)], 0)
+                    c.SetCoefficient(departure[(flight, runway)], 1)
+    for terminal in terminal_capacity.index:
+        for slot in time_slots:
+            c = solver.Constraint(0, int(terminal_capacity.loc[terminal, 'Gates']))
+            for flight in flights:
+                if flight_schedule.loc[flight, 'Arrival'] <= slot < flight_schedule.loc[flight, 'Departure']:
+                    c.SetCoefficient(terminal_allocation[(flight, terminal)], 1)
+                else:
+                    c.SetCoefficient(terminal_allocation[(flight, terminal)], 0)
+
+
+def add_capacity_rows_with_index(task3_df, solver, arrival, departure, terminal_allocation):
+    # Blocks I and J as in build_airport_model
+    terminal_capacity = task3_df['Terminal capacity']
+    _, runway_slots, ground_sets = airport_time_index(task3_df['Flight schedule'])
+    for runway in task3_df['Taxi distances'].index:
+        for _, arriving, departing in runway_slots:
+            c = solver.Constraint(0, 1)
+            for flight in arriving:
+                c.SetCoefficient(arrival[(flight, runway)], 1)
+            for flight in departing:
+                c.SetCoefficient(departure[(flight, runway)], 1)
+    for terminal in terminal_capacity.index:
+        gates = int(terminal_capacity.loc[terminal, 'Gates'])
+        for _, on_ground in ground_sets:
+            c = solver.Constraint(0, gates)
+            for flight in on_ground:
+                c.SetCoefficient(terminal_allocation[(flight, terminal)], 1)
+
+
+def measure(task3_df, add_rows):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    flights = task3_df['Flight schedule'].index
+    arrival, departure, terminal_allocation = {}, {}, {}
+    for flight in flights:
+        for runway in task3_df['Taxi distances'].index:
+            arrival[(flight, runway)] = solver.BoolVar('')
+            departure[(flight, runway)] = solver.BoolVar('')
+        for terminal in task3_df['Terminal capacity'].index:
+            terminal_allocation[(flight, terminal)] = solver.BoolVar('')
+    start = time.perf_counter()
+    add_rows(task3_df, solver, arrival, departure, terminal_allocation)
+    elapsed = time.perf_counter() - start
+    _, rows, nonzeros = model_size(solver)
+    return elapsed, rows, nonzeros
+
+
+def main(sizes=(26, 100, 300, 1500), legacy_limit=300):
+    print("{:>8} {:>12} {:>10} {:>12} {:>12} {:>10} {:>12}".format(
+        "flights", "before (s)", "rows", "nonzeros", "index (s)", "rows", "nonzeros"))
+    for n in sizes:
+        task3_df = airport_instance(n, seed=n)
+        index_time, index_rows, index_nonzeros = measure(task3_df, add_capacity_rows_with_index)
+        if n <= legacy_limit:
+            legacy = "{:>12.2f} {:>10} {:>12}".format(*measure(task3_df, add_capacity_rows_with_lookups))
+        else:
+            legacy = "{:>12} {:>10} {:>12}".format('-', '-', '-')
+        print("{:>8} {} {:>12.3f} {:>10} {:>12}".format(n, legacy, index_time, index_rows, index_nonzeros))
+
+
+if __name__ == "__main__":
+    main()
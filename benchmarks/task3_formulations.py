@@ -0,0 +1,49 @@
+'''Size and CBC solve time of the full and compact task3 formulations on scaled schedules. 'all legs' is the compact
+formulation with a taxi leg for every runway and terminal, without the pruning of airport_candidate_runways.
+
+Gates are tight (gate_slack=1.0) so that the terminal rows bind. All formulations must reach the same taxi distance.
+Run from the repository root with: python -m benchmarks.task3_formulations
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import build_airport_model, build_compact_airport_model, model_size
+
+
+def build_with_all_legs(task3_df, solver):
+    return build_compact_airport_model(task3_df, solver, prune=False)
+
+
+BUILDERS = {'full': build_airport_model, 'all legs': build_with_all_legs, 'compact': build_compact_airport_model}
+
+
+def solve(task3_df, formulation, time_limit):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    solver.SetTimeLimit(int(time_limit * 1000))
+    BUILDERS[formulation](task3_df, solver)
+    start = time.perf_counter()
+    status = solver.Solve()
+    elapsed = time.perf_counter() - start
+    return model_size(solver), status, solver.Objective().Value(), elapsed
+
+
+def main(sizes=(26, 100, 200, 400, 800), time_limit=300.0):
+    print("{:>8} {:>8} {:>10} {:>8} {:>10} {:>10} {:>10}".format(
+        "flights", "model", "variables", "rows", "nonzeros", "solve (s)", "distance"))
+    for n in sizes:
+        task3_df = airport_instance(n, seed=n, gate_slack=1.0)
+        results = {}
+        for formulation in BUILDERS:
+            (variables, rows, nonzeros), status, distance, elapsed = solve(task3_df, formulation, time_limit)
+            results[formulation] = (status, distance)
+            print("{:>8} {:>8} {:>10} {:>8} {:>10} {:>10.2f} {:>10.0f}{}".format(
+                n, formulation, variables, rows, nonzeros, elapsed, distance,
+                '' if status == pywraplp.Solver.OPTIMAL else ' (time limit)'))
+        if all(status == pywraplp.Solver.OPTIMAL for status, _ in results.values()):
+            assert results['full'][1] == results['all legs'][1] == results['compact'][1]
+
+
+if __name__ == "__main__":
+    main()
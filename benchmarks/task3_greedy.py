@@ -0,0 +1,56 @@
+'''Greedy gate/runway allocation against the exact compact task3 model: taxi distance, gap and time.
+
+Also shows what a CBC run stopped after short_limit seconds has to offer, which is where the greedy allocation is
+kept as fallback by task3. The exact model is only solved up to exact_limit flights. Run from the repository root
+with: python -m benchmarks.task3_greedy
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import (airport_conflicts, airport_taxi_distance, build_compact_airport_model,
+                                greedy_airport_allocation)
+
+
+def solve_compact(task3_df, time_limit):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    solver.SetTimeLimit(int(time_limit * 1000))
+    build_compact_airport_model(task3_df, solver)
+    start = time.perf_counter()
+    status = solver.Solve()
+    elapsed = time.perf_counter() - start
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return status, None, elapsed
+    return status, solver.Objective().Value(), elapsed
+
+
+def main(sizes=(26, 100, 200, 400, 800, 1500), gate_slack=1.0, short_limit=1.0, exact_limit=800, time_limit=300.0):
+    print("{:>8} {:>11} {:>9} {:>10} {:>10} {:>9} {:>8}".format(
+        "flights", "greedy (s)", "greedy", "cbc {:.0f} s".format(short_limit), "exact (s)", "exact", "gap %"))
+    for n in sizes:
+        task3_df = airport_instance(n, seed=n, gate_slack=gate_slack)
+        start = time.perf_counter()
+        allocation = greedy_airport_allocation(task3_df)
+        greedy_time = time.perf_counter() - start
+        if allocation is None:
+            greedy = 'failed'
+        else:
+            assert not airport_conflicts(task3_df, allocation)
+            greedy = airport_taxi_distance(task3_df, allocation)
+
+        _, short, _ = solve_compact(task3_df, short_limit)
+        exact, exact_time, gap = '-', '-', '-'
+        if n <= exact_limit:
+            status, best, elapsed = solve_compact(task3_df, time_limit)
+            exact_time = "{:.2f}".format(elapsed)
+            if status == pywraplp.Solver.OPTIMAL:
+                exact = "{:.0f}".format(best)
+                if allocation is not None:
+                    gap = "{:.2f}".format(100 * (greedy - best) / best)
+        print("{:>8} {:>11.4f} {:>9} {:>10} {:>10} {:>9} {:>8}".format(
+            n, greedy_time, greedy, 'none' if short is None else "{:.0f}".format(short), exact_time, exact, gap))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+'''Re-optimization time of linear_programming.AirportModel after single flight delays on a full day schedule.
+
+The day is allocated once with the rolling horizon solver, which is also the time of starting over after every
+change. Each delay moves one flight to the next minutes where its arrival and departure still find a free runway.
+Run from the repository root with: python -m benchmarks.task3_incremental
+'''
+import collections
+import datetime
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import AirportModel, _minutes, airport_conflicts, solve_airport_rolling_horizon
+
+
+def _clock(minutes):
+    return datetime.time(int(minutes) // 60, int(minutes) % 60)
+
+
+def main(n_flights=1500, delays=10, radius=15, seed=0):
+    task3_df = airport_instance(n_flights, seed=seed)
+    flight_schedule = task3_df['Flight schedule']
+    runways = len(task3_df['Taxi distances'])
+
+    start = time.perf_counter()
+    allocation, distance, _ = solve_airport_rolling_horizon(task3_df)
+    print("Rolling horizon allocation of {} flights: {:.2f} s, taxi distance {}".format(
+        n_flights, time.perf_counter() - start, distance))
+    start = time.perf_counter()
+    model = AirportModel(task3_df, allocation)
+    print("AirportModel built in {:.2f} s\n".format(time.perf_counter() - start))
+
+    movements = collections.Counter([_minutes(t) for t in flight_schedule['Arrival']] +
+                                    [_minutes(t) for t in flight_schedule['Departure']])
+    print("{:>12} {:>8} {:>10} {:>10} {:>8} {:>10}".format("flight", "delay", "update (s)", "solve (s)", "free",
+                                                           "distance"))
+    for flight in flight_schedule.index[::len(flight_schedule) // delays][:delays]:
+        arrival, departure = _minutes(flight_schedule.loc[flight, 'Arrival']), _minutes(flight_schedule.loc[flight, 'Departure'])
+        delay = next(delay for delay in range(5, 120) if departure + delay < 24 * 60 and
+                     movements[arrival + delay] < runways and movements[departure + delay] < runways)
+        movements.subtract([arrival, departure])
+        movements.update([arrival + delay, departure + delay])
+
+        start = time.perf_counter()
+        model.set_times(flight, _clock(arrival + delay), _clock(departure + delay))
+        updated = time.perf_counter()
+        status = model.solve(radius=radius)
+        solved = time.perf_counter()
+        assert status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+        assert not airport_conflicts(model.task3_df, model.allocation)
+        print("{:>12} {:>8} {:>10.3f} {:>10.3f} {:>8} {:>10.0f}".format(
+            flight, delay, updated - start, solved - updated, model.free_flights, model.objective_value()))
+
+
+if __name__ == "__main__":
+    main()
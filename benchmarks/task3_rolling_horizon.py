@@ -0,0 +1,45 @@
+'''Rolling horizon against the monolithic compact task3 model: taxi distance, gap and time on scaled schedules.
+
+The monolithic model is only solved up to monolithic_limit flights. Run from the repository root with:
+python -m benchmarks.task3_rolling_horizon
+'''
+import time
+
+from ortools.linear_solver import pywraplp
+
+from instance_generators import airport_instance
+from linear_programming import airport_conflicts, build_compact_airport_model, solve_airport_rolling_horizon
+
+
+def solve_monolithic(task3_df, time_limit):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    solver.SetTimeLimit(int(time_limit * 1000))
+    build_compact_airport_model(task3_df, solver)
+    status = solver.Solve()
+    return status, solver.Objective().Value()
+
+
+def main(sizes=(26, 100, 200, 400, 800, 1500), horizon=(180, 120), monolithic_limit=800, time_limit=300.0):
+    print("{:>8} {:>14} {:>12} {:>14} {:>10} {:>8} {:>8}".format(
+        "flights", "monolithic (s)", "distance", "rolling (s)", "distance", "gap %", "windows"))
+    for n in sizes:
+        task3_df = airport_instance(n, seed=n, gate_slack=1.0)
+        start = time.perf_counter()
+        allocation, distance, stats = solve_airport_rolling_horizon(task3_df, *horizon)
+        rolling_time = time.perf_counter() - start
+        assert not airport_conflicts(task3_df, allocation)
+
+        monolithic = "{:>14} {:>12}".format('-', '-')
+        gap = '-'
+        if n <= monolithic_limit:
+            start = time.perf_counter()
+            status, best = solve_monolithic(task3_df, time_limit)
+            monolithic = "{:>14.2f} {:>12.0f}".format(time.perf_counter() - start, best)
+            if status == pywraplp.Solver.OPTIMAL:
+                gap = "{:.2f}".format(100 * (distance - best) / best)
+        print("{:>8} {} {:>14.2f} {:>10} {:>8} {:>8}".format(n, monolithic, rolling_time, distance, gap,
+                                                            stats['windows']))
+
+
+if __name__ == "__main__":
+    main()
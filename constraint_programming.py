@@ -1,75 +1,177 @@
-import pandas as pd
 import numpy as np
 from ortools.sat.python import cp_model
-import copy
-
-
-def logical_puzzle():
-    names = ["Carol", "Elisa", "Oliver", "Lucas"]
-    nationalities = ["Australia", "USA", "SouthAfrica", "Canada"]
-    universities = ["London", "Cambridge", "Oxford", "Edinburgh"]
-    subjects = ["History", "Law", "Medicine", "Architecture"]
-    genders = ["Boy", "Girl"]
-
-    class SolutionPrinter(cp_model.CpSolverSolutionCallback):
-        def __init__(self, gender, university, subject, nationality):
-            cp_model.CpSolverSolutionCallback.__init__(self)
-            self.gender_ = gender
-            self.university_ = university
-            self.subject_ = subject
-            self.nationality_ = nationality
-
-            self.solutions_ = 0
-
-        def OnSolutionCallback(self):
-            self.solutions_ = self.solutions_ + 1
-            print("solution", self.solutions_)
-
-            for name in names:
-                print(" - " + name + ":")
-                for gender in genders:
-                    if self.Value(self.gender_[name][gender]):
-                        print("    gender - ", gender)
-                for nationality in nationalities:
-                    if self.Value(self.nationality_[name][nationality]):
-                        print("    nationality - ", nationality)
-                for university in universities:
-                    if self.Value(self.university_[name][university]):
-                        print("    university - ", university)
-                for subject in subjects:
-                    if self.Value(self.subject_[name][subject]):
-                        print("    subject - ", subject)
-
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from solution_sinks import solution_sink
+from workbook_cache import read_workbook
+
+
+def _search_all_solutions(model, printer, sink, variables, path, limit, names=None):
+    # Enumerates with the task's printer, or with a count/array/stream sink over variables (columns named names, the
+    # variable names by default) when sink is given
+    solver = cp_model.CpSolver()
+    if sink is None:
+        status = solver.SearchForAllSolutions(model, printer)
+        return solver, status, printer
+    with solution_sink(sink, variables, names, path=path, limit=limit) as callback:
+        status = solver.SearchForAllSolutions(model, callback)
+    print("{} solutions ({})".format(callback.solutions_, solver.StatusName(status)))
+    return solver, status, callback
+
+
+def linear_sum(variables):
+    '''Sum of variables as one expression, built in a single call instead of one expression node per +'''
+    return cp_model.LinearExpr.Sum(list(variables))
+
+
+def weighted_sum(variables, coefficients):
+    '''Sum of coefficient * variable over the parallel iterables variables and coefficients, built in a single call.
+    CP-SAT only takes integer coefficients, a non integral one raises a ValueError.'''
+    coefficients = np.fromiter(coefficients, dtype=float)
+    fractional = coefficients != np.floor(coefficients)
+    if fractional.any():
+        raise ValueError("Linear expressions only accept integer coefficients, got {}".format(
+            coefficients[fractional][0]))
+    return cp_model.LinearExpr.WeightedSum(list(variables), coefficients.astype(np.int64).tolist())
+
+
+def one_hot_assignment(model, names, attributes):
+    '''Boolean formulation of a one to one assignment of names to the values of every attribute in model: one BoolVar
+    per (name, value), at least one value per name and attribute, and a clause per pair of names and value so that no
+    two names share it. Returns assignment[attribute][name][value].'''
+    assignment = {}
+    for attribute, values in attributes.items():
+        student_values = {}
+        for name in names:
+            variables = {}
+            for value in values:
+                variables[value] = model.NewBoolVar(name + value)
+            student_values[name] = variables
+        assignment[attribute] = student_values
+
+    for attribute, values in attributes.items():
+        # Every student has at least one value
+        for name in names:
+            model.AddBoolOr([assignment[attribute][name][value] for value in values])
+
+        # All students have different values. With as many values as students, this also leaves one value per student
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                for value in values:
+                    model.AddBoolOr([assignment[attribute][names[i]][value].Not(),
+                                     assignment[attribute][names[j]][value].Not()])
+    return assignment
+
+
+def all_different_assignment(model, names, attributes):
+    '''Integer formulation of the assignment of one_hot_assignment: one IntVar per (name, attribute) holding the
+    position of its value, and one AddAllDifferent per attribute. The BoolVars of one_hot_assignment are channelled
+    to it with AddMapDomain (true exactly when the integer takes their position), so the clues stay the same.
+
+    Returns assignment[attribute][name][value] and the integers as position[attribute][name].'''
+    assignment = {}
+    position = {}
+    for attribute, values in attributes.items():
+        assignment[attribute] = {}
+        position[attribute] = {}
+        for name in names:
+            position[attribute][name] = model.NewIntVar(0, len(values) - 1, name + attribute)
+            assignment[attribute][name] = {value: model.NewBoolVar(name + value) for value in values}
+            model.AddMapDomain(position[attribute][name], list(assignment[attribute][name].values()))
+        model.AddAllDifferent(list(position[attribute].values()))
+    return assignment, position
+
+
+# JSON specification of the puzzle of logical_puzzle
+LOGICAL_PUZZLE_SPEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logical_puzzle.json")
+
+# Compiled specifications by hash and formulation: the model and the proto index of every boolean
+_puzzle_models = {}
+
+
+def load_puzzle_spec(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def puzzle_spec_hash(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _spec_literal(assignment, literal, entity=None):
+    # "Carol.university=Cambridge", negated by a leading "!", with "*" standing for entity
+    negated = literal.startswith("!")
+    name, statement = literal.lstrip("!").split(".", 1)
+    attribute, value = statement.split("=", 1)
+    variable = assignment[attribute][entity if name == "*" else name][value]
+    return variable.Not() if negated else variable
+
+
+def _build_puzzle_spec(spec, formulation):
     model = cp_model.CpModel()
-    # Decision variables creation
-    student_nationality = {}
-    for name in names:
-        variables = {}
-        for nationality in nationalities:
-            variables[nationality] = model.NewBoolVar(name + nationality)
-        student_nationality[name] = variables
-
-    student_university = {}
-    for name in names:
-        variables = {}
-        for university in universities:
-            variables[university] = model.NewBoolVar(name + university)
-        student_university[name] = variables
-
-    student_subject = {}
-    for name in names:
-        variables = {}
-        for subject in subjects:
-            variables[subject] = model.NewBoolVar(name + subject)
-        student_subject[name] = variables
-
-    student_gender = {}
-    for name in names:
-        variables = {}
-        for gender in genders:
-            variables[gender] = model.NewBoolVar(name + gender)
-        student_gender[name] = variables
-
+    entities = spec["entities"]
+    unique = {attribute: description["values"] for attribute, description in spec["attributes"].items()
+              if description.get("unique")}
+    if formulation == 'integer':
+        assignment, _ = all_different_assignment(model, entities, unique)
+    else:
+        assignment = one_hot_assignment(model, entities, unique)
+    for attribute, description in spec["attributes"].items():
+        if attribute not in unique:
+            assignment[attribute] = {}
+            for name in entities:
+                assignment[attribute][name] = {value: model.NewBoolVar(name + value)
+                                               for value in description["values"]}
+                model.AddExactlyOne(list(assignment[attribute][name].values()))
+
+    add = {"or": model.AddBoolOr, "xor": model.AddBoolXOr, "and": model.AddBoolAnd}
+    for clue in spec["clues"]:
+        kind = [kind for kind in add if kind in clue][0]
+        literals = clue[kind] + clue.get("if", [])
+        # A clue about "*" holds for every entity
+        for entity in (entities if any(literal.lstrip("!").startswith("*.") for literal in literals) else [None]):
+            constraint = add[kind]([_spec_literal(assignment, literal, entity) for literal in clue[kind]])
+            if "if" in clue:
+                constraint.OnlyEnforceIf([_spec_literal(assignment, literal, entity) for literal in clue["if"]])
+    return model, assignment
+
+
+def compile_puzzle_spec(spec, formulation='integer'):
+    '''CpModel of a puzzle specification and its booleans as assignment[attribute][entity][value].
+
+    The specification (a dict, as read from JSON by load_puzzle_spec) has:
+      entities: the names of the people or things of the puzzle
+      attributes: {attribute: {"values": [...], "unique": true}}, every entity takes one value of every attribute and
+        no two entities share the value of a unique attribute (built by one_hot_assignment or
+        all_different_assignment as formulation says)
+      clues: clauses {"or" | "xor" | "and": [literals], "if": [literals]}: at least one, an odd number or all of the
+        literals hold, only when all the "if" literals hold. A literal is "entity.attribute=value", negated by a
+        leading "!", and a clue whose literals use "*" as entity is added once per entity.
+    Any other key (a "text" with the clue in words, say) is ignored.
+
+    The compiled model is kept under the hash of the specification, so compiling the same specification again
+    clones the kept proto instead of building the model.'''
+    key = (puzzle_spec_hash(spec), formulation)
+    if key not in _puzzle_models:
+        model, assignment = _build_puzzle_spec(spec, formulation)
+        indices = {attribute: {name: {value: variable.Index() for value, variable in values.items()}
+                               for name, values in entity_values.items()}
+                   for attribute, entity_values in assignment.items()}
+        _puzzle_models[key] = (model, indices)
+    model, indices = _puzzle_models[key]
+    model = model.Clone()
+    assignment = {attribute: {name: {value: model.GetBoolVarFromProtoIndex(index) for value, index in values.items()}
+                              for name, values in entity_indices.items()}
+                  for attribute, entity_indices in indices.items()}
+    return model, assignment
+
+
+def add_logical_puzzle_clues(model, names, student_gender, student_nationality, student_university, student_subject):
+    '''The clues of the Carol, Elisa, Oliver and Lucas puzzle, written on the booleans of logical_puzzle'''
     # Let's assign genders for students
     model.AddBoolAnd([student_gender["Carol"]["Girl"],
                       student_gender["Elisa"]["Girl"],
@@ -150,60 +252,89 @@ def logical_puzzle():
         model.AddBoolOr([student_subject[name]["Law"], student_university[name]["Edinburgh"]]). \
             OnlyEnforceIf(student_nationality[name]["SouthAfrica"])
 
-    # Every student has at least one property value
-    for name in names:
-        # every student has a nationality
-        variables = []
-        for nationality in nationalities:
-            variables.append(student_nationality[name][nationality])
-        model.AddBoolOr(variables)
-
-        # every student has a university
-        variables = []
-        for university in universities:
-            variables.append(student_university[name][university])
-        model.AddBoolOr(variables)
-
-        # every student has a subject
-        variables = []
-        for subject in subjects:
-            variables.append(student_subject[name][subject])
-        model.AddBoolOr(variables)
-
-    # Every student has no more than one nationality/university/subject
-    for i in range(len(names)):
-        for j in range(i + 1, len(names)):
-            # Since we have 4 different values for nationality, subject and university, we can do it in single for loop
-            for k in range(4):
-                model.AddBoolOr([student_nationality[names[i]][nationalities[k]].Not(),
-                                 student_nationality[names[j]][nationalities[k]].Not()
-                                 ])
-                model.AddBoolOr([student_subject[names[i]][subjects[k]].Not(),
-                                 student_subject[names[j]][subjects[k]].Not()
-                                 ])
-                model.AddBoolOr([student_university[names[i]][universities[k]].Not(),
-                                 student_university[names[j]][universities[k]].Not()
-                                 ])
-
-    # All students have different nationality/university/subject
-    for i in range(len(names)):
-        for j in range(i + 1, len(names)):
-            # All students have different nationality/university/subject, and we have 4 unique values for each
-            # If there are different number of values for each property, then the below for loop will be split/repeated
-            for k in range(4):
-                model.AddBoolOr([student_nationality[names[i]][nationalities[k]].Not(),
-                                 student_nationality[names[j]][nationalities[k]].Not()
-                                 ])
-                model.AddBoolOr([student_university[names[i]][universities[k]].Not(),
-                                 student_university[names[j]][universities[k]].Not()
-                                 ])
-                model.AddBoolOr([student_subject[names[i]][subjects[k]].Not(),
-                                 student_subject[names[j]][subjects[k]].Not()
-                                 ])
 
-    solver = cp_model.CpSolver()
-    solver.SearchForAllSolutions(model, SolutionPrinter(student_gender, student_university, student_subject,
-                                                        student_nationality))
+def logical_puzzle(formulation='boolean', spec=None, sink=None, path=None, limit=None):
+    '''formulation is 'boolean' for the clauses of one_hot_assignment or 'integer' for all_different_assignment.
+    spec, a puzzle specification or the path of its JSON file (see compile_puzzle_spec), replaces the hand written
+    model; LOGICAL_PUZZLE_SPEC describes this same puzzle.
+
+    Prints every solution, or hands them to a solution sink (count, array or stream, see solution_sinks) when sink is
+    given. Returns the printer or sink.'''
+    names = ["Carol", "Elisa", "Oliver", "Lucas"]
+    nationalities = ["Australia", "USA", "SouthAfrica", "Canada"]
+    universities = ["London", "Cambridge", "Oxford", "Edinburgh"]
+    subjects = ["History", "Law", "Medicine", "Architecture"]
+    genders = ["Boy", "Girl"]
+    if spec is not None:
+        spec = load_puzzle_spec(spec) if isinstance(spec, str) else spec
+        names = spec["entities"]
+        nationalities, universities, subjects, genders = [spec["attributes"][attribute]["values"] for attribute in
+                                                          ("nationality", "university", "subject", "gender")]
+
+    class SolutionPrinter(cp_model.CpSolverSolutionCallback):
+        def __init__(self, gender, university, subject, nationality):
+            cp_model.CpSolverSolutionCallback.__init__(self)
+            self.gender_ = gender
+            self.university_ = university
+            self.subject_ = subject
+            self.nationality_ = nationality
+
+            self.solutions_ = 0
+
+        def OnSolutionCallback(self):
+            self.solutions_ = self.solutions_ + 1
+            print("solution", self.solutions_)
+
+            for name in names:
+                print(" - " + name + ":")
+                for gender in genders:
+                    if self.Value(self.gender_[name][gender]):
+                        print("    gender - ", gender)
+                for nationality in nationalities:
+                    if self.Value(self.nationality_[name][nationality]):
+                        print("    nationality - ", nationality)
+                for university in universities:
+                    if self.Value(self.university_[name][university]):
+                        print("    university - ", university)
+                for subject in subjects:
+                    if self.Value(self.subject_[name][subject]):
+                        print("    subject - ", subject)
+
+    if spec is not None:
+        # Model, clues included, compiled from the specification
+        model, assignment = compile_puzzle_spec(spec, formulation)
+        student_gender = assignment["gender"]
+        student_nationality = assignment["nationality"]
+        student_university = assignment["university"]
+        student_subject = assignment["subject"]
+    else:
+        model = cp_model.CpModel()
+        # Decision variables creation
+        attributes = {"nationality": nationalities, "university": universities, "subject": subjects}
+        if formulation == 'integer':
+            assignment, _ = all_different_assignment(model, names, attributes)
+        else:
+            assignment = one_hot_assignment(model, names, attributes)
+        student_nationality = assignment["nationality"]
+        student_university = assignment["university"]
+        student_subject = assignment["subject"]
+
+        student_gender = {}
+        for name in names:
+            variables = {}
+            for gender in genders:
+                variables[gender] = model.NewBoolVar(name + gender)
+            student_gender[name] = variables
+
+        add_logical_puzzle_clues(model, names, student_gender, student_nationality, student_university,
+                                 student_subject)
+
+    variables = [student[name][value] for student in (student_gender, student_nationality, student_university,
+                                                      student_subject)
+                 for name in names for value in student[name]]
+    solver, status, callback = _search_all_solutions(
+        model, SolutionPrinter(student_gender, student_university, student_subject, student_nationality), sink,
+        variables, path, limit)
     print()
     for name in names:
         for subject in subjects:
@@ -218,9 +349,48 @@ def logical_puzzle():
                     print("\n")
                     print("*************************ARCHITECTURE STUDENT**************************************")
                     print("The STUDENT named " + name + " with NATIONALITY " + nationality + " Studies ARCHITECTURE")
+    return callback
+
+
+def build_sudoku_model(sudoku_grid, sub_grid_size, model, candidates=None):
+    '''AllDifferent model of the grid (0 for an empty cell) in model. candidates[i, j, v - 1], when given, says
+    whether value v is still possible in cell (i, j) and narrows the domains of the empty cells.'''
+    sudoku_size = len(sudoku_grid)
+
+    '''Dictionary to hold the given values at their respective positions and a new intvar is created for all other 
+    positions of sudoku grid'''
+    sudoku = {}
+    for i in range(sudoku_size):
+        for j in range(sudoku_size):
+            if sudoku_grid[i, j] != 0:
+                sudoku[(i, j)] = int(sudoku_grid[i, j])
+            elif candidates is None:
+                sudoku[(i, j)] = model.NewIntVar(1, sudoku_size, 'sudoku[{},{}]'.format(i, j))
+            else:
+                values = (np.flatnonzero(candidates[i, j]) + 1).tolist()
+                sudoku[(i, j)] = model.NewIntVarFromDomain(cp_model.Domain.FromValues(values),
+                                                           'sudoku[{},{}]'.format(i, j))
+
+    # Constraint to have all different numbers across the rows (all columns)
+    for i in range(sudoku_size):
+        model.AddAllDifferent([sudoku[i, j] for j in range(sudoku_size)])
+
+    # Constraint to have all different numbers across the columns (all rows)
+    for j in range(sudoku_size):
+        model.AddAllDifferent([sudoku[i, j] for i in range(sudoku_size)])
 
+    # Constraint to have all different numbers within all the sub grids of sudoku grid
+    for grid_row in range(0, sudoku_size, sub_grid_size):
+        for grid_col in range(0, sudoku_size, sub_grid_size):
+            model.AddAllDifferent(
+                [sudoku[grid_row + i, j] for j in range(grid_col, (grid_col + sub_grid_size)) for i in
+                 range(sub_grid_size)])
+    return sudoku
 
-def solve_sudoku():
+
+def solve_sudoku(sink=None, path=None, limit=None):
+    '''Prints every solution, or hands them to a solution sink (count, array or stream, see solution_sinks) when sink
+    is given. Returns the printer or sink.'''
     class SolutionPrinter(cp_model.CpSolverSolutionCallback):
         def __init__(self, sudoku_size, sudoku):
             cp_model.CpSolverSolutionCallback.__init__(self)
@@ -229,12 +399,12 @@ def solve_sudoku():
             self.sudoku_size_ = sudoku_size
 
         def OnSolutionCallback(self):
-            sudoku_result = np.zeros((self.sudoku_size_, self.sudoku_size_)).astype(np.int)
+            sudoku_result = np.zeros((self.sudoku_size_, self.sudoku_size_), dtype=int)
             self.solutions_ = self.solutions_ + 1
             print("\nsolution", self.solutions_)
 
-            for i in range(9):
-                for j in range(9):
+            for i in range(self.sudoku_size_):
+                for j in range(self.sudoku_size_):
                     sudoku_result[i, j] = int(self.Value(self.sudoku_[i, j]))
 
             print(sudoku_result)
@@ -277,49 +447,324 @@ def solve_sudoku():
     print("\nAfter assigning the given values to the grid: \n")
     print(sudoku_grid)
 
-    '''Dictionary to hold the given values at their respective positions and a new intvar is created for all other 
-    positions of sudoku grid'''
-    sudoku = {}
-    for i in range(sudoku_size):
-        for j in range(sudoku_size):
-            if sudoku_grid[i, j] != 0:
-                sudoku[(i, j)] = sudoku_grid[i, j]
-            else:
-                sudoku[(i, j)] = model.NewIntVar(1, sudoku_size, 'sudoku[{},{}]'.format(i, j))
-
-    # Constraint to have all different numbers across the rows (all columns)
-    for i in range(sudoku_size):
-        model.AddAllDifferent([sudoku[i, j] for j in range(sudoku_size)])
-
-    # Constraint to have all different numbers across the columns (all rows)
-    for j in range(sudoku_size):
-        model.AddAllDifferent([sudoku[i, j] for i in range(sudoku_size)])
-
-    # Constraint to have all different numbers within all the sub grids of sudoku grid
-    for grid_row in range(0, sudoku_size, sub_grid_size):
-        for grid_col in range(0, sudoku_size, sub_grid_size):
-            model.AddAllDifferent(
-                [sudoku[grid_row + i, j] for j in range(grid_col, (grid_col + sub_grid_size)) for i in
-                 range(sub_grid_size)])
+    sudoku = build_sudoku_model(sudoku_grid, sub_grid_size, model)
+
+    variables = [cell for cell in sudoku.values() if not isinstance(cell, int)]
+    solver, status, callback = _search_all_solutions(model, SolutionPrinter(sudoku_size, sudoku), sink, variables,
+                                                     path, limit)
+    return callback
+
+
+# Cell symbols of the one character per cell puzzle format, '0' and '.' are empty cells
+SUDOKU_SYMBOLS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def parse_sudoku(line):
+    '''Grid of a puzzle line and the separator it used. A line is either one character per cell (81 characters for
+    9x9, digits then letters for larger grids: A = 10) or the cell values separated by commas or spaces. The grid size
+    is the square root of the number of cells and must itself be a square.'''
+    line = line.strip()
+    if ',' in line or ' ' in line:
+        separator = ',' if ',' in line else ' '
+        cells = [0 if cell in ('', '.') else int(cell) for cell in line.replace(',', ' ').split()]
+    else:
+        separator = None
+        cells = [0 if cell in '0.' else SUDOKU_SYMBOLS.index(cell.upper()) + 1 for cell in line]
+    sudoku_size = int(round(len(cells) ** 0.5))
+    sub_grid_size = int(round(sudoku_size ** 0.5))
+    if sudoku_size * sudoku_size != len(cells) or sub_grid_size * sub_grid_size != sudoku_size:
+        raise ValueError("A puzzle line needs n^4 cells, got {}".format(len(cells)))
+    return np.array(cells, dtype=int).reshape(sudoku_size, sudoku_size), separator
+
+
+def format_sudoku(sudoku_grid, separator=None):
+    if separator is None:
+        return ''.join('.' if value == 0 else SUDOKU_SYMBOLS[value - 1] for value in sudoku_grid.ravel().tolist())
+    return separator.join(str(value) for value in sudoku_grid.ravel().tolist())
+
+
+def _boxes(cells, sub_grid_size):
+    # Regroups the first two axes (row, column) into (box, cell of the box)
+    n = sub_grid_size
+    return cells.reshape((n, n, n, n) + cells.shape[2:]).swapaxes(1, 2).reshape((n * n, n * n) + cells.shape[2:])
+
+
+def sudoku_singles(sudoku_grid, sub_grid_size):
+    '''Fills naked singles (an empty cell with one possible value) and hidden singles (a value with one possible cell
+    in a row, column or box) until neither is left.
+
+    Returns the grid and the candidates[i, j, v - 1] of the cells still empty, or None when a cell or a value runs out
+    of places, that is when the puzzle has no solution.'''
+    sudoku_size = len(sudoku_grid)
+    sudoku_grid = sudoku_grid.copy()
+    values = np.arange(1, sudoku_size + 1)
+    box_of = (np.arange(sudoku_size)[:, None] // sub_grid_size) * sub_grid_size + \
+        np.arange(sudoku_size)[None, :] // sub_grid_size
+    while True:
+        filled = sudoku_grid[:, :, None] == values
+        in_row, in_column = filled.sum(axis=1), filled.sum(axis=0)
+        in_box = _boxes(filled, sub_grid_size).sum(axis=1)
+        if in_row.max() > 1 or in_column.max() > 1 or in_box.max() > 1:
+            return None
+        candidates = (sudoku_grid == 0)[:, :, None] & (in_row == 0)[:, None, :] & (in_column == 0)[None, :, :] & \
+            (in_box == 0)[box_of]
+        empty = sudoku_grid == 0
+        options = candidates.sum(axis=2)
+        if (options[empty] == 0).any():
+            return None
+        if not empty.any():
+            return sudoku_grid, candidates
+        placements = [(i, j, v) for i, j, v in zip(*np.nonzero(empty & (options == 1)),
+                                                   candidates[empty & (options == 1)].argmax(axis=1) + 1)]
+
+        # Places left for each value still missing from a row, column or box
+        row_places, column_places = candidates.sum(axis=1), candidates.sum(axis=0)
+        box_candidates = _boxes(candidates, sub_grid_size)
+        box_places = box_candidates.sum(axis=1)
+        if ((row_places == 0) & (in_row == 0)).any() or ((column_places == 0) & (in_column == 0)).any() or \
+                ((box_places == 0) & (in_box == 0)).any():
+            return None
+        for i, v in zip(*np.nonzero(row_places == 1)):
+            placements.append((i, candidates[i, :, v].argmax(), v + 1))
+        for j, v in zip(*np.nonzero(column_places == 1)):
+            placements.append((candidates[:, j, v].argmax(), j, v + 1))
+        for box, v in zip(*np.nonzero(box_places == 1)):
+            cell = box_candidates[box, :, v].argmax()
+            placements.append(((box // sub_grid_size) * sub_grid_size + cell // sub_grid_size,
+                               (box % sub_grid_size) * sub_grid_size + cell % sub_grid_size, v + 1))
+        if not placements:
+            return sudoku_grid, candidates
+        # Two singles that disagree on a cell or a unit show up as a duplicate or a lost value in the next round
+        for i, j, v in placements:
+            sudoku_grid[i, j] = v
+
+
+def _sudoku_units(sudoku_size, sub_grid_size):
+    # Row, column and box of every cell (cells numbered row by row) and the cells of every row, column and box
+    cell_units = [(i, j, (i // sub_grid_size) * sub_grid_size + j // sub_grid_size)
+                  for i in range(sudoku_size) for j in range(sudoku_size)]
+    units = [[] for _ in range(3 * sudoku_size)]
+    for cell, (i, j, box) in enumerate(cell_units):
+        units[i].append(cell)
+        units[sudoku_size + j].append(cell)
+        units[2 * sudoku_size + box].append(cell)
+    return cell_units, units
+
+
+def _sudoku_propagate(state, cell_units, units, full):
+    '''Places naked and hidden singles in state = [cells, rows, columns, boxes] until there are none left.
+
+    rows, columns and boxes hold the bitmask of the values used in each unit (bit v - 1 for value v). Returns the
+    empty cell with the fewest candidates and its candidate mask, (-1, 0) when the grid is full or None on a
+    contradiction.'''
+    cells, rows, columns, boxes = state
+    n = len(rows)
+
+    def place(cell, bit):
+        i, j, box = cell_units[cell]
+        cells[cell] = bit.bit_length()
+        rows[i] |= bit
+        columns[j] |= bit
+        boxes[box] |= bit
+
+    progress = True
+    while progress:
+        progress = False
+        best, best_mask, best_count = -1, 0, n + 1
+        for cell, value in enumerate(cells):
+            if value:
+                continue
+            i, j, box = cell_units[cell]
+            mask = full & ~(rows[i] | columns[j] | boxes[box])
+            if not mask:
+                return None
+            if not mask & (mask - 1):
+                place(cell, mask)
+                progress = True
+                continue
+            count = bin(mask).count('1')
+            if count < best_count:
+                best, best_mask, best_count = cell, mask, count
+        if progress:
+            continue
+
+        # Hidden singles: values that fit in exactly one cell of a unit
+        for unit, unit_cells in enumerate(units):
+            used = (rows, columns, boxes)[unit // n][unit % n]
+            missing = full & ~used
+            if not missing:
+                continue
+            once = twice = 0
+            for cell in unit_cells:
+                if not cells[cell]:
+                    i, j, box = cell_units[cell]
+                    mask = full & ~(rows[i] | columns[j] | boxes[box])
+                    twice |= once & mask
+                    once |= mask
+            if once & missing != missing:
+                return None
+            single = once & ~twice & missing
+            while single:
+                bit = single & -single
+                single ^= bit
+                for cell in unit_cells:
+                    i, j, box = cell_units[cell]
+                    if not cells[cell] and not (rows[i] | columns[j] | boxes[box]) & bit:
+                        place(cell, bit)
+                        break
+                else:
+                    return None
+                progress = True
+    return best, best_mask
+
+
+def solve_sudoku_bitmask(sudoku_grid, time_limit=None):
+    '''One solution of the puzzle by constraint propagation on candidate bitmasks and depth first search.
+
+    Every row, column and box keeps the values it uses as one integer bitmask, so the candidates of a cell are three
+    ORs away. Naked and hidden singles are placed after every decision, and the search branches on the empty cell
+    with the fewest candidates. Returns the solved grid (None if there is none) and solved, infeasible or unknown
+    when time_limit seconds have passed.'''
+    sudoku_size = len(sudoku_grid)
+    sub_grid_size = int(round(sudoku_size ** 0.5))
+    full = (1 << sudoku_size) - 1
+    cell_units, units = _sudoku_units(sudoku_size, sub_grid_size)
+    cells = [int(value) for value in sudoku_grid.ravel().tolist()]
+    rows, columns, boxes = [0] * sudoku_size, [0] * sudoku_size, [0] * sudoku_size
+    for cell, value in enumerate(cells):
+        if value:
+            bit = 1 << (value - 1)
+            i, j, box = cell_units[cell]
+            if (rows[i] | columns[j] | boxes[box]) & bit:
+                return None, 'infeasible'
+            rows[i] |= bit
+            columns[j] |= bit
+            boxes[box] |= bit
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    stack = [[cells, rows, columns, boxes]]
+    while stack:
+        if deadline is not None and time.perf_counter() > deadline:
+            return None, 'unknown'
+        state = stack.pop()
+        branch = _sudoku_propagate(state, cell_units, units, full)
+        if branch is None:
+            continue
+        cell, mask = branch
+        if cell < 0:
+            return np.array(state[0], dtype=int).reshape(sudoku_size, sudoku_size), 'solved'
+        i, j, box = cell_units[cell]
+        # Children are pushed highest value first so that the lowest one is tried first
+        while mask:
+            bit = 1 << (mask.bit_length() - 1)
+            mask ^= bit
+            child = [list(part) for part in state]
+            child[0][cell] = bit.bit_length()
+            child[1][i] |= bit
+            child[2][j] |= bit
+            child[3][box] |= bit
+            stack.append(child)
+    return None, 'infeasible'
+
+
+def solve_sudoku_grid(sudoku_grid, time_limit=None, engine_time_limit=1.0):
+    '''One solution of the puzzle. The bitmask engine gets engine_time_limit seconds first (None skips it); when it
+    runs out, singles fill what they can and CP-SAT searches the narrowed domains for whatever they leave empty.
+
+    Returns the solved grid (None if there is none) and how it was settled: bitmask, singles, cp-sat, infeasible or
+    unknown when the time limit ran out.'''
+    if engine_time_limit is not None:
+        solution, status = solve_sudoku_bitmask(sudoku_grid, engine_time_limit)
+        if status != 'unknown':
+            return solution, 'bitmask' if status == 'solved' else status
+
+    sub_grid_size = int(round(len(sudoku_grid) ** 0.5))
+    reduced = sudoku_singles(sudoku_grid, sub_grid_size)
+    if reduced is None:
+        return None, 'infeasible'
+    sudoku_grid, candidates = reduced
+    if (sudoku_grid != 0).all():
+        return sudoku_grid, 'singles'
 
+    model = cp_model.CpModel()
+    sudoku = build_sudoku_model(sudoku_grid, sub_grid_size, model, candidates)
     solver = cp_model.CpSolver()
-
-    solver.SearchForAllSolutions(model, SolutionPrinter(sudoku_size, sudoku))
-
-
-def project_planning():
-    project_jobs_df = pd.read_excel("../Assignment_DA_1_data.xlsx", sheet_name="Projects")
-    contractor_job_quotes = pd.read_excel("../Assignment_DA_1_data.xlsx", sheet_name="Quotes")
-    project_dependencies = pd.read_excel("../Assignment_DA_1_data.xlsx", sheet_name="Dependencies")
-    project_value = pd.read_excel("../Assignment_DA_1_data.xlsx", sheet_name="Value")
-
-    project_jobs_df.rename(columns={"Unnamed: 0": "Projects"}, inplace=True)
-    contractor_job_quotes.rename(columns={"Unnamed: 0": "Contractors"}, inplace=True)
-    project_value.rename(columns={"Unnamed: 0": "Projects"}, inplace=True)
-
-    project_jobs_df.set_index("Projects", inplace=True)
-    contractor_job_quotes.set_index("Contractors", inplace=True)
-    project_value.set_index("Projects", inplace=True)
+    # The batch runs puzzles in parallel, so every solve keeps to one thread
+    solver.parameters.num_workers = 1
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    if status == cp_model.INFEASIBLE:
+        return None, 'infeasible'
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, 'unknown'
+    solution = sudoku_grid.copy()
+    for (i, j), cell in sudoku.items():
+        if not isinstance(cell, int):
+            solution[i, j] = solver.Value(cell)
+    return solution, 'cp-sat'
+
+
+def _solve_sudoku_line(job):
+    line, time_limit, engine_time_limit = job
+    sudoku_grid, separator = parse_sudoku(line)
+    solution, method = solve_sudoku_grid(sudoku_grid, time_limit, engine_time_limit)
+    return (method if solution is None else format_sudoku(solution, separator)), method
+
+
+def solve_sudoku_batch(path, output_path, workers=None, time_limit=10.0, engine_time_limit=1.0, block=10000):
+    '''Solves every puzzle of the file at path (one per line, see parse_sudoku; empty lines and lines starting with #
+    are skipped) and writes one line per puzzle to output_path, in the same order: the solution in the format of the
+    puzzle, or infeasible/unknown.
+
+    The puzzles are read and handed to the worker processes block puzzles at a time and each block is written as soon
+    as it is solved, so memory does not grow with the file. workers=1 solves in the current process. The time limits
+    are per puzzle, see solve_sudoku_grid. Returns the count of each outcome, the time taken and the puzzles per
+    second.'''
+    workers = workers or os.cpu_count()
+    stats = {'puzzles': 0, 'bitmask': 0, 'singles': 0, 'cp-sat': 0, 'infeasible': 0, 'unknown': 0}
+    start = time.perf_counter()
+    with open(path) as puzzles, open(output_path, 'w') as output:
+        lines = (line for line in puzzles if line.strip() and not line.startswith('#'))
+        jobs = ((line, time_limit, engine_time_limit) for line in lines)
+        pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+        try:
+            while True:
+                chunk = list(itertools.islice(jobs, block))
+                if not chunk:
+                    break
+                if pool is None:
+                    results = map(_solve_sudoku_line, chunk)
+                else:
+                    results = pool.map(_solve_sudoku_line, chunk, chunksize=max(1, len(chunk) // (4 * workers)))
+                for line, method in results:
+                    output.write(line + '\n')
+                    stats['puzzles'] += 1
+                    stats[method] += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    stats['seconds'] = time.perf_counter() - start
+    stats['puzzles_per_second'] = stats['puzzles'] / stats['seconds'] if stats['seconds'] else float('inf')
+    print("{} puzzles in {:.2f} s ({:.0f} puzzles/s): {} by the bitmask engine, {} by singles, {} by CP-SAT, "
+          "{} infeasible, {} unknown".format(stats['puzzles'], stats['seconds'], stats['puzzles_per_second'],
+                                             stats['bitmask'], stats['singles'], stats['cp-sat'], stats['infeasible'],
+                                             stats['unknown']))
+    return stats
+
+
+def load_project_planning_data(path="../Assignment_DA_1_data.xlsx"):
+    # The workbook is parsed once (or served from the cache) instead of once per sheet
+    return read_workbook(path, sheet_name=["Projects", "Quotes", "Dependencies", "Value"])
+
+
+def project_planning_data(task_df):
+    '''Dictionaries of the project planning sheets, with the inverted indexes the model is built from:
+    job_project_months[job] = [(project, month)] and job_contractors[job] = [contractor]'''
+    project_jobs_df = task_df["Projects"].rename(columns={"Unnamed: 0": "Projects"}).set_index("Projects")
+    contractor_job_quotes = task_df["Quotes"].rename(columns={"Unnamed: 0": "Contractors"}).set_index("Contractors")
+    project_dependencies = task_df["Dependencies"]
+    project_value = task_df["Value"].rename(columns={"Unnamed: 0": "Projects"}).set_index("Projects")
 
     # Below dictionary stores the month and job for each project
     # each project is a key, and for each project key, there is a dictionary where month is a key and job is a value
@@ -336,8 +781,6 @@ def project_planning():
     # List of months
     months = list(project_jobs_df.columns)
 
-    project_month_contractor_value_dict = {}  # For each valid contractor project and month combination, store the cost
-
     # Below dictionary stores the project dependencies if any
     project_dependencies_dict = {}
     for row in range(len(projects)):
@@ -346,31 +789,341 @@ def project_planning():
         for project in projects:
             if not (record[project] != record[project]):
                 project_dependent_on.append(project)
-        project_dependencies_dict[record[0]] = project_dependent_on
+        project_dependencies_dict[record.iloc[0]] = project_dependent_on
 
-    project_values_dict = {ind: project_value.loc[ind][0] for ind in project_value.index}
+    project_values_dict = {ind: project_value.loc[ind].iloc[0] for ind in project_value.index}
 
-    # Below dictionary stores the list of jobs each contractor can do
-    contractor_jobs_dict = {}
+    # Where every job is needed and who can do it, each built in one pass
+    job_project_months = {}
+    for project, job_month in project_jobs_dict.items():
+        for month, job in job_month.items():
+            job_project_months.setdefault(job, []).append((project, month))
+    job_contractors = {}
     for contractor, job_quote in contractor_job_quotes_dict.items():
-        jobs = []
-        for job, quote in job_quote.items():
-            jobs.append(job)
-        contractor_jobs_dict[contractor] = jobs
+        for job in job_quote:
+            job_contractors.setdefault(job, []).append(contractor)
 
     # below variable is to hold the values for each project and each job/month which contractors can work
     # Basically holds all the valid combinations for each project and month/job who all can work
     # This will help in deciding who can be allowed further to work on each job of each project
-    project_month_contractor = {}
-    for proj in project_jobs_dict:
-        month_contractor = {}
-        for month in project_jobs_dict[proj].keys():
-            contractor_list = []
-            for contractor in contractors:
-                if project_jobs_dict[proj][month] in contractor_jobs_dict[contractor]:
-                    contractor_list.append(contractor)
-            month_contractor[month] = contractor_list
-        project_month_contractor[proj] = month_contractor
+    project_month_contractor = {project: {month: job_contractors.get(job, []) for month, job in job_month.items()}
+                                for project, job_month in project_jobs_dict.items()}
+
+    return {'projects': projects, 'contractors': contractors, 'months': months,
+            'project_jobs': project_jobs_dict, 'quotes': contractor_job_quotes_dict,
+            'dependencies': project_dependencies_dict, 'values': project_values_dict,
+            'job_project_months': job_project_months, 'job_contractors': job_contractors,
+            'project_month_contractor': project_month_contractor}
+
+
+def project_planning_candidates(data):
+    '''(contractor, project, month, quote) for every contractor quoting for the job of a project in a month, by
+    contractor and then in project and month order: the order of the contractor variables of
+    build_project_planning_model.'''
+    project_position = {project: k for k, project in enumerate(data['projects'])}
+    month_position = {month: k for k, month in enumerate(data['months'])}
+    candidates = []
+    for contractor in data['contractors']:
+        own = [(contractor, project, month, quote) for job, quote in data['quotes'][contractor].items()
+               for project, month in data['job_project_months'].get(job, [])]
+        own.sort(key=lambda candidate: (project_position[candidate[1]], month_position[candidate[2]]))
+        candidates += own
+    return candidates
+
+
+def build_project_planning_model(data, model, min_profit=2500):
+    '''Project planning variables and constraints in model, each constraint over the candidates that exist.
+
+    Projects listed in data['same_as'] (see presolve_project_planning) share the variable of the project they map to.
+    Returns the project BoolVars by project, the contractor BoolVars by (contractor, project, month), their quotes
+    under the same keys and the profit margin expression.'''
+    projects = data['projects']
+    project_month_contractor = data['project_month_contractor']
+    same_as = data.get('same_as', {})
+
+    # Decision variables for what projects to take on
+    project_taken_dict_bool_vars = {}
+    for project in projects:
+        if project in same_as:
+            project_taken_dict_bool_vars[project] = project_taken_dict_bool_vars[same_as[project]]
+        else:
+            project_taken_dict_bool_vars[project] = model.NewBoolVar(project)
+
+    # Decision variables for Which contractor works on which project and when, straight from the job index
+    contractor_selection_bool_vars = {}  # Bool variables to decide which valid contractor project month combination to select
+    project_month_contractor_value_dict = {}  # For each valid contractor project and month combination, store the cost
+    contractor_month_vars = {}  # (contractor, month) -> the variables of that contractor in that month
+    for contractor, project, month, quote in project_planning_candidates(data):
+        variable = model.NewBoolVar(contractor + project + month)
+        contractor_selection_bool_vars[(contractor, project, month)] = variable
+        project_month_contractor_value_dict[(contractor, project, month)] = quote
+        contractor_month_vars.setdefault((contractor, month), []).append(variable)
+
+    # Contractor can not work on two projects simultaneously
+    for variables in contractor_month_vars.values():
+        if len(variables) > 1:
+            model.Add(linear_sum(variables) <= 1)
+
+    # If Project is accepted to be delivered, then exactly one contractor per job of the project needs to work on it
+    for project in project_month_contractor:
+        for month in project_month_contractor[project]:
+            model.Add(linear_sum(contractor_selection_bool_vars[(contractor, project, month)]
+                                 for contractor in project_month_contractor[project][month]) == 1). \
+                OnlyEnforceIf(project_taken_dict_bool_vars[project])
+
+    # If Project is not taken, then no one should be contracted to work on it
+    for project in project_month_contractor:
+        for month in project_month_contractor[project]:
+            for contractor in project_month_contractor[project][month]:
+                model.AddBoolAnd([contractor_selection_bool_vars[(contractor, project, month)].Not()]). \
+                    OnlyEnforceIf(project_taken_dict_bool_vars[project].Not())
+
+    # Project Dependency constraint:
+    for project, dependencies in data['dependencies'].items():
+        if len(dependencies) != 0:
+            model.AddBoolAnd([project_taken_dict_bool_vars[project_name] for project_name in dependencies]). \
+                OnlyEnforceIf(project_taken_dict_bool_vars[project])
+
+    # Profit margin >= min_profit: the project values minus the quotes of the selected contractors, the quotes read
+    # straight from their dictionary, which is keyed in the same order as the contractor variables
+    profit = (weighted_sum((project_taken_dict_bool_vars[project] for project in projects),
+                           (data['values'][project] for project in projects)) -
+              weighted_sum(contractor_selection_bool_vars.values(), project_month_contractor_value_dict.values()))
+    if min_profit is not None:
+        model.Add(profit >= min_profit)
+    return project_taken_dict_bool_vars, contractor_selection_bool_vars, project_month_contractor_value_dict, profit
+
+
+def project_planning_columns(data, model, project_taken, selection):
+    '''Solution columns of a project planning model built from data or from its presolve_project_planning data, as
+    (variables, names): every project of data, then every contractor candidate. Candidates the presolve removed are
+    the constant 0 and projects merged into a dependency cycle repeat its variable, so the columns are the same with
+    and without presolve.'''
+    zero = model.NewConstant(0)
+    keys = [(contractor, project, month) for contractor, project, month, _ in project_planning_candidates(data)]
+    variables = [project_taken.get(project, zero) for project in data['projects']] + \
+        [selection.get(key, zero) for key in keys]
+    return variables, list(data['projects']) + [contractor + project + month for contractor, project, month in keys]
+
+
+def project_planning_size(data):
+    '''Variables and constraints build_project_planning_model makes from data, counted without building it'''
+    same_as = data.get('same_as', {})
+    candidates = {}
+    for contractor, job_quote in data['quotes'].items():
+        for job in job_quote:
+            for project, month in data['job_project_months'].get(job, []):
+                candidates[(contractor, month)] = candidates.get((contractor, month), 0) + 1
+    variables = len([project for project in data['projects'] if project not in same_as]) + sum(candidates.values())
+    staffing = sum(len(month_contractors) for month_contractors in data['project_month_contractor'].values())
+    constraints = (len([count for count in candidates.values() if count > 1]) + staffing + sum(candidates.values()) +
+                   len([project for project, dependencies in data['dependencies'].items() if dependencies]) + 1)
+    return variables, constraints
+
+
+def _dependency_closure(projects, edges):
+    # Every project reachable from each project along edges (project -> [projects]), the project itself excluded
+    closure = {}
+    for project in projects:
+        seen = set()
+        stack = list(edges.get(project, []))
+        while stack:
+            other = stack.pop()
+            if other not in seen:
+                seen.add(other)
+                stack.extend(edges.get(other, []))
+        seen.discard(project)
+        closure[project] = seen
+    return closure
+
+
+def presolve_project_planning(data, min_profit=2500):
+    '''Smaller project planning data with the same plans, from the dependency graph and the contractor coverage.
+
+    - A project with a job nobody quotes for can not be staffed; it goes, with every project that depends on it.
+    - Each project's margin is bounded by its value minus the cheapest quote of each of its jobs. The plan value is
+      then at most the sum of the positive bounds, and a project whose taking (with all its prerequisites) pushes
+      that sum under min_profit goes too, again with its dependents, until nothing changes.
+    - Projects that depend on each other take the same decision and share one variable ('same_as'), and dependency
+      edges implied by others (transitive reduction) are dropped.
+
+    Returns the reduced data, which build_project_planning_model takes as is, and a report with what was removed,
+    the value upper bound, the topological order of the projects and the model size before and after.'''
+    projects = data['projects']
+    dependencies = data['dependencies']
+    project_month_contractor = data['project_month_contractor']
+    prerequisites = _dependency_closure(projects, dependencies)
+    dependents = {project: set() for project in projects}
+    for project, required in prerequisites.items():
+        for other in required:
+            dependents[other].add(project)
+
+    removed = {}
+    for project in projects:
+        if project not in removed and not all(project_month_contractor[project].values()):
+            removed[project] = 'unstaffable'
+            for dependent in dependents[project]:
+                removed.setdefault(dependent, 'depends on an unstaffable project')
+
+    margin = {}
+    for project in projects:
+        if project not in removed:
+            margin[project] = int(data['values'][project]) - int(sum(
+                min(data['quotes'][contractor][data['project_jobs'][project][month]] for contractor in contractors)
+                for month, contractors in project_month_contractor[project].items()))
+    upper_bound = sum(max(0, bound) for bound in margin.values())
+    changed = min_profit is not None
+    while changed:
+        changed = False
+        for project in [project for project in projects if project not in removed]:
+            chain = {project} | prerequisites[project]
+            # Best case with project taken: every other positive margin plus the exact margins of its chain
+            best = upper_bound - sum(max(0, margin[other]) for other in chain if other not in removed) + \
+                sum(margin[other] for other in chain if other not in removed)
+            if any(other in removed for other in chain) or best < min_profit:
+                for other in {project} | dependents[project]:
+                    if other not in removed:
+                        removed[other] = 'can not reach the minimum profit'
+                        upper_bound -= max(0, margin[other])
+                changed = True
+
+    kept = [project for project in projects if project not in removed]
+    # Dependency cycles take one decision: the first project of each cycle stands for the others
+    same_as = {}
+    for project in kept:
+        if project not in same_as:
+            for other in kept:
+                if other != project and other not in same_as and other in prerequisites[project] and \
+                        project in prerequisites[other]:
+                    same_as[other] = project
+    representative = {project: same_as.get(project, project) for project in kept}
+    edges = {}
+    for project in kept:
+        for other in dependencies[project]:
+            if representative[other] != representative[project]:
+                edges.setdefault(representative[project], set()).add(representative[other])
+    reachable = _dependency_closure(kept, edges)
+    reduced_dependencies = {project: [] for project in kept}
+    for project, required in edges.items():
+        reduced_dependencies[project] = [other for other in kept if other in required and
+                                         not any(other in reachable[step] for step in required if step != other)]
+
+    # Topological order, prerequisites first (Kahn)
+    waiting = {project: len(reduced_dependencies[project]) for project in kept if project not in same_as}
+    users = {}
+    for project, required in reduced_dependencies.items():
+        for other in required:
+            users.setdefault(other, []).append(project)
+    order = [project for project in waiting if waiting[project] == 0]
+    for project in order:
+        for user in users.get(project, []):
+            waiting[user] -= 1
+            if waiting[user] == 0:
+                order.append(user)
+
+    kept_set = set(kept)
+    reduced = dict(data)
+    reduced['projects'] = kept
+    reduced['project_jobs'] = {project: data['project_jobs'][project] for project in kept}
+    reduced['values'] = {project: data['values'][project] for project in kept}
+    reduced['dependencies'] = reduced_dependencies
+    reduced['project_month_contractor'] = {project: project_month_contractor[project] for project in kept}
+    reduced['job_project_months'] = {job: [(project, month) for project, month in places if project in kept_set]
+                                     for job, places in data['job_project_months'].items()}
+    reduced['same_as'] = same_as
+
+    before, after = project_planning_size(data), project_planning_size(reduced)
+    report = {'removed': removed, 'merged': same_as, 'upper_bound': upper_bound, 'order': order,
+              'dependency_edges': (sum(len(required) for required in dependencies.values()),
+                                   sum(len(required) for required in reduced_dependencies.values())),
+              'variables': (before[0], after[0]), 'constraints': (before[1], after[1])}
+    return reduced, report
+
+
+def print_presolve_report(report):
+    print("\nPresolve: {} projects removed, {} merged into a dependency cycle".format(len(report['removed']),
+                                                                                   len(report['merged'])))
+    for project, reason in report['removed'].items():
+        print("\t", project, ":", reason)
+    print("dependency edges {} -> {}, variables {} -> {} ({} removed), constraints {} -> {} ({} removed)".format(
+        report['dependency_edges'][0], report['dependency_edges'][1], report['variables'][0], report['variables'][1],
+        report['variables'][0] - report['variables'][1], report['constraints'][0], report['constraints'][1],
+        report['constraints'][0] - report['constraints'][1]))
+    print("profit margin upper bound:", report['upper_bound'])
+    print("topological order:", report['order'])
+
+
+class ObjectiveProgress(cp_model.CpSolverSolutionCallback):
+    '''Prints the objective, best bound and relative gap of every improving solution of a CP-SAT search'''
+
+    def __init__(self, label=""):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.label_ = label
+        self.solutions_ = 0
+
+    def OnSolutionCallback(self):
+        self.solutions_ += 1
+        objective, bound = self.ObjectiveValue(), self.BestObjectiveBound()
+        print("{}objective {:.0f}, bound {:.0f}, gap {:.2%} after {:.2f} s".format(
+            self.label_, objective, bound, abs(bound - objective) / max(1.0, abs(objective)), self.WallTime()))
+
+
+def optimize_project_planning(data, workers=8, time_limit=60.0, top_k=1, min_profit=None, log=True):
+    '''Maximizes the profit margin with workers parallel CP-SAT workers, each solve stopped after time_limit seconds.
+
+    With top_k > 1 the best plan is cut off with a no-good (at least one project or contractor decision must differ)
+    and the model solved again, until top_k distinct plans are found or none is left. Returns one dict per plan with
+    status, objective, bound, gap, wall_time, the projects taken and the contractor of every (project, month), most
+    profitable first.
+
+    The plans are only the top_k best when every solve is OPTIMAL. A solve stopped at FEASIBLE by time_limit can miss
+    a plan that a later solve then finds, so the list may skip better plans than the ones it holds.'''
+    model = cp_model.CpModel()
+    project_taken, selection, _, profit = build_project_planning_model(data, model, min_profit)
+    model.Maximize(profit)
+    decisions = list(project_taken.values()) + list(selection.values())
+
+    plans = []
+    while len(plans) < top_k:
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = workers
+        if time_limit is not None:
+            solver.parameters.max_time_in_seconds = time_limit
+        progress = ObjectiveProgress("plan {}: ".format(len(plans) + 1)) if log else None
+        status = solver.Solve(model, progress)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print("plan {}: {}".format(len(plans) + 1, solver.StatusName(status)))
+            break
+        objective, bound = solver.ObjectiveValue(), solver.BestObjectiveBound()
+        plans.append({'status': solver.StatusName(status), 'objective': objective, 'bound': bound,
+                      'gap': abs(bound - objective) / max(1.0, abs(objective)), 'wall_time': solver.WallTime(),
+                      'projects': [project for project, taken in project_taken.items() if solver.BooleanValue(taken)],
+                      'assignment': {(project, month): contractor
+                                     for (contractor, project, month), variable in selection.items()
+                                     if solver.BooleanValue(variable)}})
+        model.AddBoolOr([decision.Not() if solver.BooleanValue(decision) else decision for decision in decisions])
+        if status == cp_model.OPTIMAL:
+            # The next plans can be no better than this one
+            model.Add(profit <= int(objective))
+    # A plan found after a FEASIBLE solve can beat the plans before it
+    plans.sort(key=lambda plan: plan['objective'], reverse=True)
+    return plans
+
+
+def project_planning(sink=None, path=None, limit=None, optimize=False, workers=8, time_limit=60.0, top_k=1,
+                     presolve=True):
+    '''Prints every plan with a profit margin of at least 2500, or hands them to a solution sink (count, array or
+    stream, see solution_sinks) when sink is given. Returns the printer or sink.
+
+    optimize=True prints and returns the top_k most profitable plans of optimize_project_planning instead. With
+    presolve the model is built from the data of presolve_project_planning; the sink columns stay those of the
+    workbook (see project_planning_columns).'''
+    data = project_planning_data(load_project_planning_data())
+    project_jobs_dict = data['project_jobs']
+    contractor_job_quotes_dict = data['quotes']
+    project_dependencies_dict = data['dependencies']
+    project_values_dict = data['values']
+    project_month_contractor = data['project_month_contractor']
 
     print("\n\nConstructed dictionaries from the given data are: \n")
     print("Project jobs dict: ")
@@ -429,76 +1182,36 @@ def project_planning():
             profit_margin = projectValuation - totalCost
             print("\nprofit margin: ", profit_margin)
 
-    model = cp_model.CpModel()
-
-    # Decision variables for what projects to take on
-    project_taken_dict_bool_vars = {}
-    for project in project_jobs_dict.keys():
-        project_taken_dict_bool_vars[project] = model.NewBoolVar(project)
-
-    # Decision variables for Which contractor works on which project and when
-    contractor_selection_bool_vars = {}  # Bool variables to decide which valid contractor project month combination to select
-
-    for contractor in contractors:
-        jobs = contractor_jobs_dict[contractor]
-        temp_project_jobs_dict = copy.deepcopy(project_jobs_dict)  # For every contractor we need to iterate over all projects
-        for project, job_month in temp_project_jobs_dict.items():
-            for job in list(job_month.values()):
-                if job in jobs:
-                    m = list(job_month.keys())[list(job_month.values()).index(job)]
-                    contractor_project_when = (contractor, project, m, contractor_job_quotes_dict[contractor][job])
-                    contractor_selection_bool_vars[contractor_project_when[:-1]] = model. \
-                        NewBoolVar(contractor_project_when[0] + contractor_project_when[1] + contractor_project_when[2])
-                    project_month_contractor_value_dict[contractor_project_when[:-1]] = contractor_project_when[-1]
-                    job_month.pop(m)  # To avoid duplicate entries in the dictionary
-
-    # Contractor can not work on two projects simultaneously
-    for contractor in contractors:
-        for month in months:
-            ''' for each month, contractor project combination must be only one'''
-            model.Add(sum(
-                [contractor_selection_bool_vars.get((contractor, projects[i], month), False)
-                 for i in range(len(projects))]) <= 1
-                      )
-
-    # If Project is accepted to be delivered, then exactly one contractor per job of the project needs to work on it
-    for project in project_month_contractor:
-        for month in project_month_contractor[project]:
-            model.Add(sum([contractor_selection_bool_vars[(contractor, project, month)]
-                           for contractor in project_month_contractor[project][month]]) == 1). \
-                OnlyEnforceIf(project_taken_dict_bool_vars[project])
-
-    # If Project is not taken, then no one should be contracted to work on it
-    for project in project_month_contractor:
-        for month in project_month_contractor[project]:
-            for contractor in project_month_contractor[project][month]:
-                model.AddBoolAnd([contractor_selection_bool_vars[(contractor, project, month)].Not()]). \
-                    OnlyEnforceIf(project_taken_dict_bool_vars[project].Not())
-
-    # Project Dependency constraint:
-    for project in project_dependencies_dict:
-        if len(project_dependencies_dict[project]) != 0:
-            model.AddBoolAnd(
-                [project_taken_dict_bool_vars[project_name] for project_name in project_dependencies_dict[project]]). \
-                OnlyEnforceIf(project_taken_dict_bool_vars[project])
-
-    # Profit margin >= 2500
-    model.Add(sum([
-        (project_values_dict[project] * project_taken_dict_bool_vars[project]) -
-        sum([
-            int(project_month_contractor_value_dict[(contractor, project, month)])
-            * contractor_selection_bool_vars[(contractor, project, month)]
-            for month in project_month_contractor[project]
-            for contractor in project_month_contractor[project][month]
-        ])
-        for project in projects
-    ]) >= 2500
-              )
+    workbook_data = data
+    if presolve:
+        # Without the profit floor in the optimization, the presolve can only drop unstaffable projects
+        data, report = presolve_project_planning(data, None if optimize else 2500)
+        print_presolve_report(report)
+        project_month_contractor = data['project_month_contractor']
+
+    if optimize:
+        plans = optimize_project_planning(data, workers, time_limit, top_k)
+        for k, plan in enumerate(plans):
+            print("\nplan", k + 1, "(" + plan['status'] + ")")
+            print("___________________________\n")
+            for project in plan['projects']:
+                print(project)
+                for month in project_month_contractor[project]:
+                    print("\t", month, plan['assignment'][(project, month)])
+            print("\nprofit margin: ", plan['objective'], " bound: ", plan['bound'])
+        return plans
 
-    solver = cp_model.CpSolver()
-    status = solver.SearchForAllSolutions(model, SolutionPrinter(project_taken_dict_bool_vars,
-                                                                 contractor_selection_bool_vars))
+    model = cp_model.CpModel()
+    project_taken_dict_bool_vars, contractor_selection_bool_vars, project_month_contractor_value_dict, _ = \
+        build_project_planning_model(data, model)
+
+    variables, names = project_planning_columns(workbook_data, model, project_taken_dict_bool_vars,
+                                                contractor_selection_bool_vars)
+    solver, status, callback = _search_all_solutions(
+        model, SolutionPrinter(project_taken_dict_bool_vars, contractor_selection_bool_vars), sink, variables, path,
+        limit, names)
     print(solver.StatusName(status))
+    return callback
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def _sparse_mask(rng, rows, columns, density):
+    # Random sparsity pattern in which every row has at least one entry
+    mask = rng.random((rows, columns)) < density
+    empty_rows = np.flatnonzero(~mask.any(axis=1))
+    mask[empty_rows, rng.integers(0, columns, size=len(empty_rows))] = True
+    return mask
+
+
+def _sheet(values, index, columns, index_name):
+    return pd.DataFrame(values, index=pd.Index(index, name=index_name), columns=columns)
+
+
+def write_workbook(sheets, path):
+    '''Writes generated sheets to an Excel workbook laid out like the task workbooks, with the labels in a first column
+    under an empty header, so that pd.read_excel and read_workbook give them back as an "Unnamed: 0" column'''
+    with pd.ExcelWriter(path) as writer:
+        for name, frame in sheets.items():
+            if 'Unnamed: 0' in frame.columns:
+                frame = frame.set_index('Unnamed: 0')
+            frame.rename_axis(None).to_excel(writer, sheet_name=name)
+            # pandas writes times of day as text, the task workbooks hold them as Excel times
+            sheet = writer.sheets[name]
+            for j, column in enumerate(frame.columns):
+                for i, value in enumerate(frame[column]):
+                    if isinstance(value, datetime.time):
+                        cell = sheet.cell(row=i + 2, column=j + 2, value=value)
+                        cell.number_format = 'h:mm'
+
+
+def supply_chain_instance(n_suppliers=5, n_materials=4, n_factories=3, n_products=4, n_customers=4,
+                          density=0.5, seed=0):
+    '''Feasible supply chain instance with the same sheets, labels and index names as the task1 workbook'''
+    rng = np.random.default_rng(seed)
+    suppliers = ['Supplier {}'.format(i + 1) for i in range(n_suppliers)]
+    materials = ['Material {}'.format(i + 1) for i in range(n_materials)]
+    factories = ['Factory {}'.format(i + 1) for i in range(n_factories)]
+    products = ['Product {}'.format(i + 1) for i in range(n_products)]
+    customers = ['Customer {}'.format(i + 1) for i in range(n_customers)]
+
+    # Every material has a supplier, every product needs a material, is made somewhere and every customer orders
+    stock_mask = _sparse_mask(rng, n_materials, n_suppliers, density).T
+    requirement_mask = _sparse_mask(rng, n_products, n_materials, density)
+    capacity_mask = _sparse_mask(rng, n_products, n_factories, density)
+    demand_mask = _sparse_mask(rng, n_customers, n_products, density).T
+
+    requirements = np.where(requirement_mask, rng.integers(1, 10, size=requirement_mask.shape), np.nan)
+    demand = np.where(demand_mask, rng.integers(1, 10, size=demand_mask.shape), np.nan)
+
+    # Each factory that makes a product can cover its whole demand, and suppliers can cover every factory at capacity
+    total_demand = np.nansum(demand, axis=1)
+    capacity = np.where(capacity_mask, total_demand[:, None] + rng.integers(1, 10, size=capacity_mask.shape), np.nan)
+    material_need = np.nansum(requirements[:, :, None] * capacity[:, None, :], axis=(0, 2))
+    suppliers_per_material = stock_mask.sum(axis=0)
+    stock = np.where(stock_mask, np.ceil(material_need / suppliers_per_material) + rng.integers(1, 10, size=stock_mask.shape),
+                     np.nan)
+
+    raw_material_costs = np.where(stock_mask, rng.integers(10, 250, size=stock_mask.shape), np.nan)
+    production_cost = np.where(capacity_mask, rng.integers(20, 150, size=capacity_mask.shape), np.nan)
+
+    return {
+        'Supplier stock': _sheet(stock, suppliers, materials, 'suppliers'),
+        'Raw material costs': _sheet(raw_material_costs, suppliers, materials, 'suppliers'),
+        'Raw material shipping': _sheet(rng.integers(20, 300, size=(n_suppliers, n_factories)), suppliers, factories,
+                                        'suppliers'),
+        'Product requirements': _sheet(requirements, products, materials, 'products'),
+        'Production capacity': _sheet(capacity, products, factories, 'products'),
+        'Production cost': _sheet(production_cost, products, factories, 'products'),
+        'Customer demand': _sheet(demand, products, customers, 'products'),
+        'Shipping costs': _sheet(rng.integers(10, 150, size=(n_factories, n_customers)), factories, customers,
+                                 'factories'),
+    }
+
+
+def distance_matrix_instance(n_cities=10, seed=0, width=400):
+    '''Symmetric road distances between random towns in a width x width square, in the schema of the Distances sheet'''
+    rng = np.random.default_rng(seed)
+    cities = ['Town {}'.format(i + 1) for i in range(n_cities)]
+    points = rng.uniform(0, width, size=(n_cities, 2))
+    distances = np.rint(np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)).astype(int)
+    return _sheet(distances, cities, cities, 'city')
+
+
+def _clock(minutes):
+    return datetime.time(int(minutes) // 60, int(minutes) % 60)
+
+
+def airport_instance(n_flights=26, n_runways=3, n_terminals=3, seed=0, slot_minutes=1, gate_slack=1.2):
+    '''Feasible airport instance in the schema of the task3 workbook, with the flights spread over one day.
+
+    Times are on a slot_minutes grid and no slot has more movements than there are runways. Every terminal gets
+    gate_slack times its share of the largest number of flights on the ground at once.'''
+    rng = np.random.default_rng(seed)
+    flights = ['Flight {}'.format(i + 1) for i in range(n_flights)]
+    runways = ['Runway {}'.format(i + 1) for i in range(n_runways)]
+    terminals = ['Terminal {}'.format(i + 1) for i in range(n_terminals)]
+
+    slots = 24 * 60 // slot_minutes
+    if 2 * n_flights > 0.75 * slots * n_runways:
+        raise ValueError("{} flights do not fit on {} runways with {} minute slots".format(n_flights, n_runways,
+                                                                                           slot_minutes))
+    movements = np.zeros(slots, dtype=int)
+    arrival = np.empty(n_flights, dtype=int)
+    departure = np.empty(n_flights, dtype=int)
+    for i in range(n_flights):
+        # Draw again until both the arrival and the departure slot still have a free runway
+        while True:
+            ground = rng.integers(30 // slot_minutes, 180 // slot_minutes + 1)
+            a = rng.integers(0, slots - ground)
+            if movements[a] < n_runways and movements[a + ground] < n_runways:
+                break
+        movements[a] += 1
+        movements[a + ground] += 1
+        arrival[i], departure[i] = a, a + ground
+    order = np.argsort(arrival, kind='stable')
+    arrival, departure = arrival[order], departure[order]
+
+    on_ground = np.zeros(slots + 1, dtype=int)
+    np.add.at(on_ground, arrival, 1)
+    np.add.at(on_ground, departure, -1)
+    gates = np.full((n_terminals, 1), int(np.ceil(gate_slack * np.cumsum(on_ground).max() / n_terminals)))
+
+    return {
+        'Flight schedule': pd.DataFrame({'Arrival': [_clock(a * slot_minutes) for a in arrival],
+                                         'Departure': [_clock(d * slot_minutes) for d in departure]},
+                                        index=pd.Index(flights, name='flights')),
+        'Taxi distances': _sheet(rng.integers(2, 12, size=(n_runways, n_terminals)), runways, terminals, 'runway'),
+        'Terminal capacity': _sheet(gates, terminals, ['Gates'], 'terminal'),
+    }
+
+
+def sudoku_solution(sub_grid_size=3, seed=0):
+    '''Random solved grid: the pattern (box row shift + column) mod n with its digits, rows within bands, bands,
+    columns within stacks and stacks shuffled, and transposed half of the time'''
+    rng = np.random.default_rng(seed)
+    b = sub_grid_size
+    n = b * b
+    rows = np.arange(n)
+    grid = (b * (rows[:, None] % b) + rows[:, None] // b + rows[None, :]) % n
+    grid = rng.permutation(n)[grid] + 1
+
+    def lines():
+        return np.concatenate([band * b + rng.permutation(b) for band in rng.permutation(b)])
+
+    grid = grid[lines()][:, lines()]
+    return grid.T.copy() if rng.random() < 0.5 else grid
+
+
+def sudoku_puzzles(count, sub_grid_size=3, clues=30, seed=0):
+    '''count puzzles with clues given cells each, cut from random solved grids. They always have a solution, but
+    not necessarily a unique one.'''
+    rng = np.random.default_rng(seed)
+    n = sub_grid_size * sub_grid_size
+    puzzles = []
+    for _ in range(count):
+        grid = sudoku_solution(sub_grid_size, seed=rng.integers(1 << 31)).ravel()
+        grid[rng.permutation(n * n)[clues:]] = 0
+        puzzles.append(grid.reshape(n, n))
+    return puzzles
+
+
+def logic_puzzle_instance(n_people=4, n_attributes=3, n_clues=None, seed=0):
+    '''Zebra style puzzle: n_people names, attributes with one value per person each and n_clues links (attribute,
+    value, attribute, value), read "whoever has the first value has the second one", taken from a random hidden
+    assignment. By default there are n_people * (n_attributes - 1) links.'''
+    rng = np.random.default_rng(seed)
+    names = ['Person {}'.format(i + 1) for i in range(n_people)]
+    attributes = {'Attribute {}'.format(k + 1): ['A{}V{}'.format(k + 1, j + 1) for j in range(n_people)]
+                  for k in range(n_attributes)}
+    hidden = {attribute: rng.permutation(n_people) for attribute in attributes}
+    if n_clues is None:
+        n_clues = n_people * (n_attributes - 1)
+    keys = list(attributes)
+    links = []
+    for _ in range(n_clues):
+        person = rng.integers(n_people)
+        first, second = rng.choice(n_attributes, size=2, replace=False)
+        a, b = keys[first], keys[second]
+        links.append((a, attributes[a][hidden[a][person]], b, attributes[b][hidden[b][person]]))
+    return {'names': names, 'attributes': attributes, 'links': links}
+
+
+def logic_puzzle_spec(n_people=4, n_attributes=3, n_clues=None, seed=0):
+    '''logic_puzzle_instance as a puzzle specification in the schema of logical_puzzle.json, every link turned into
+    two implications about "*"'''
+    instance = logic_puzzle_instance(n_people, n_attributes, n_clues, seed)
+    clues = []
+    for a, value_a, b, value_b in instance['links']:
+        clues.append({"and": ["*.{}={}".format(b, value_b)], "if": ["*.{}={}".format(a, value_a)]})
+        clues.append({"and": ["*.{}={}".format(a, value_a)], "if": ["*.{}={}".format(b, value_b)]})
+    return {"entities": instance['names'],
+            "attributes": {attribute: {"values": values, "unique": True}
+                           for attribute, values in instance['attributes'].items()},
+            "clues": clues}
+
+
+def project_planning_instance(n_projects=9, n_contractors=11, n_jobs=13, n_months=12, density=0.25,
+                              dependency_density=0.1, seed=0):
+    '''Project planning instance with the sheets and columns of the constraint programming task 3 workbook as read
+    from Excel (labels in an "Unnamed: 0" column). Projects run 2 to 5 consecutive months, every job has a
+    contractor and projects only depend on earlier ones.'''
+    rng = np.random.default_rng(seed)
+    projects = ['Project {}'.format(i + 1) for i in range(n_projects)]
+    contractors = ['Contractor {}'.format(i + 1) for i in range(n_contractors)]
+    jobs = ['Job {}'.format(i + 1) for i in range(n_jobs)]
+    months = ['M{}'.format(i + 1) for i in range(n_months)]
+
+    schedule = np.full((n_projects, n_months), np.nan, dtype=object)
+    for i in range(n_projects):
+        length = rng.integers(2, min(5, n_months) + 1)
+        start = rng.integers(0, n_months - length + 1)
+        schedule[i, start:start + length] = [jobs[j] for j in rng.integers(0, n_jobs, size=length)]
+
+    quote_mask = _sparse_mask(rng, n_jobs, n_contractors, density).T
+    quotes = np.where(quote_mask, 10 * rng.integers(2, 60, size=quote_mask.shape), np.nan)
+    mean_quote = np.nanmean(quotes)
+
+    depends = np.tril(rng.random((n_projects, n_projects)) < dependency_density, -1)
+    dependencies = np.where(depends, np.array('x', dtype=object), np.nan)
+    months_used = pd.notna(schedule).sum(axis=1)
+    values = np.rint(months_used * mean_quote * rng.uniform(0.8, 2.0, size=n_projects) / 100) * 100
+
+    def labelled(label, values, columns):
+        frame = pd.DataFrame(values, columns=columns)
+        frame.insert(0, 'Unnamed: 0', label)
+        return frame
+
+    return {
+        'Projects': labelled(projects, schedule, months),
+        'Quotes': labelled(contractors, quotes, jobs),
+        'Dependencies': labelled(projects, dependencies, projects),
+        'Value': labelled(projects, values.astype(int), ['Value']),
+    }
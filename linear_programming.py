@@ -1,12 +1,346 @@
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+from ortools.sat.python import cp_model
+from concurrent.futures import ProcessPoolExecutor
+import heapq
 import itertools
+import os
+import numpy as np
 import pandas as pd
+from tsp import held_karp_tour, heuristic_tour
+from workbook_cache import read_workbook
+
+
+# Index column of every sheet in the supply chain workbook
+SUPPLY_CHAIN_SHEETS = {
+    'Supplier stock': 'suppliers',
+    'Raw material costs': 'suppliers',
+    'Raw material shipping': 'suppliers',
+    'Product requirements': 'products',
+    'Production capacity': 'products',
+    'Production cost': 'products',
+    'Customer demand': 'products',
+    'Shipping costs': 'factories',
+}
+
+
+def load_supply_chain_data(path="../Assignment_DA_2_Task_1_data.xlsx"):
+    task1_df = read_workbook(path)
+    for sheet, index_column in SUPPLY_CHAIN_SHEETS.items():
+        task1_df[sheet].rename(columns={"Unnamed: 0": index_column}, inplace=True)
+        task1_df[sheet].set_index(index_column, inplace=True)
+    return task1_df
+
+
+def supply_chain_arrays(task1_df):
+    '''Turns every sheet into a float matrix aligned on the same suppliers/materials/factories/products/customers
+    order, plus the masks of the cells that are filled in. Missing values stay NaN in the matrices.'''
+    suppliers = list(task1_df['Supplier stock'].index)
+    materials = list(task1_df['Supplier stock'].columns)
+    factories = list(task1_df['Raw material shipping'].columns)
+    products = list(task1_df['Product requirements'].index)
+    customers = list(task1_df['Customer demand'].columns)
+
+    def matrix(sheet, rows, columns):
+        return task1_df[sheet].reindex(index=rows, columns=columns).to_numpy(dtype=float, copy=True)
+
+    arrays = {
+        'suppliers': suppliers,
+        'materials': materials,
+        'factories': factories,
+        'products': products,
+        'customers': customers,
+        'stock': matrix('Supplier stock', suppliers, materials),
+        'raw_material_costs': matrix('Raw material costs', suppliers, materials),
+        'raw_material_shipping': matrix('Raw material shipping', suppliers, factories),
+        'requirements': matrix('Product requirements', products, materials),
+        'capacity': matrix('Production capacity', products, factories),
+        'production_cost': matrix('Production cost', products, factories),
+        'demand': matrix('Customer demand', products, customers),
+        'shipping_costs': matrix('Shipping costs', factories, customers),
+    }
+    arrays['stock_mask'] = ~np.isnan(arrays['stock'])
+    arrays['requirement_mask'] = ~np.isnan(arrays['requirements'])
+    arrays['capacity_mask'] = ~np.isnan(arrays['capacity'])
+    arrays['demand_mask'] = ~np.isnan(arrays['demand'])
+    return arrays
+
+
+def build_supply_chain_model(arrays, solver):
+    '''Creates the task1 variables, constraints (C-G) and objective (H) from the output of supply_chain_arrays.
+    All coefficients and sparsity patterns are computed on whole matrices first, so the only per element work left
+    is the solver calls themselves.'''
+    suppliers, materials = arrays['suppliers'], arrays['materials']
+    factories, products, customers = arrays['factories'], arrays['products'], arrays['customers']
+    stock_mask, requirement_mask = arrays['stock_mask'], arrays['requirement_mask']
+    capacity_mask, demand_mask = arrays['capacity_mask'], arrays['demand_mask']
+    infinity = solver.infinity()
+    cost = solver.Objective()
+
+    # H) Objective coefficients for every (supplier, material, factory), (product, factory) and (factory, customer)
+    order_costs = (arrays['raw_material_costs'][:, :, None] + arrays['raw_material_shipping'][:, None, :]).tolist()
+    production_cost = arrays['production_cost'].tolist()
+    shipping_costs = arrays['shipping_costs'].astype(int).tolist()
+    stock = arrays['stock'].tolist()
+    capacity = arrays['capacity'].tolist()
+    demand = np.where(demand_mask, arrays['demand'], 0).tolist()
+    requirements = arrays['requirements'].tolist()
+
+    # B) Orders from factories to suppliers, E) suppliers have all ordered items in stock
+    order_from_factory_to_supplier = {}
+    stock_constraints = {}
+    for s, m in zip(*np.nonzero(stock_mask)):
+        c = solver.Constraint(0, stock[s][m])
+        stock_constraints[(materials[m], suppliers[s])] = c
+        for f in range(len(factories)):
+            order = solver.NumVar(0, infinity, materials[m] + '_' + factories[f] + '_' + suppliers[s])
+            order_from_factory_to_supplier[(materials[m], factories[f], suppliers[s])] = order
+            c.SetCoefficient(order, 1)
+            cost.SetCoefficient(order, order_costs[s][m][f])
+
+    # B) Production volume, G) manufacturing capacities are not exceeded
+    production_volume = {}
+    capacity_constraints = {}
+    for f, p in zip(*np.nonzero(capacity_mask.T)):
+        volume = solver.NumVar(0, infinity, factories[f] + '_' + products[p])
+        production_volume[(products[p], factories[f])] = volume
+        c = solver.Constraint(0, capacity[p][f])
+        c.SetCoefficient(volume, 1)
+        capacity_constraints[(products[p], factories[f])] = c
+        cost.SetCoefficient(volume, production_cost[p][f])
+
+    # B) Delivery to customers, D) customer demand is met, C) factories deliver less than they produce
+    factories_for_product = [np.flatnonzero(capacity_mask[p]).tolist() for p in range(len(products))]
+    deliver_products_from_factories_to_customers = {}
+    demand_constraints = {}
+    for k, p in zip(*np.nonzero(demand_mask.T)):
+        c = solver.Constraint(demand[p][k], demand[p][k])
+        demand_constraints[(products[p], customers[k])] = c
+        for f in factories_for_product[p]:
+            delivery = solver.NumVar(0, infinity, products[p] + '_' + factories[f] + '_' + customers[k])
+            deliver_products_from_factories_to_customers[(products[p], factories[f], customers[k])] = delivery
+            c.SetCoefficient(delivery, 1)
+            cost.SetCoefficient(delivery, shipping_costs[f][k])
+            d = solver.Constraint(1, infinity)
+            d.SetCoefficient(production_volume[(products[p], factories[f])], 1)
+            d.SetCoefficient(delivery, -1)
+
+    # F) Factories order enough material to manufacture all items
+    suppliers_for_material = [np.flatnonzero(stock_mask[:, m]).tolist() for m in range(len(materials))]
+    users_of_material = requirement_mask[:, :, None] & capacity_mask[:, None, :]     # product x material x factory
+    for f in range(len(factories)):
+        for m in range(len(materials)):
+            c = solver.Constraint(0, infinity)
+            for s in suppliers_for_material[m]:
+                c.SetCoefficient(order_from_factory_to_supplier[(materials[m], factories[f], suppliers[s])], 1)
+            for p in np.flatnonzero(users_of_material[:, m, f]):
+                c.SetCoefficient(production_volume[(products[p], factories[f])], -requirements[p][m])
 
+    cost.SetMinimization()
+    return {
+        'orders': order_from_factory_to_supplier,
+        'production': production_volume,
+        'deliveries': deliver_products_from_factories_to_customers,
+        'stock_constraints': stock_constraints,
+        'capacity_constraints': capacity_constraints,
+        'demand_constraints': demand_constraints,
+        'objective': cost,
+    }
+
+
+def solution_values(variables, arrays, axes):
+    '''Solution values of a dict of variables keyed by labels, e.g. model['orders'] keyed by (material, factory,
+    supplier), as an array indexed by the positions of those labels in arrays[axes[0]], arrays[axes[1]], ...'''
+    positions = [{label: i for i, label in enumerate(arrays[axis])} for axis in axes]
+    values = np.zeros([len(arrays[axis]) for axis in axes])
+    for key, variable in variables.items():
+        values[tuple(position[label] for position, label in zip(positions, key))] = variable.solution_value()
+    return values
+
+
+def supply_chain_unit_costs(arrays, model):
+    '''Unit cost of every product for every (factory, customer) pair of a solved task1 model, indexed
+    [product, factory, customer] (sub task N).
+
+    Each material a factory ordered from a supplier costs its price per required unit plus one shipping charge from
+    that supplier. That landed cost per (factory, material) is computed once from the orders and turned into a cost
+    per (product, factory) with a matrix product over the requirements; customers only add their shipping cost.'''
+    ordered = solution_values(model['orders'], arrays, ('materials', 'factories', 'suppliers')) > 0
+    material_cost = np.einsum('mfs,sm->fm', ordered, np.nan_to_num(arrays['raw_material_costs']))
+    shipping_charge = np.einsum('mfs,sf->fm', ordered, np.nan_to_num(arrays['raw_material_shipping']))
+    product_cost = (np.nan_to_num(arrays['requirements']) @ material_cost.T
+                    + arrays['requirement_mask'] @ shipping_charge.T + arrays['production_cost'])
+    return product_cost[:, :, None] + arrays['shipping_costs'][None, :, :]
+
+
+class SupplyChainModel:
+    '''The task1 LP kept alive between solves.
+
+    The update methods only change constraint bounds or objective coefficients of the existing solver, so GLOP can
+    restart from the basis of the previous solve instead of building and solving the model from scratch. Arcs that
+    are empty in the workbook (NaN cells) are not part of the model and can not be switched on by an update.'''
+
+    # Sheet -> (matrix in self.arrays, row labels, column labels, update method)
+    SHEET_UPDATES = {
+        'Supplier stock': ('stock', 'suppliers', 'materials', 'set_stock'),
+        'Raw material costs': ('raw_material_costs', 'suppliers', 'materials', 'set_raw_material_cost'),
+        'Raw material shipping': ('raw_material_shipping', 'suppliers', 'factories', 'set_raw_material_shipping'),
+        'Production capacity': ('capacity', 'products', 'factories', 'set_capacity'),
+        'Production cost': ('production_cost', 'products', 'factories', 'set_production_cost'),
+        'Customer demand': ('demand', 'products', 'customers', 'set_demand'),
+        'Shipping costs': ('shipping_costs', 'factories', 'customers', 'set_shipping_cost'),
+    }
+
+    def __init__(self, task1_df):
+        self.arrays = supply_chain_arrays(task1_df)
+        self.solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+        # Presolve rewrites the problem on every solve, which throws the previous basis away
+        self.solver.SetSolverSpecificParametersAsString("use_preprocessing: false")
+        self.model = build_supply_chain_model(self.arrays, self.solver)
+        self.position = {name: {label: i for i, label in enumerate(self.arrays[name])}
+                         for name in ('suppliers', 'materials', 'factories', 'products', 'customers')}
+        self.status = None
+
+    @classmethod
+    def from_workbook(cls, path="../Assignment_DA_2_Task_1_data.xlsx"):
+        return cls(load_supply_chain_data(path))
+
+    def _constraint(self, kind, key):
+        if key not in self.model[kind]:
+            raise KeyError("{} is not part of the supply chain ({})".format(key, kind))
+        return self.model[kind][key]
+
+    def set_demand(self, product, customer, units):
+        self._constraint('demand_constraints', (product, customer)).SetBounds(units, units)
+        self.arrays['demand'][self.position['products'][product], self.position['customers'][customer]] = units
+
+    def set_stock(self, supplier, material, units):
+        self._constraint('stock_constraints', (material, supplier)).SetUb(units)
+        self.arrays['stock'][self.position['suppliers'][supplier], self.position['materials'][material]] = units
+
+    def set_capacity(self, product, factory, units):
+        self._constraint('capacity_constraints', (product, factory)).SetUb(units)
+        self.arrays['capacity'][self.position['products'][product], self.position['factories'][factory]] = units
+
+    def set_raw_material_cost(self, supplier, material, cost):
+        self._constraint('stock_constraints', (material, supplier))
+        s = self.position['suppliers'][supplier]
+        self.arrays['raw_material_costs'][s, self.position['materials'][material]] = cost
+        shipping = self.arrays['raw_material_shipping'][s]
+        for f, factory in enumerate(self.arrays['factories']):
+            self.model['objective'].SetCoefficient(self.model['orders'][(material, factory, supplier)],
+                                                   cost + shipping[f])
+
+    def set_raw_material_shipping(self, supplier, factory, cost):
+        s = self.position['suppliers'][supplier]
+        self.arrays['raw_material_shipping'][s, self.position['factories'][factory]] = cost
+        material_costs = self.arrays['raw_material_costs'][s]
+        for m in np.flatnonzero(self.arrays['stock_mask'][s]):
+            material = self.arrays['materials'][m]
+            self.model['objective'].SetCoefficient(self.model['orders'][(material, factory, supplier)],
+                                                   material_costs[m] + cost)
+
+    def set_production_cost(self, product, factory, cost):
+        self._constraint('capacity_constraints', (product, factory))
+        self.arrays['production_cost'][self.position['products'][product], self.position['factories'][factory]] = cost
+        self.model['objective'].SetCoefficient(self.model['production'][(product, factory)], cost)
+
+    def set_shipping_cost(self, factory, customer, cost):
+        f, k = self.position['factories'][factory], self.position['customers'][customer]
+        self.arrays['shipping_costs'][f, k] = cost
+        for p in np.flatnonzero(self.arrays['demand_mask'][:, k] & self.arrays['capacity_mask'][:, f]):
+            product = self.arrays['products'][p]
+            self.model['objective'].SetCoefficient(self.model['deliveries'][(product, factory, customer)], int(cost))
+
+    def value(self, sheet, row, column):
+        matrix, rows, columns, _ = self.SHEET_UPDATES[sheet]
+        return self.arrays[matrix][self.position[rows][row], self.position[columns][column]]
+
+    def set_value(self, sheet, row, column, value):
+        '''Same as calling the update method for the sheet, with the cell addressed like in the workbook'''
+        getattr(self, self.SHEET_UPDATES[sheet][3])(row, column, value)
+
+    def solve(self):
+        self.status = self.solver.Solve()
+        return self.status
+
+    def objective_value(self):
+        return self.solver.Objective().Value()
+
+
+# Model of the current process when solving scenarios in a pool, built once by _init_scenario_worker
+_scenario_model = None
+
+
+def _init_scenario_worker(task1_df):
+    global _scenario_model
+    _scenario_model = SupplyChainModel(task1_df)
+    _scenario_model.solve()
+
+
+def _solve_scenario(job, model=None):
+    scenario, deltas = job
+    model = model or _scenario_model
+    base_values = [(sheet, row, column, model.value(sheet, row, column)) for sheet, row, column, _ in deltas]
+    for (sheet, row, column, scale), (_, _, _, base) in zip(deltas, base_values):
+        model.set_value(sheet, row, column, base * scale)
+    status = model.solve()
+
+    # (scenario, variable, value) rows
+    rows = [(scenario, 'status', status), (scenario, 'objective', np.nan)]
+    if status == pywraplp.Solver.OPTIMAL:
+        rows[1] = (scenario, 'objective', model.objective_value())
+        rows.append((scenario, 'ordered', sum(order.solution_value() for order in model.model['orders'].values())))
+        produced = {}
+        for (product, factory), volume in model.model['production'].items():
+            produced[factory] = produced.get(factory, 0) + volume.solution_value()
+        rows += [(scenario, factory + ' produced', volume) for factory, volume in produced.items()]
+
+    # Back to the base instance, the next scenario starts from this basis
+    for sheet, row, column, base in reversed(base_values):
+        model.set_value(sheet, row, column, base)
+    return rows
+
+
+def demand_shock_scenarios(task1_df, count, spread=0.1, seed=0):
+    '''Scenario table in which every customer's demand is scaled by a random factor in [1 - spread, 1 + spread]'''
+    rng = np.random.default_rng(seed)
+    demand_cells = task1_df['Customer demand'].stack().dropna().index
+    customers = list(task1_df['Customer demand'].columns)
+    rows = []
+    for scenario in range(count):
+        scale = dict(zip(customers, rng.uniform(1 - spread, 1 + spread, size=len(customers))))
+        for product, customer in demand_cells:
+            rows.append((scenario, 'Customer demand', product, customer, scale[customer]))
+    return pd.DataFrame(rows, columns=['scenario', 'sheet', 'row', 'column', 'scale'])
+
+
+def run_scenarios(task1_df, scenarios, workers=None):
+    '''Solves every scenario of the table against the task1 instance and returns a long frame with the columns
+    scenario, variable and value: the status and objective of every scenario, and for the optimal ones the units
+    ordered and the volume produced by each factory.
+
+    scenarios has the columns scenario, sheet, row, column and scale: the workbook cell (sheet, row, column) is
+    multiplied by scale in that scenario. Each worker process receives the base instance once, builds its own
+    SupplyChainModel and then only gets the scenario deltas, which it applies and reverts on the warm model.
+    workers=1 solves in the current process, on a model that is dropped at the end of the run.'''
+    jobs = [(scenario, list(group[['sheet', 'row', 'column', 'scale']].itertuples(index=False, name=None)))
+            for scenario, group in scenarios.groupby('scenario', sort=False)]
+    if workers == 1:
+        model = SupplyChainModel(task1_df)
+        model.solve()
+        results = [_solve_scenario(job, model) for job in jobs]
+    else:
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scenario_worker,
+                                 initargs=(task1_df,)) as pool:
+            results = list(pool.map(_solve_scenario, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    return pd.DataFrame([row for rows in results for row in rows], columns=['scenario', 'variable', 'value'])
 
-def task1():
+
+def task1(path="../Assignment_DA_2_Task_1_data.xlsx"):
     solver = pywraplp.Solver('LPWrapper', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
     # A) Load the data
-    task1_df = pd.read_excel("../Assignment_DA_2_Task_1_data.xlsx", sheet_name=None)
+    task1_df = load_supply_chain_data(path)
 
     supplier_stock = task1_df['Supplier stock']
     raw_material_costs = task1_df['Raw material costs']
@@ -17,24 +351,6 @@ def task1():
     customer_demand = task1_df['Customer demand']
     shipping_costs = task1_df['Shipping costs']
 
-    supplier_stock.rename(columns={"Unnamed: 0": "suppliers"}, inplace=True)
-    raw_material_costs.rename(columns={"Unnamed: 0": "suppliers"}, inplace=True)
-    raw_material_shipping.rename(columns={"Unnamed: 0": "suppliers"}, inplace=True)
-    product_requirements.rename(columns={"Unnamed: 0": "products"}, inplace=True)
-    production_capacity.rename(columns={"Unnamed: 0": "products"}, inplace=True)
-    production_cost.rename(columns={"Unnamed: 0": "products"}, inplace=True)
-    customer_demand.rename(columns={"Unnamed: 0": "products"}, inplace=True)
-    shipping_costs.rename(columns={"Unnamed: 0": "factories"}, inplace=True)
-
-    supplier_stock.set_index('suppliers', inplace=True)
-    raw_material_costs.set_index('suppliers', inplace=True)
-    raw_material_shipping.set_index('suppliers', inplace=True)
-    product_requirements.set_index('products', inplace=True)
-    production_capacity.set_index('products', inplace=True)
-    production_cost.set_index('products', inplace=True)
-    customer_demand.set_index('products', inplace=True)
-    shipping_costs.set_index('factories', inplace=True)
-
     # Get the list of suppliers, materials, factories, products and customers
     suppliers = list(supplier_stock.index)
     materials = list(supplier_stock.columns)
@@ -51,101 +367,19 @@ def task1():
     print("\ncustomer_demand: \n", customer_demand)
     print("\nshipping_costs: \n", shipping_costs)
 
-    # B) Decision variables for orders from factories (Factories can order raw materials from multiple suppliers)
-    # From the data, we can clearly see that every factory needs all raw materials
-    order_from_factory_to_supplier = {}
-    for supplier in suppliers:
-        for material in materials:
-            if not pd.isnull(supplier_stock.loc[supplier, material]):
-                # E) Define and implement the constraints that ensure suppliers have all ordered items in stock (add constraint)
-                c = solver.Constraint(0, supplier_stock.loc[supplier, material])
-                for factory in factories:
-                    order_from_factory_to_supplier[(material, factory, supplier)] = solver.NumVar(0, solver.infinity(), material+'_'+factory+'_'+supplier)
-                    # E) Define and implement the constraints that ensure suppliers have all ordered items in stock (add coeff)
-                    c.SetCoefficient(order_from_factory_to_supplier[(material, factory, supplier)], 1)
+    # B) - H) Decision variables, constraints and objective, built from the sheets converted to matrices
+    arrays = supply_chain_arrays(task1_df)
+    model = build_supply_chain_model(arrays, solver)
+    order_from_factory_to_supplier = model['orders']
+    production_volume = model['production']
+    deliver_products_from_factories_to_customers = model['deliveries']
 
     print("len of order dec variable: ", len(order_from_factory_to_supplier))
-    # print("\n order dec variables: ", order_from_factory_to_supplier)
-
-    # B) Decision variables for production volume, each factory has its own capacity to produce the products
-    production_volume = {}
-    for factory in factories:
-        for product in products:
-            if not pd.isnull(production_capacity.loc[product, factory]):
-                production_volume[(product, factory)] = solver.NumVar(0, solver.infinity(), factory+'_'+product)
-                # G) Define and implement the constraint that ensures manufacturing capacities are not exceeded
-                c = solver.Constraint(0, production_capacity.loc[product, factory])
-                c.SetCoefficient(production_volume[(product, factory)], 1)
-
     print("len of production_volume dec variable: ", len(production_volume))
-
-    # print("\n production volume dec vars: ", production_volume)
-
-    # B) Decision variables for delivery to customers
-    deliver_products_from_factories_to_customers = {}
-    for customer in customers:
-        for product in products:
-            if not pd.isnull(customer_demand.loc[product, customer]):
-                # D) Define and implement the constraint that ensures customer demand is met (add constraint)
-                c = solver.Constraint(int(customer_demand.loc[product, customer]), int(customer_demand.loc[product, customer]))
-                for factory in factories:
-                    if not pd.isnull(production_capacity.loc[product, factory]):
-                        deliver_products_from_factories_to_customers[(product, factory, customer)] = solver.NumVar(0, solver.infinity(), product+'_'+factory+'_'+customer)
-                        # D) Define and implement the constraint that ensures customer demand is met (set the coeff)
-                        c.SetCoefficient(deliver_products_from_factories_to_customers[(product, factory, customer)], 1)
-
-                        # c) Define and implement the constraint that ensures factories produce more than they ship to customers
-                        # Factories have the limit on production capacity, so we have to do it the other way round
-                        # Factories should deliver less than what their production capacity is
-                        d = solver.Constraint(1, solver.infinity())
-                        d.SetCoefficient(production_volume[(product, factory)], 1)
-                        d.SetCoefficient(deliver_products_from_factories_to_customers[(product, factory, customer)], -1)
-
     print("len of delivery dec variable: ", len(deliver_products_from_factories_to_customers))
-    # print("\n deliver dec variable: ", deliver_products_from_factories_to_customers)
-
-
-    # F) Define and implement constraint that ensures factories order enough material to be able to manufacture all items
-    for factory in factories:
-        for material in materials:
-            c = solver.Constraint(0, solver.infinity())
-            for supplier in suppliers:
-                if not pd.isnull(supplier_stock.loc[supplier, material]):
-                    c.SetCoefficient(order_from_factory_to_supplier[(material, factory, supplier)], 1)
-            for product in products:
-                if not pd.isnull(product_requirements.loc[product, material]):
-                    if not pd.isnull(production_capacity.loc[product, factory]):
-                        # After producing the required quantity utilizing 'n' units of respective raw materials, factories should not run out of materials in -ve quantity, so we are adding the utilized quantities and subtracting it from the ordered stock of raw materials
-                        c.SetCoefficient(production_volume[(product, factory)], -product_requirements.loc[product, material])
-
-    # H) Define and implement the objective function. Make sure to consider the supplier bills comprising shipping and material costs the production cost of each factory and the cost of delivery to each customer
-    cost = solver.Objective()
-
-    # Cost to factory (Raw material cost + shipping cost)
-    for supplier in suppliers:
-        for material in materials:
-            if not pd.isnull(supplier_stock.loc[supplier, material]):
-                for factory in factories:
-                    cost.SetCoefficient(order_from_factory_to_supplier[(material, factory, supplier)],
-                                        raw_material_costs.loc[supplier, material] + raw_material_shipping.loc[supplier, factory])
-
-    # Cost to factory (Production cost)
-    for factory in factories:
-        for product in products:
-            if not pd.isnull(production_capacity.loc[product, factory]):
-                cost.SetCoefficient(production_volume[(product, factory)], production_cost.loc[product, factory])
-
-    # Cost on shipping to customers
-    for customer in customers:
-        for product in products:
-            if not pd.isnull(customer_demand.loc[product, customer]):
-                for factory in factories:
-                    if not pd.isnull(production_capacity.loc[product, factory]):
-                        cost.SetCoefficient(deliver_products_from_factories_to_customers[(product, factory, customer)], int(shipping_costs.loc[factory, customer]))
 
     # I) Solve linear program and determine the overall optimal cost
     print("\nSolving the objective function")
-    cost.SetMinimization()
     status = solver.Solve()
     if status == solver.OPTIMAL:
         print("Optimal solution found")
@@ -228,127 +462,506 @@ def task1():
     # N) calculate the overall unit cost of each product per customer including the raw materials used for the manufacturing of the customer’s specific product, the cost of manufacturing for the specific customer and all relevant shipping costs
     print("\nSUB TASK N: unit cost of each product per customer")
     print("************************************************")
-    for customer in customers:
+    unit_costs = supply_chain_unit_costs(arrays, model)
+    delivered = solution_values(deliver_products_from_factories_to_customers, arrays,
+                                ('products', 'factories', 'customers')) > 0
+    demand_mask, capacity_mask = arrays['demand_mask'], arrays['capacity_mask']
+    for k, customer in enumerate(customers):
         print("For ", customer, end='\n')
-        # shipping_cost = 0
-        for product in products:
-            if not pd.isnull(customer_demand.loc[product, customer]):
-                print("\tFor ", product, end='\n')
-                # unit_cost = 0
-                for factory in factories:
-                    unit_cost = 0
-                    # product_count_for_each_factory = 0
-                    if not pd.isnull(production_capacity.loc[product, factory]):
-                        if deliver_products_from_factories_to_customers[(product, factory, customer)].solution_value() > 0:
-                            for material in materials:
-                                if not pd.isnull(product_requirements.loc[product, material]):
-                                    for supplier in suppliers:
-                                        if not pd.isnull(supplier_stock.loc[supplier, material]):
-                                            if order_from_factory_to_supplier[(material, factory, supplier)].solution_value() > 0:
-                                                unit_cost += product_requirements.loc[product, material] * raw_material_costs.loc[supplier, material]
-                                                unit_cost += raw_material_shipping.loc[supplier, factory]
-                            unit_cost += production_cost.loc[product, factory]
-                            unit_cost += shipping_costs.loc[factory, customer]
-                            print("\t\tUnit cost from {} is: {}".format(factory, unit_cost))
+        for p in np.flatnonzero(demand_mask[:, k]):
+            print("\tFor ", products[p], end='\n')
+            for f in np.flatnonzero(capacity_mask[p] & delivered[p, :, k]):
+                print("\t\tUnit cost from {} is: {}".format(factories[f], unit_costs[p, f, k]))
         print("\n")
 
 
-def task2():
-    task2_df = pd.read_excel("../Assignment_DA_2_Task_2_data.xlsx", sheet_name=None)
-    solver = pywraplp.Solver('TSPSolver', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
-
-    distances = task2_df['Distances']
+def load_distances(path="../Assignment_DA_2_Task_2_data.xlsx"):
+    distances = read_workbook(path, sheet_name='Distances')
     distances.rename(columns={'Unnamed: 0': 'city'}, inplace=True)
     distances.set_index('city', inplace=True)
+    return distances
 
-    start_city = 'Cork'
-    end_city = start_city
-    cities_to_visit = ['Cork', 'Athlone', 'Belfast', 'Dublin', 'Galway', 'Limerick', 'Rosslare', 'Waterford', 'Wexford', 'Wicklow']
+
+def build_tsp_model(distances, cities_to_visit, solver, arcs=None, integer=True):
+    '''Assignment part of the TSP (A, B, C and the objective). Subtours are handled by add_mtz_constraints or
+    solve_tsp_lazy. arcs restricts the legs to a list of (i, j) positions in cities_to_visit, integer=False creates
+    the LP relaxation.'''
+    legs = distances.loc[cities_to_visit, cities_to_visit].to_numpy()
+    if arcs is None:
+        arcs = itertools.permutations(range(len(cities_to_visit)), 2)
+    new_var = solver.IntVar if integer else solver.NumVar
 
     # A) For each pair of towns that need to be visited create a decision variable to decide if this leg should be included into the route
+    # B) The delivery driver arrives in each of the towns, C) the driver departs each of the towns
+    arrive = [solver.Constraint(1, 1) for _ in cities_to_visit]
+    depart = [solver.Constraint(1, 1) for _ in cities_to_visit]
+    cost = solver.Objective()
     city_pair = {}
-    for i in range(len(cities_to_visit)):
-        for j in range(len(cities_to_visit)):
-            if i == j:
-                continue
-            city_pair[(cities_to_visit[i], cities_to_visit[j])] = solver.IntVar(0, 1, cities_to_visit[i]+'_'+cities_to_visit[j])
-
-    city_variable = {}
-    for city in cities_to_visit:
-        city_variable[city] = solver.IntVar(0, 1, city)
+    for i, j in arcs:
+        leg = new_var(0, 1, cities_to_visit[i]+'_'+cities_to_visit[j])
+        city_pair[(cities_to_visit[i], cities_to_visit[j])] = leg
+        arrive[j].SetCoefficient(leg, 1)
+        depart[i].SetCoefficient(leg, 1)
+        cost.SetCoefficient(leg, int(legs[i, j]))
+    cost.SetMinimization()
+    return city_pair
+
+
+def add_mtz_constraints(solver, city_pair, cities_to_visit):
+    # D) No disconnected self-contained circles in the route (Miller-Tucker-Zemlin): every town except the first one
+    # gets its position in the route, and a leg i -> j forces position(j) >= position(i) + 1
+    n = len(cities_to_visit)
+    city_variable = {city: solver.IntVar(1, n - 1, city) for city in cities_to_visit[1:]}
+    for i, j in itertools.permutations(cities_to_visit[1:], 2):
+        c = solver.Constraint(-solver.infinity(), n - 1)
+        c.SetCoefficient(city_variable[i], 1)
+        c.SetCoefficient(city_variable[j], -1)
+        c.SetCoefficient(city_pair[(i, j)], n)
+    return city_variable
+
+
+def tsp_successors(city_pair):
+    return {i: j for (i, j), leg in city_pair.items() if leg.solution_value() > 0.5}
+
+
+def tsp_route(successors, start_city):
+    route = [start_city]
+    while successors[route[-1]] != start_city:
+        route.append(successors[route[-1]])
+    return route + [start_city]
+
+
+def tsp_components(city_pair, cities_to_visit, threshold=1e-6):
+    # Connected groups of towns when every leg with a solution value above threshold is used as an undirected edge.
+    # For an integer solution these are the cycles of the route.
+    neighbours = {city: [] for city in cities_to_visit}
+    for (i, j), leg in city_pair.items():
+        if leg.solution_value() > threshold:
+            neighbours[i].append(j)
+            neighbours[j].append(i)
+    components = []
+    unvisited = set(cities_to_visit)
+    while unvisited:
+        stack = [unvisited.pop()]
+        component = []
+        while stack:
+            city = stack.pop()
+            component.append(city)
+            for neighbour in neighbours[city]:
+                if neighbour in unvisited:
+                    unvisited.remove(neighbour)
+                    stack.append(neighbour)
+        components.append(component)
+    return components
+
+
+def add_subtour_cut(solver, city_pair, cities_to_visit, towns):
+    # At most |S| - 1 legs inside S, or equivalently at least one leg leaving S: use the form with fewer terms.
+    # Legs missing from city_pair (restricted models) are skipped.
+    if len(towns) <= len(cities_to_visit) - len(towns):
+        c = solver.Constraint(-solver.infinity(), len(towns) - 1)
+        legs = itertools.permutations(towns, 2)
+    else:
+        inside = set(towns)
+        c = solver.Constraint(1, solver.infinity())
+        legs = ((i, j) for i in towns for j in cities_to_visit if j not in inside)
+    for leg in legs:
+        if leg in city_pair:
+            c.SetCoefficient(city_pair[leg], 1)
+
+
+def tsp_violated_cuts(city_pair, cities_to_visit, limit=2 - 1e-6):
+    '''Groups of towns whose subtour elimination constraint is violated by a fractional solution.
+
+    With w = x + x^T, a group S satisfies its constraint when w(S, rest) >= 2. Cuts below limit are collected from
+    every phase of the Stoer-Wagner minimum cut algorithm on w, so several violated groups come out of one pass.'''
+    n = len(cities_to_visit)
+    position = {city: i for i, city in enumerate(cities_to_visit)}
+    weights = np.zeros((n, n))
+    for (i, j), leg in city_pair.items():
+        weights[position[i], position[j]] += leg.solution_value()
+    weights += weights.T
+    groups = [[i] for i in range(n)]
+    active = np.ones(n, dtype=bool)
+    found = {}
+    for remaining in range(n, 1, -1):
+        # Maximum adjacency order of the active (merged) vertices, the last one gives the cut of the phase
+        start = np.flatnonzero(active)[0]
+        added = ~active
+        added[start] = True
+        connection = weights[start].copy()
+        order = [start]
+        for _ in range(remaining - 1):
+            last = int(np.argmax(np.where(added, -np.inf, connection)))
+            cut_weight = connection[last]
+            added[last] = True
+            connection += weights[last]
+            order.append(last)
+        before, last = order[-2], order[-1]
+        if cut_weight < limit:
+            towns = groups[last] if 2 * len(groups[last]) <= n else sorted(set(range(n)) - set(groups[last]))
+            found[frozenset(towns)] = [cities_to_visit[i] for i in towns]
+        weights[before] += weights[last]
+        weights[:, before] += weights[:, last]
+        weights[before, before] = 0
+        weights[last] = 0
+        weights[:, last] = 0
+        active[last] = False
+        groups[before] += groups[last]
+    return list(found.values())
+
+
+def separate_subtours(solver, city_pair, cities_to_visit, cut_sets=(), fractional=False):
+    '''Adds the cuts for cut_sets, then solves and adds a subtour elimination cut for every disconnected group of
+    towns until the solution is connected. With fractional=True (LP relaxations) connected solutions are also
+    checked with tsp_violated_cuts. Returns (status, rounds, cut sets added).'''
+    for towns in cut_sets:
+        add_subtour_cut(solver, city_pair, cities_to_visit, towns)
+    rounds = 0
+    added = []
+    while True:
+        status = solver.Solve()
+        rounds += 1
+        if status != pywraplp.Solver.OPTIMAL:
+            return status, rounds, added
+        violated = tsp_components(city_pair, cities_to_visit)
+        if len(violated) == 1:
+            violated = tsp_violated_cuts(city_pair, cities_to_visit) if fractional else []
+        if not violated:
+            return status, rounds, added
+        for towns in violated:
+            add_subtour_cut(solver, city_pair, cities_to_visit, towns)
+            added.append(towns)
+
+
+def tsp_route_cost(distances, route):
+    return float(sum(distances.loc[i, j] for i, j in zip(route[:-1], route[1:])))
+
+
+def heuristic_route(distances, cities_to_visit, start_city, time_limit=1.0, construction='nearest'):
+    '''Good route within time_limit seconds from tsp.heuristic_tour, as a closed list of towns with its length'''
+    tour, length = heuristic_tour(distances.loc[cities_to_visit, cities_to_visit].to_numpy(),
+                                  cities_to_visit.index(start_city), time_limit, construction)
+    return [cities_to_visit[i] for i in tour] + [start_city], length
+
+
+def add_objective_cutoff(solver, bound):
+    '''Row objective <= bound, bound being the cost of a known solution. CBC ignores SetHint, but with this row it
+    prunes every node whose LP bound is above that solution.'''
+    objective = solver.Objective()
+    c = solver.Constraint(-solver.infinity(), bound)
+    for var in solver.variables():
+        coefficient = objective.GetCoefficient(var)
+        if coefficient:
+            c.SetCoefficient(var, coefficient)
+    return c
+
+
+# Number of restricted leg sets solve_tsp_lazy tries when the MIP has no tour before it falls back to every leg
+LAZY_LEG_TRIES = 4
+
+
+def solve_tsp_lazy(distances, cities_to_visit, candidate_legs=5, route=None):
+    '''D) by cutting planes instead of MTZ constraints: subtour elimination cuts are only added for the disconnected
+    groups of towns found in the solutions, until a single tour is left.
+
+    1. The LP relaxation (GLOP) is solved with all legs and cut until it satisfies every subtour elimination
+       constraint. This gives a lower bound and the reduced cost of every leg.
+    2. The MIP (CBC) is solved on the legs with a small reduced cost only, starting from the LP cuts, with more cuts
+       added round by round until the route is a single tour.
+    3. A tour that uses a leg with reduced cost rc costs at least the lower bound + rc, so if a left out leg has a
+       reduced cost below the gap between that tour and the lower bound, step 2 is repeated with those legs added.
+
+    A known route (e.g. from heuristic_route) gives the upper bound of step 3 up front, so one pass of step 2 is
+    enough; its length is also an objective cutoff for the MIP.
+
+    Returns (status, successors, cost, stats) where stats counts the rounds, cuts and legs of the MIP.'''
+    n = len(cities_to_visit)
+    stats = {'lp_rounds': 0, 'mip_rounds': 0, 'cuts': 0, 'legs': 0}
+
+    lp = pywraplp.Solver('TSPRelaxation', pywraplp.Solver.GLOP_LINEAR_PROGRAMMING)
+    lp_pair = build_tsp_model(distances, cities_to_visit, lp, integer=False)
+    status, stats['lp_rounds'], cut_sets = separate_subtours(lp, lp_pair, cities_to_visit, fractional=True)
+    if status != pywraplp.Solver.OPTIMAL:
+        return status, None, None, stats
+    lower_bound = lp.Objective().Value()
+    reduced_cost = np.zeros((n, n))
+    position = {city: i for i, city in enumerate(cities_to_visit)}
+    for (i, j), leg in lp_pair.items():
+        reduced_cost[position[i], position[j]] = leg.reduced_cost()
+    np.fill_diagonal(reduced_cost, np.inf)
+    # Every town keeps at least its candidate_legs cheapest legs in and out
+    keep = np.zeros((n, n), dtype=bool)
+    cheapest = np.argsort(reduced_cost, axis=1)[:, :candidate_legs]
+    keep[np.arange(n)[:, None], cheapest] = True
+    keep |= keep.T
+    # Start above the smallest positive reduced cost, so that doubling always widens the leg set
+    positive = reduced_cost[np.isfinite(reduced_cost) & (reduced_cost > 1e-9)]
+    threshold = max(0.01 * abs(lower_bound), positive.min() if positive.size else 0)
+    if route is not None:
+        route_legs = [(position[i], position[j]) for i, j in zip(route[:-1], route[1:])]
+        keep[tuple(np.transpose(route_legs))] = True
+        route_cost = tsp_route_cost(distances, route)
+        threshold = max(threshold, route_cost - lower_bound)
+
+    tries = 0
+    while True:
+        arcs = np.argwhere((keep | (reduced_cost <= threshold)) & np.isfinite(reduced_cost))
+        solver = pywraplp.Solver('TSPSolver', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+        city_pair = build_tsp_model(distances, cities_to_visit, solver, arcs=arcs.tolist())
+        if route is not None:
+            # The route legs are always kept, so the route stays a solution under the cutoff
+            add_objective_cutoff(solver, route_cost)
+        status, rounds, added = separate_subtours(solver, city_pair, cities_to_visit, cut_sets)
+        stats['mip_rounds'] += rounds
+        stats['legs'] = len(city_pair)
+        cut_sets = cut_sets + added
+        if status == pywraplp.Solver.INFEASIBLE and len(city_pair) < n * (n - 1):
+            # Not enough legs left to build a tour, after LAZY_LEG_TRIES tries every leg is taken
+            tries += 1
+            threshold = threshold * 2 if tries < LAZY_LEG_TRIES else np.inf
+            continue
+        if status != pywraplp.Solver.OPTIMAL:
+            return status, None, None, stats
+        gap = solver.Objective().Value() - lower_bound
+        if len(city_pair) == n * (n - 1) or not (reduced_cost[~keep & (reduced_cost > threshold)] < gap).any():
+            break
+        threshold = gap
+    stats['cuts'] = len(cut_sets)
+    return status, tsp_successors(city_pair), solver.Objective().Value(), stats
+
+
+# CP-SAT status -> pywraplp status, so that every task2 backend reports the same codes
+CP_SAT_STATUS = {
+    cp_model.OPTIMAL: pywraplp.Solver.OPTIMAL,
+    cp_model.FEASIBLE: pywraplp.Solver.FEASIBLE,
+    cp_model.INFEASIBLE: pywraplp.Solver.INFEASIBLE,
+    cp_model.MODEL_INVALID: pywraplp.Solver.MODEL_INVALID,
+    cp_model.UNKNOWN: pywraplp.Solver.NOT_SOLVED,
+}
+
+
+def solve_tsp_cp_sat(distances, cities_to_visit, workers=8, time_limit=60.0, route=None):
+    '''Same tour with CP-SAT: one literal per leg of city_pair and a circuit constraint over them instead of explicit
+    subtour elimination, solved by a portfolio of workers. route is used as a hint.
+
+    Returns (status, successors, cost, stats) like solve_tsp_lazy, with pywraplp status codes. The status is
+    FEASIBLE when time_limit stopped the search before optimality was proven.'''
+    legs = distances.loc[cities_to_visit, cities_to_visit].to_numpy()
+    model = cp_model.CpModel()
+    city_pair = {}
+    arcs = []
+    for i, j in itertools.permutations(range(len(cities_to_visit)), 2):
+        leg = model.NewBoolVar(cities_to_visit[i]+'_'+cities_to_visit[j])
+        city_pair[(cities_to_visit[i], cities_to_visit[j])] = leg
+        arcs.append((i, j, leg))
+    model.AddCircuit(arcs)
+    model.Minimize(cp_model.LinearExpr.WeightedSum([leg for _, _, leg in arcs],
+                                                   [int(legs[i, j]) for i, j, _ in arcs]))
+    if route is not None:
+        on_route = set(zip(route[:-1], route[1:]))
+        for pair, leg in city_pair.items():
+            model.AddHint(leg, pair in on_route)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    status = CP_SAT_STATUS[solver.Solve(model)]
+    stats = {'bound': solver.BestObjectiveBound(), 'wall_time': solver.WallTime(), 'workers': workers}
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return status, None, None, stats
+    successors = {i: j for (i, j), leg in city_pair.items() if solver.BooleanValue(leg)}
+    return status, successors, solver.ObjectiveValue(), stats
+
+
+# Largest number of towns for which method='auto' uses Held-Karp instead of CBC, measured with
+# benchmarks/task2_held_karp.py
+HELD_KARP_LIMIT = 15
+
+
+def solve_tsp_held_karp(distances, cities_to_visit, start_city):
+    '''Optimal tour by the Held-Karp dynamic program of tsp.held_karp_tour, no solver involved. Returns
+    (status, successors, cost, stats) like solve_tsp_lazy; only meant for small instances.'''
+    tour, cost = held_karp_tour(distances.loc[cities_to_visit, cities_to_visit].to_numpy(),
+                                cities_to_visit.index(start_city))
+    route = [cities_to_visit[i] for i in tour] + [start_city]
+    successors = dict(zip(route[:-1], route[1:]))
+    return pywraplp.Solver.OPTIMAL, successors, cost, {'states': (1 << (len(cities_to_visit) - 1)) * (len(cities_to_visit) - 1)}
+
+
+def solve_tsp(distances, cities_to_visit, start_city, method='auto', subtour_elimination='mtz', time_limit=1.0,
+              workers=8, cp_sat_time_limit=60.0):
+    '''Tour of cities_to_visit from start_city by method, as described in task2. Returns (method, status, successors,
+    cost, stats) with method as resolved from 'auto' and a pywraplp status code. The route of method='heuristic' is
+    FEASIBLE.'''
+    if method == 'auto':
+        if len(cities_to_visit) <= HELD_KARP_LIMIT:
+            method = 'held-karp'
+        else:
+            method, subtour_elimination = 'cbc', 'lazy'
+    if method == 'held-karp':
+        return (method,) + solve_tsp_held_karp(distances, cities_to_visit, start_city)
+
+    route, cost = heuristic_route(distances, cities_to_visit, start_city, time_limit)
+    if method == 'heuristic':
+        return method, pywraplp.Solver.FEASIBLE, dict(zip(route[:-1], route[1:])), cost, {}
+    if method == 'cp-sat':
+        return (method,) + solve_tsp_cp_sat(distances, cities_to_visit, workers, cp_sat_time_limit, route=route)
+    if subtour_elimination == 'lazy':
+        return (method,) + solve_tsp_lazy(distances, cities_to_visit, route=route)
 
-    # B) Define and implement the constraints that ensure that the delivery driver arrives in each of the towns that need to be visited
-    for i in range(len(cities_to_visit)):
-        solver.Add(sum([city_pair[(cities_to_visit[i], cities_to_visit[j])] for j in range(len(cities_to_visit)) if i != j]) == 1)
+    solver = pywraplp.Solver('TSPSolver', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    city_pair = build_tsp_model(distances, cities_to_visit, solver)
+    add_mtz_constraints(solver, city_pair, cities_to_visit)
+    add_objective_cutoff(solver, cost)
+    status = solver.Solve()
+    if status != pywraplp.Solver.OPTIMAL:
+        return method, status, None, None, {}
+    return method, status, tsp_successors(city_pair), solver.Objective().Value(), {}
 
-    # C) Define and implement the constraints that ensure that the driver departs each of the towns that need to be visited
-    for j in range(len(cities_to_visit)):
-        solver.Add(sum([city_pair[(cities_to_visit[i], cities_to_visit[j])] for i in range(len(cities_to_visit)) if j != i]) == 1)
 
-    # D) Define and implement the constraints that ensure that there are no disconnected self-contained circles in the route
-    for i in range(1, len(cities_to_visit)):
-        for j in range(1, len(cities_to_visit)):
-            if i == j:
-                continue
-            solver.Add(((city_variable[cities_to_visit[i]] - city_variable[cities_to_visit[j]]) + (len(cities_to_visit)*city_pair[(cities_to_visit[i], cities_to_visit[j])])) <= (len(cities_to_visit) - 1))
+def task2(subtour_elimination='mtz', method='auto', time_limit=1.0, workers=8, cp_sat_time_limit=60.0):
+    '''method is 'held-karp' for the dynamic program of solve_tsp_held_karp, 'cbc' for the exact MIP, 'cp-sat' for
+    the circuit model of solve_tsp_cp_sat with workers search workers for at most cp_sat_time_limit seconds, or
+    'heuristic' for the route of heuristic_route within time_limit seconds. That route is also the hint of cp-sat
+    and its length the objective cutoff of cbc. subtour_elimination is 'mtz' for the compact MTZ formulation or
+    'lazy' to add subtour cuts on demand (cbc only). 'auto' picks held-karp up to HELD_KARP_LIMIT towns and cbc with
+    lazy subtour cuts above.'''
+    distances = load_distances()
 
-    for j in range(1, len(cities_to_visit)):
-        for i in range(1, len(cities_to_visit)):
-            if i == j:
-                continue
-            solver.Add(((city_variable[cities_to_visit[i]] - city_variable[cities_to_visit[j]]) + (len(cities_to_visit)*city_pair[(cities_to_visit[i], cities_to_visit[j])])) <= (len(cities_to_visit) - 1))
+    start_city = 'Cork'
+    end_city = start_city
+    cities_to_visit = ['Cork', 'Athlone', 'Belfast', 'Dublin', 'Galway', 'Limerick', 'Rosslare', 'Waterford', 'Wexford', 'Wicklow']
 
     # Define and solve the objective
-    cost = solver.Objective()
-    for i in range(len(cities_to_visit)):
-        for j in range(len(cities_to_visit)):
-            if i == j:
-                continue
-            cost.SetCoefficient(city_pair[cities_to_visit[i], cities_to_visit[j]],
-                                int(sum([distances.loc[cities_to_visit[i], cities_to_visit[j]]])))
-
-    cost.SetMinimization()
-    status = solver.Solve()
+    method, status, successors, cost, stats = solve_tsp(distances, cities_to_visit, start_city, method,
+                                                        subtour_elimination, time_limit, workers, cp_sat_time_limit)
+    if method == 'heuristic':
+        print("Heuristic route found")
+        print("Total cost: ", cost, "\n")
+        print("Route: ", " -> ".join(tsp_route(successors, start_city)))
+        return
+    if method == 'held-karp':
+        print("Held-Karp: {} subset states".format(stats['states']))
+    elif method == 'cp-sat':
+        print("CP-SAT: {} workers, {:.2f} s, bound {}".format(stats['workers'], stats['wall_time'], stats['bound']))
+    elif 'lp_rounds' in stats:
+        print("Subtour elimination: {} LP rounds, {} MIP rounds, {} cuts, {} legs in the MIP".format(
+            stats['lp_rounds'], stats['mip_rounds'], stats['cuts'], stats['legs']))
 
     print(status)
-    if status == solver.OPTIMAL:
+    if status == pywraplp.Solver.OPTIMAL:
         print("Optimal solution found")
-        print("Total cost: ", solver.Objective().Value(), "\n")
-
-    if status != solver.OPTIMAL:
+        print("Total cost: ", cost, "\n")
+        print("Route: ", " -> ".join(tsp_route(successors, start_city)))
+    elif status == pywraplp.Solver.FEASIBLE:
+        print("Time limit reached, best solution found")
+        print("Total cost: ", cost, "\n")
+        print("Route: ", " -> ".join(tsp_route(successors, start_city)))
+
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
         print("Failed to find solution")
 
 
-def task3():
-    task3_df = pd.read_excel("../Assignment_DA_2_Task_3_data.xlsx", sheet_name=None)
-    flight_schedule = task3_df['Flight schedule']
-    taxi_distances = task3_df['Taxi distances']
+AIRPORT_SHEETS = {'Flight schedule': 'flights', 'Taxi distances': 'runway', 'Terminal capacity': 'terminal'}
+
+
+def load_airport_data(path="../Assignment_DA_2_Task_3_data.xlsx"):
+    task3_df = read_workbook(path)
+    for sheet, index_column in AIRPORT_SHEETS.items():
+        task3_df[sheet].rename(columns={"Unnamed: 0": index_column}, inplace=True)
+        task3_df[sheet].set_index(index_column, inplace=True)
+    return task3_df
+
+
+def airport_time_index(flight_schedule):
+    '''Sweep over the arrival and departure events of the schedule, sorted by time.
+
+    Returns (slots, runway_slots, ground_sets):
+    slots: the distinct arrival and departure times, sorted
+    runway_slots: (time, arriving flights, departing flights) for the slots with more than one movement, a single
+    movement can never use a runway twice
+    ground_sets: (time, flights on the ground) for the slots where the set of flights on the ground is maximal, that
+    is after a run of arrivals and before the next departure. At every other slot the flights on the ground are a
+    subset of one of these sets, so their capacity rows would be implied.'''
+    arrivals, departures = {}, {}
+    departure_of = dict(zip(flight_schedule.index, flight_schedule['Departure']))
+    for flight, arrival, departure in zip(flight_schedule.index, flight_schedule['Arrival'], flight_schedule['Departure']):
+        arrivals.setdefault(arrival, []).append(flight)
+        departures.setdefault(departure, []).append(flight)
+    slots = sorted(set(arrivals) | set(departures))
+    runway_slots = [(time, arrivals.get(time, []), departures.get(time, [])) for time in slots
+                    if len(arrivals.get(time, [])) + len(departures.get(time, [])) > 1]
+
+    # A flight is on the ground from its arrival up to, not including, its departure
+    ground_sets = []
+    on_ground = {}
+    grown = False
+    previous = None
+    for time in slots:
+        if time in departures and grown:
+            ground_sets.append((previous, list(on_ground)))
+            grown = False
+        for flight in departures.get(time, []):
+            on_ground.pop(flight, None)
+        for flight in arrivals.get(time, []):
+            if departure_of[flight] > time:
+                on_ground[flight] = True
+                grown = True
+        previous = time
+    if grown and on_ground:
+        ground_sets.append((previous, list(on_ground)))
+    return slots, runway_slots, ground_sets
+
+
+def model_size(solver):
+    '''(variables, constraints, nonzeros) of a pywraplp model, nonzeros counting the constraint coefficients'''
+    proto = linear_solver_pb2.MPModelProto()
+    solver.ExportModelToProto(proto)
+    return solver.NumVariables(), solver.NumConstraints(), sum(len(c.var_index) for c in proto.constraint)
+
+
+def add_airport_capacity_rows(task3_df, solver, arrival_legs, departure_legs, terminal_allocation):
+    '''Constraints I and J over the slots of airport_time_index. arrival_legs[(flight, runway)] and
+    departure_legs[(flight, runway)] list the variables that add up to the flight using that runway. Returns the rows
+    as {(runway or terminal, time): constraint}.'''
     terminal_capacity = task3_df['Terminal capacity']
+    _, runway_slots, ground_sets = airport_time_index(task3_df['Flight schedule'])
+    rows = {}
 
-    flight_schedule.rename(columns={"Unnamed: 0": "flights"}, inplace=True)
-    taxi_distances.rename(columns={"Unnamed: 0": "runway"}, inplace=True)
-    terminal_capacity.rename(columns={"Unnamed: 0": "terminal"}, inplace=True)
-
-    flight_schedule.set_index('flights', inplace=True)
-    taxi_distances.set_index('runway', inplace=True)
-    terminal_capacity.set_index('terminal', inplace=True)
-
-    print("Flight schedule: \n")
-    print(flight_schedule)
-    print("\ntaxi distances: \n")
-    print("\n", taxi_distances)
-    print("\nterminal capacity: \n")
-    print("\n", terminal_capacity)
+    # I) Define and implement the constraints that ensure that no runway is used by more than one flight during each timeslot
+    for runway in task3_df['Taxi distances'].index:
+        for time, arriving, departing in runway_slots:
+            c = rows[(runway, time)] = solver.Constraint(0, 1)
+            for flight in arriving:
+                for var in arrival_legs[(flight, runway)]:
+                    c.SetCoefficient(var, 1)
+            for flight in departing:
+                for var in departure_legs[(flight, runway)]:
+                    c.SetCoefficient(var, 1)
 
+    # J) Define and implement the constraints that ensure that the terminal capacities are not exceeded
+    # One row per terminal for every maximal set of flights on the ground at the same time
+    for terminal in terminal_capacity.index:
+        gates = int(terminal_capacity.loc[terminal, 'Gates'])
+        for time, on_ground in ground_sets:
+            c = rows[(terminal, time)] = solver.Constraint(0, gates)
+            for flight in on_ground:
+                c.SetCoefficient(terminal_allocation[(flight, terminal)], 1)
+    return rows
+
+
+def build_airport_model(task3_df, solver):
+    '''Variables, constraints B to J and objective K of task3. Returns a dict with the arrival, departure and terminal
+    allocation variables and the runway_to_terminal and terminal_to_runway taxi movements.'''
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    terminal_capacity = task3_df['Terminal capacity']
     flights = list(flight_schedule.index)
     terminals = list(terminal_capacity.index)
     runways = list(taxi_distances.index)
 
-    arrival_times = list(set(flight_schedule['Arrival']))
-    departure_times = list(set(flight_schedule['Departure']))
-
-    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
-
     # B) Identify and create the decision variables for the arrival runway allocation, departure allocation and terminal allocation
     arrival_runway_allocation_dec_var = {}
     departure_runway_allocation_dec_var = {}
@@ -360,10 +973,6 @@ def task3():
         for terminal in terminals:
             terminal_allocation_dec_var[(flight, terminal)] = solver.IntVar(0, 1, flight+"_"+terminal)
 
-    print("\nno of arr run alloc dec vars: ", len(arrival_runway_allocation_dec_var))
-    print("no of dep run alloc dec vars: ", len(departure_runway_allocation_dec_var))
-    print("no of term alloc dec vars: ", len(terminal_allocation_dec_var))
-
     # C) Define and create auxiliary variables for the taxi movements between runways and terminals for each flight
     runway_to_terminal = {}
     terminal_to_runway = {}
@@ -415,86 +1024,198 @@ def task3():
         # H) Define and implement the constraints the ensure that each flight is allocated to exactly one terminal
         solver.Add(sum(terminal_allocation_dec_var[(flight, terminal)] for terminal in terminals) == 1)
 
-    # I) Define and implement the constraints that ensure that no runway is used by more than one flight during each timeslot
-    time_slots = arrival_times + departure_times
-    for runway in runways:
-        for time in time_slots:
-            c = solver.Constraint(0, 1)
-            for flight in flights:
-                if time == flight_schedule.loc[flight, 'Arrival']:
-                    c.SetCoefficient(arrival_runway_allocation_dec_var[(flight, runway)], 1)
-                    c.SetCoefficient(departure_runway_allocation_dec_var[(flight, runway)], 0)
-                elif time == flight_schedule.loc[flight, 'Departure']:
-                    c.SetCoefficient(arrival_runway_allocation_dec_var[(flight, runway)], 0)
-                    c.SetCoefficient(departure_runway_allocation_dec_var[(flight, runway)], 1)
+    add_airport_capacity_rows(task3_df, solver,
+                              {key: [var] for key, var in arrival_runway_allocation_dec_var.items()},
+                              {key: [var] for key, var in departure_runway_allocation_dec_var.items()},
+                              terminal_allocation_dec_var)
 
-    # J) Define and implement the constraints that ensure that the terminal capacities are not exceeded
-        # We have to ensure that for each terminal at any given point of time, only those many number of flights are allotted as much as its capacity
-    for terminal in terminals:
-        for time in time_slots:
-            c = solver.Constraint(0, int(terminal_capacity.loc[terminal, 'Gates']))
-            for flight in flights:
-                # if flight has already arrived and if there is still time for flight to depart, then we have to allot a terminal to it
-                if flight_schedule.loc[flight, 'Arrival'] <= time < flight_schedule.loc[flight, 'Departure']:
-                    c.SetCoefficient(terminal_allocation_dec_var[(flight, terminal)], 1)
-                else:
-                    c.SetCoefficient(terminal_allocation_dec_var[(flight, terminal)], 0)
-
-    # K) Define and implement the objective function, Solve the linear program and determine the optimal total taxi distances for all flights
+    # K) Define and implement the objective function
+    taxi = {(runway, terminal): int(taxi_distances.loc[runway, terminal]) for runway in runways for terminal in terminals}
     distance = solver.Objective()
     for flight in flights:
         for runway in runways:
             for terminal in terminals:
-                distance.SetCoefficient(runway_to_terminal[(flight, runway, terminal)], int(taxi_distances.loc[runway, terminal]))
-                distance.SetCoefficient(terminal_to_runway[(flight, terminal, runway)], int(taxi_distances.loc[runway, terminal]))
-
+                distance.SetCoefficient(runway_to_terminal[(flight, runway, terminal)], taxi[(runway, terminal)])
+                distance.SetCoefficient(terminal_to_runway[(flight, terminal, runway)], taxi[(runway, terminal)])
     distance.SetMinimization()
-    status = solver.Solve()
 
-    if status == pywraplp.Solver.OPTIMAL:
-        print("\nOptimal solution found and objective value (total taxi distance for all flights) = ", solver.Objective().Value())
-    else:
-        print("Failed to find the solution")
-        exit()
+    return {'arrival': arrival_runway_allocation_dec_var, 'departure': departure_runway_allocation_dec_var,
+            'terminal': terminal_allocation_dec_var, 'runway_to_terminal': runway_to_terminal,
+            'terminal_to_runway': terminal_to_runway}
+
+
+def airport_candidate_runways(task3_df):
+    '''Runways worth a taxi leg, as {flight: (arrival runways, departure runways)} with a list of runways per
+    terminal.
+
+    When k movements share a slot, the other k - 1 hold at most k - 1 runways, so one of the k runways closest to a
+    terminal is always free at that slot. A flight on any other runway can move onto it without taxiing further, hence
+    only those k runways need a leg, and a movement alone in its slot only needs the closest one.'''
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    runways = list(taxi_distances.index)
+    movements = {}
+    for time in itertools.chain(flight_schedule['Arrival'], flight_schedule['Departure']):
+        movements[time] = movements.get(time, 0) + 1
+    # Stable sort, ties keep the runway order of the sheet
+    closest = {terminal: sorted(runways, key=lambda runway: taxi_distances.loc[runway, terminal])
+               for terminal in task3_df['Terminal capacity'].index}
+    return {flight: ({terminal: order[:movements[arrival]] for terminal, order in closest.items()},
+                     {terminal: order[:movements[departure]] for terminal, order in closest.items()})
+            for flight, arrival, departure in zip(flight_schedule.index, flight_schedule['Arrival'],
+                                                  flight_schedule['Departure'])}
+
+
+def add_compact_airport_flight(solver, task3_df, model, flight, arrival_runways=None, departure_runways=None):
+    '''Legs, terminal allocation and per flight rows of one flight of build_compact_airport_model, added to model.
+    arrival_runways and departure_runways map every terminal to the runways that get a leg, all of them by default.'''
+    taxi_distances = task3_df['Taxi distances']
+    terminals = list(task3_df['Terminal capacity'].index)
+    runways = list(taxi_distances.index)
+    runway_to_terminal = model['runway_to_terminal']
+    terminal_to_runway = model['terminal_to_runway']
+    terminal_allocation = model['terminal']
+    distance = solver.Objective()
+
+    legs = []
+    arrival_legs = {runway: [] for runway in runways}
+    departure_legs = {runway: [] for runway in runways}
+    for terminal in terminals:
+        # Integral whenever the legs are, so it does not need to be an integer variable
+        terminal_allocation[(flight, terminal)] = solver.NumVar(0, 1, flight+"_"+terminal)
+        arriving = solver.Constraint(0, 0)
+        departing = solver.Constraint(0, 0)
+        arriving.SetCoefficient(terminal_allocation[(flight, terminal)], -1)
+        departing.SetCoefficient(terminal_allocation[(flight, terminal)], -1)
+        for runway in (runways if arrival_runways is None else arrival_runways[terminal]):
+            leg = solver.IntVar(0, 1, flight+"_"+runway+"_to_"+terminal)
+            runway_to_terminal[(flight, runway, terminal)] = leg
+            arriving.SetCoefficient(leg, 1)
+            distance.SetCoefficient(leg, int(taxi_distances.loc[runway, terminal]))
+            arrival_legs[runway].append(leg)
+        for runway in (runways if departure_runways is None else departure_runways[terminal]):
+            leg = solver.IntVar(0, 1, flight+"_"+terminal+"_to_"+runway)
+            terminal_to_runway[(flight, terminal, runway)] = leg
+            departing.SetCoefficient(leg, 1)
+            distance.SetCoefficient(leg, int(taxi_distances.loc[runway, terminal]))
+            departure_legs[runway].append(leg)
+        legs.append(terminal_allocation[(flight, terminal)])
+    # Exactly one terminal, hence exactly one leg in and one leg out
+    model['flight_constraints'][flight] = solver.Add(solver.Sum(legs) == 1)
+
+    for runway in runways:
+        model['arrival'][(flight, runway)] = solver.Sum(arrival_legs[runway])
+        model['departure'][(flight, runway)] = solver.Sum(departure_legs[runway])
+    return arrival_legs, departure_legs
+
+
+def build_compact_airport_model(task3_df, solver, prune=True, fixed=None):
+    '''Smaller model with the same optimum as build_airport_model. A flight only gets its two taxi legs,
+    runway_to_terminal[(flight, runway, terminal)] after landing and terminal_to_runway[(flight, terminal, runway)]
+    before take off, which carry the taxi distances directly. The runway allocations are sums of legs and the
+    terminal allocation is a continuous variable tied to both legs, so blocks B and D to H collapse into one row per
+    flight and two rows per flight and terminal.
+
+    With prune=True the legs are only created for the runways of airport_candidate_runways. fixed maps flights to an
+    allocation as in airport_allocation that they have to keep, those flights only get the legs of that allocation.
+    Returns the same dict as build_airport_model, with linear expressions for the arrival and departure allocations,
+    plus the flight_constraints and capacity_constraints rows.'''
+    flight_schedule = task3_df['Flight schedule']
+    terminals = list(task3_df['Terminal capacity'].index)
+    candidates = airport_candidate_runways(task3_df) if prune else {}
+    fixed = fixed or {}
+
+    model = {'arrival': {}, 'departure': {}, 'terminal': {}, 'runway_to_terminal': {}, 'terminal_to_runway': {},
+             'flight_constraints': {}}
+    arrival_legs, departure_legs = {}, {}
+    for flight in flight_schedule.index:
+        if flight in fixed:
+            arrival_runway, allotted, departure_runway = fixed[flight]
+            runways = ({terminal: [arrival_runway] if terminal == allotted else [] for terminal in terminals},
+                       {terminal: [departure_runway] if terminal == allotted else [] for terminal in terminals})
+        else:
+            runways = candidates.get(flight, (None, None))
+        arriving, departing = add_compact_airport_flight(solver, task3_df, model, flight, *runways)
+        arrival_legs.update(((flight, runway), legs) for runway, legs in arriving.items())
+        departure_legs.update(((flight, runway), legs) for runway, legs in departing.items())
+    solver.Objective().SetMinimization()
+
+    model['capacity_constraints'] = add_airport_capacity_rows(task3_df, solver, arrival_legs, departure_legs,
+                                                              model['terminal'])
+    return model
+
+
+def airport_allocation(task3_df, model):
+    '''Solved model (either formulation) as {flight: (arrival runway, terminal, departure runway)}'''
+    runways = list(task3_df['Taxi distances'].index)
+    terminals = list(task3_df['Terminal capacity'].index)
+    allocation = {}
+    for flight in task3_df['Flight schedule'].index:
+        arrival = [runway for runway in runways if model['arrival'][(flight, runway)].solution_value() > 0.5][0]
+        terminal = [terminal for terminal in terminals if model['terminal'][(flight, terminal)].solution_value() > 0.5][0]
+        departure = [runway for runway in runways if model['departure'][(flight, runway)].solution_value() > 0.5][0]
+        allocation[flight] = (arrival, terminal, departure)
+    return allocation
+
+
+def airport_taxi_distance(task3_df, allocation):
+    taxi = task3_df['Taxi distances'].astype(int).to_dict()     # {terminal: {runway: distance}}
+    return sum(taxi[terminal][arrival] + taxi[terminal][departure] for arrival, terminal, departure in allocation.values())
+
+
+def airport_conflicts(task3_df, allocation):
+    '''Runway and gate violations of an allocation, as a list of (time, runway or terminal, flights involved)'''
+    gates = task3_df['Terminal capacity']['Gates'].to_dict()
+    _, runway_slots, ground_sets = airport_time_index(task3_df['Flight schedule'])
+    conflicts = []
+    for time, arriving, departing in runway_slots:
+        used = [(allocation[flight][0], flight) for flight in arriving] + [(allocation[flight][2], flight)
+                                                                          for flight in departing]
+        for runway in set(runway for runway, _ in used):
+            flights = [flight for used_runway, flight in used if used_runway == runway]
+            if len(flights) > 1:
+                conflicts.append((time, runway, flights))
+    for time, on_ground in ground_sets:
+        for terminal in gates:
+            flights = [flight for flight in on_ground if allocation[flight][1] == terminal]
+            if len(flights) > gates[terminal]:
+                conflicts.append((time, terminal, flights))
+    return conflicts
+
+
+def print_airport_allocation(task3_df, allocation, time_slots):
+    '''Reports L and M of task3 for an allocation from airport_allocation'''
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    terminals = list(task3_df['Terminal capacity'].index)
 
     # L) Determine arrival runway allocation for each flight
     print("\nArrival Runway allocations: ")
     print("***********************************************\n")
-    for key in arrival_runway_allocation_dec_var.keys():
-        if arrival_runway_allocation_dec_var[key].solution_value() > 0:
-            print(key[0], "is permitted to land on : ", key[1])
+    for flight, (arrival, terminal, departure) in allocation.items():
+        print(flight, "is permitted to land on : ", arrival)
 
     # L) Determine departure runway allocation for each flight
     print("\nDeparture Runway allocations: ")
     print("***********************************************\n")
-    for key in departure_runway_allocation_dec_var.keys():
-        if departure_runway_allocation_dec_var[key].solution_value() > 0:
-            print(key[0], "takes off from : ", key[1])
+    for flight, (arrival, terminal, departure) in allocation.items():
+        print(flight, "takes off from : ", departure)
 
     # L) Determine terminal allocation for each flight
     print("\nTerminal allocations: ")
     print("***********************************************\n")
-    for key in terminal_allocation_dec_var.keys():
-        if terminal_allocation_dec_var[key].solution_value() > 0:
-            print(key[1], "has been allotted to : ", key[0])
+    for flight, (arrival, terminal, departure) in allocation.items():
+        print(terminal, "has been allotted to : ", flight)
 
     # L) Determine taxi distance for each flight
     print("\nTaxi distances for each flight: ")
     print("***********************************************\n")
-    tot_taxi_distance = 0       # This should match the value of solver objective
-    for flight in flights:
-        taxi_distance = 0
+    tot_taxi_distance = 0
+    for flight, (arrival, terminal, departure) in allocation.items():
         print("Total Taxi distance for ", flight, "is = ", end='\t')
-        for runway in runways:
-            for terminal in terminals:
-                if runway_to_terminal[(flight, runway, terminal)].solution_value() > 0:
-                    taxi_distance += taxi_distances.loc[runway, terminal]
-                if terminal_to_runway[(flight, terminal, runway)].solution_value() > 0:
-                    taxi_distance += taxi_distances.loc[runway, terminal]
+        taxi_distance = taxi_distances.loc[arrival, terminal] + taxi_distances.loc[departure, terminal]
         print(taxi_distance)
         tot_taxi_distance += taxi_distance
-
-    assert tot_taxi_distance == solver.Objective().Value()
     print("\nTotal taxi distance for all flights: ", tot_taxi_distance)
 
     # M) Determine for each time of the day how many gates are occupied at each terminal
@@ -505,11 +1226,550 @@ def task3():
         for terminal in terminals:
             print("\t", terminal, "has ", end='\t')
             no_of_occupied_gates = 0
-            for flight in flights:
-                if terminal_allocation_dec_var[(flight, terminal)].solution_value() > 0:
+            for flight, (_, allotted, _) in allocation.items():
+                if allotted == terminal:
                     if flight_schedule.loc[flight, 'Arrival'] <= time < flight_schedule.loc[flight, 'Departure']:
                         no_of_occupied_gates += 1
             print(no_of_occupied_gates, "occupied")
+    return tot_taxi_distance
+
+
+def greedy_airport_allocation(task3_df):
+    '''Constructive allocation in arrival order. Each flight takes the terminal with a free gate and the free arrival
+    and departure runways with the lowest taxi distance, gates being released from a heap ordered by departure.
+    Returns an allocation as in airport_allocation, or None if some flight finds no free gate or runway.'''
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    terminal_capacity = task3_df['Terminal capacity']
+    runways = list(taxi_distances.index)
+    terminals = list(terminal_capacity.index)
+    taxi = {(runway, terminal): int(taxi_distances.loc[runway, terminal]) for runway in runways for terminal in terminals}
+    free_gates = {terminal: int(terminal_capacity.loc[terminal, 'Gates']) for terminal in terminals}
+    runways_used = {}           # time -> runways already taken by a landing or take off
+    leaving = []                # (departure, order, terminal) of the flights at a gate
+    allocation = {}
+
+    order = sorted(range(len(flight_schedule)), key=lambda i: (flight_schedule['Arrival'].iloc[i],
+                                                               flight_schedule['Departure'].iloc[i]))
+    for i in order:
+        flight = flight_schedule.index[i]
+        arrival, departure = flight_schedule['Arrival'].iloc[i], flight_schedule['Departure'].iloc[i]
+        while leaving and leaving[0][0] <= arrival:
+            free_gates[heapq.heappop(leaving)[2]] += 1
+        landing = [runway for runway in runways if runway not in runways_used.get(arrival, ())]
+        take_off = [runway for runway in runways if runway not in runways_used.get(departure, ())]
+        best = None
+        for terminal in terminals:
+            if free_gates[terminal] == 0 or not landing or not take_off:
+                continue
+            arrival_runway = min(landing, key=lambda runway: taxi[(runway, terminal)])
+            departure_runway = min(take_off, key=lambda runway: taxi[(runway, terminal)])
+            distance = taxi[(arrival_runway, terminal)] + taxi[(departure_runway, terminal)]
+            if best is None or distance < best[0]:
+                best = (distance, arrival_runway, terminal, departure_runway)
+        if best is None:
+            return None
+        _, arrival_runway, terminal, departure_runway = best
+        allocation[flight] = (arrival_runway, terminal, departure_runway)
+        free_gates[terminal] -= 1
+        heapq.heappush(leaving, (departure, i, terminal))
+        runways_used.setdefault(arrival, set()).add(arrival_runway)
+        runways_used.setdefault(departure, set()).add(departure_runway)
+    return {flight: allocation[flight] for flight in flight_schedule.index}
+
+
+def _minutes(time):
+    return time.hour * 60 + time.minute + time.second / 60
+
+
+def _solve_airport_window(window_df, fixed, time_limit):
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    if time_limit is not None:
+        solver.SetTimeLimit(int(time_limit * 1000))
+    model = build_compact_airport_model(window_df, solver, fixed=fixed)
+    status = solver.Solve()
+    # The solver goes with the model, its variables are only valid as long as it is alive
+    return status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE), solver, model
+
+
+def solve_airport_rolling_horizon(task3_df, window=180, step=120, time_limit=None):
+    '''Allocates the day in overlapping windows of window minutes, moving step minutes at a time.
+
+    Each window solves the compact model for the flights arriving in it that are not committed yet. Committed flights
+    that are still on the ground or have not taken off at the start of the window are kept in the model with their
+    legs fixed, so they hold their gate and runway slot. Flights arriving in the first step minutes are then
+    committed. Models only ever hold one window, so memory does not grow with the length of the day.
+
+    When a window has no solution with the carried flights fixed, for instance because time_limit stopped CBC before
+    it found one, it is solved again with those flights free. The committed flights they share the ground or a
+    runway slot with stay fixed. If that fails as well a ValueError names the window.
+
+    Returns (allocation, distance, stats), allocation as in airport_allocation. stats has the number of windows, the
+    largest window in flights and the number of windows that had to free committed flights.'''
+    flight_schedule = task3_df['Flight schedule']
+    arrival = {flight: _minutes(time) for flight, time in flight_schedule['Arrival'].items()}
+    departure = {flight: _minutes(time) for flight, time in flight_schedule['Departure'].items()}
+    pending = sorted(flight_schedule.index, key=lambda flight: arrival[flight])
+    committed = {}
+    stats = {'windows': 0, 'largest_window': 0, 'freed_windows': 0}
+
+    start = arrival[pending[0]] if pending else 0
+    while pending:
+        # Skip over hours without arrivals
+        start = max(start, arrival[pending[0]])
+        free = [flight for flight in pending if arrival[flight] < start + window]
+        carried = [flight for flight in committed if departure[flight] >= start]
+        window_df = dict(task3_df)
+        window_df['Flight schedule'] = flight_schedule.loc[carried + free]
+        solved, solver, model = _solve_airport_window(window_df, {flight: committed[flight] for flight in carried},
+                                                      time_limit)
+        stats['windows'] += 1
+        stats['largest_window'] = max(stats['largest_window'], len(carried) + len(free))
+
+        if not solved and carried:
+            # Free the carried flights. Any flight they can clash with is on the ground or moving at some point
+            # after the earliest carried arrival, so fixing those keeps the rest of the committed day valid.
+            earliest = min(arrival[flight] for flight in carried)
+            neighbours = [flight for flight in committed if flight not in carried and departure[flight] >= earliest]
+            free = carried + free
+            window_df['Flight schedule'] = flight_schedule.loc[neighbours + free]
+            solved, solver, model = _solve_airport_window(
+                window_df, {flight: committed[flight] for flight in neighbours}, time_limit)
+            stats['freed_windows'] += 1
+            stats['largest_window'] = max(stats['largest_window'], len(neighbours) + len(free))
+        if not solved:
+            raise ValueError("No allocation for the window of {} flights starting at {:02d}:{:02d}".format(
+                len(free), int(start) // 60, int(start) % 60))
+
+        # The last window commits everything that is left
+        window_allocation = airport_allocation(window_df, model)
+        last = all(flight in free for flight in pending)
+        for flight in free:
+            if flight in committed or last or arrival[flight] < start + step:
+                committed[flight] = window_allocation[flight]
+        pending = [flight for flight in pending if flight not in committed]
+        start += step
+
+    allocation = {flight: committed[flight] for flight in flight_schedule.index}
+    return allocation, airport_taxi_distance(task3_df, allocation), stats
+
+
+def solve_airport_cp_sat(task3_df, workers=8, time_limit=60.0, hint=None):
+    '''task3 as interval scheduling for CP-SAT, on the time slots of airport_time_index.
+
+    Every flight has one optional interval per terminal from its arrival slot up to its departure slot, and the
+    intervals of a terminal share its gates through a cumulative constraint. Landings and take offs are one slot
+    optional intervals per runway under a no overlap constraint, so two movements only compete for a runway when they
+    happen at the same time, as in the MIP. Flights departing before they arrive, i.e. the next day, are rejected with
+    a ValueError. The taxi legs are literals per (runway, terminal) pair as in
+    build_compact_airport_model, tied to the runway and terminal choices. hint is an allocation to start from.
+
+    Returns (status, allocation, distance, stats) with a pywraplp status code and allocation as in
+    airport_allocation. The status is FEASIBLE when time_limit stopped the search before optimality was proven.'''
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    terminal_capacity = task3_df['Terminal capacity']
+    runways = list(taxi_distances.index)
+    terminals = list(terminal_capacity.index)
+    overnight = list(flight_schedule.index[flight_schedule['Departure'] < flight_schedule['Arrival']])
+    if overnight:
+        raise ValueError("Flights departing after midnight can not be allocated: {}".format(", ".join(overnight)))
+    slots, _, _ = airport_time_index(flight_schedule)
+    slot_of = {time: slot for slot, time in enumerate(slots)}
+
+    model = cp_model.CpModel()
+    runway_to_terminal = {}
+    terminal_to_runway = {}
+    terminal_allocation = {}
+    gate_intervals = {terminal: [] for terminal in terminals}
+    runway_intervals = {runway: [] for runway in runways}
+    legs, costs = [], []
+    for flight, arrival, departure in zip(flight_schedule.index, flight_schedule['Arrival'], flight_schedule['Departure']):
+        arrival, departure = slot_of[arrival], slot_of[departure]
+        for terminal in terminals:
+            allotted = model.NewBoolVar(flight+"_"+terminal)
+            terminal_allocation[(flight, terminal)] = allotted
+            gate_intervals[terminal].append(model.NewOptionalFixedSizeIntervalVar(
+                arrival, departure - arrival, allotted, flight+"_at_"+terminal))
+            for runway in runways:
+                runway_to_terminal[(flight, runway, terminal)] = model.NewBoolVar(flight+"_"+runway+"_to_"+terminal)
+                terminal_to_runway[(flight, terminal, runway)] = model.NewBoolVar(flight+"_"+terminal+"_to_"+runway)
+                legs += [runway_to_terminal[(flight, runway, terminal)], terminal_to_runway[(flight, terminal, runway)]]
+                costs += [int(taxi_distances.loc[runway, terminal])] * 2
+            model.Add(sum(runway_to_terminal[(flight, runway, terminal)] for runway in runways) == allotted)
+            model.Add(sum(terminal_to_runway[(flight, terminal, runway)] for runway in runways) == allotted)
+        model.AddExactlyOne(terminal_allocation[(flight, terminal)] for terminal in terminals)
+
+        for runway in runways:
+            lands = model.NewBoolVar("arr_"+flight+"_"+runway)
+            takes_off = model.NewBoolVar("dep_"+flight+"_"+runway)
+            model.Add(sum(runway_to_terminal[(flight, runway, terminal)] for terminal in terminals) == lands)
+            model.Add(sum(terminal_to_runway[(flight, terminal, runway)] for terminal in terminals) == takes_off)
+            runway_intervals[runway].append(model.NewOptionalFixedSizeIntervalVar(arrival, 1, lands,
+                                                                                 "land_"+flight+"_"+runway))
+            runway_intervals[runway].append(model.NewOptionalFixedSizeIntervalVar(departure, 1, takes_off,
+                                                                                 "take_off_"+flight+"_"+runway))
+
+    for terminal in terminals:
+        model.AddCumulative(gate_intervals[terminal], [1] * len(gate_intervals[terminal]),
+                            int(terminal_capacity.loc[terminal, 'Gates']))
+    for runway in runways:
+        model.AddNoOverlap(runway_intervals[runway])
+    model.Minimize(cp_model.LinearExpr.WeightedSum(legs, costs))
+
+    if hint is not None:
+        for (flight, runway, terminal), leg in runway_to_terminal.items():
+            model.AddHint(leg, hint[flight][:2] == (runway, terminal))
+        for (flight, terminal, runway), leg in terminal_to_runway.items():
+            model.AddHint(leg, hint[flight][1:] == (terminal, runway))
+        for (flight, terminal), allotted in terminal_allocation.items():
+            model.AddHint(allotted, hint[flight][1] == terminal)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    status = CP_SAT_STATUS[solver.Solve(model)]
+    stats = {'bound': solver.BestObjectiveBound(), 'wall_time': solver.WallTime(), 'workers': workers}
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return status, None, None, stats
+
+    allocation = {}
+    for flight in flight_schedule.index:
+        allotted = [terminal for terminal in terminals if solver.BooleanValue(terminal_allocation[(flight, terminal)])][0]
+        arrival = [runway for runway in runways if solver.BooleanValue(runway_to_terminal[(flight, runway, allotted)])][0]
+        departure = [runway for runway in runways if solver.BooleanValue(terminal_to_runway[(flight, allotted, runway)])][0]
+        allocation[flight] = (arrival, allotted, departure)
+    return status, allocation, int(solver.ObjectiveValue()), stats
+
+
+class AirportModel:
+    '''The compact task3 model kept alive through the day of operations.
+
+    Updates change the schedule, the gates or the runways in place. Only the capacity rows whose flights change are
+    edited, and new flights only add their own variables and rows. solve() by default only lets the flights near the
+    changes since the last solve move, the others keep their runways and terminal. If that neighbourhood has no
+    solution the whole day is solved again. CBC does not take hints, so when the current allocation is still a solution
+    of the changed day its taxi distance is an objective cutoff instead.'''
+
+    def __init__(self, task3_df, allocation=None):
+        '''allocation, as in airport_allocation, is taken as the current one, for instance from
+        solve_airport_rolling_horizon when the whole day is too large to solve at once.'''
+        self.task3_df = {sheet: frame.copy() for sheet, frame in task3_df.items()}
+        self.runways = list(self.task3_df['Taxi distances'].index)
+        self.terminals = list(self.task3_df['Terminal capacity'].index)
+        self.solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+        # Every leg is kept, the times and runways the pruning depends on change through the day
+        self.model = build_compact_airport_model(self.task3_df, self.solver, prune=False)
+        self.cutoff = add_objective_cutoff(self.solver, self.solver.infinity())
+        self.members = self._capacity_members()
+        self.closures = []          # (runway, start, end) in minutes
+        self.cancelled = set()
+        self.disruptions = []       # (start, end) in minutes, since the last solve
+        self.fixed = set()          # Flights whose legs are fixed to self.allocation
+        self.allocation = None if allocation is None else dict(allocation)
+        self.status = None
+        self.distance = None if allocation is None else airport_taxi_distance(self.task3_df, self.allocation)
+        self.free_flights = None
+
+    @classmethod
+    def from_workbook(cls, path="../Assignment_DA_2_Task_3_data.xlsx"):
+        return cls(load_airport_data(path))
+
+    def _capacity_members(self):
+        # What every capacity row should hold: {(runway, time): {(flight, 'Arrival' or 'Departure')}} and
+        # {(terminal, time): {flight}}
+        _, runway_slots, ground_sets = airport_time_index(self.task3_df['Flight schedule'])
+        members = {}
+        for time, arriving, departing in runway_slots:
+            movements = {(flight, 'Arrival') for flight in arriving} | {(flight, 'Departure') for flight in departing}
+            for runway in self.runways:
+                members[(runway, time)] = movements
+        for time, on_ground in ground_sets:
+            for terminal in self.terminals:
+                members[(terminal, time)] = set(on_ground)
+        return members
+
+    def _row_variables(self, key, member):
+        resource = key[0]
+        if resource in self.terminals:
+            return [self.model['terminal'][(member, resource)]]
+        flight, movement = member
+        if movement == 'Arrival':
+            return [self.model['runway_to_terminal'][(flight, resource, terminal)] for terminal in self.terminals]
+        return [self.model['terminal_to_runway'][(flight, terminal, resource)] for terminal in self.terminals]
+
+    def _refresh_capacity_rows(self):
+        rows = self.model['capacity_constraints']
+        members = self._capacity_members()
+        for key in set(self.members) | set(members):
+            old, new = self.members.get(key, set()), members.get(key, set())
+            if old == new:
+                continue
+            if key not in rows:
+                gates = 1 if key[0] in self.runways else int(self.task3_df['Terminal capacity'].loc[key[0], 'Gates'])
+                rows[key] = self.solver.Constraint(0, gates)
+            for member in old - new:
+                for var in self._row_variables(key, member):
+                    rows[key].SetCoefficient(var, 0)
+            for member in new - old:
+                for var in self._row_variables(key, member):
+                    rows[key].SetCoefficient(var, 1)
+        self.members = members
+
+    def _closed(self, runway, moves_at):
+        return any(closed == runway and start <= moves_at < end for closed, start, end in self.closures)
+
+    def _reset_bounds(self, flight):
+        # Frees the legs of a flight, apart from the ones it can not use
+        self.fixed.discard(flight)
+        if flight in self.cancelled:
+            for leg in list(self._legs(flight)):
+                leg.SetBounds(0, 0)
+            return
+        arrival = _minutes(self.task3_df['Flight schedule'].loc[flight, 'Arrival'])
+        departure = _minutes(self.task3_df['Flight schedule'].loc[flight, 'Departure'])
+        for runway in self.runways:
+            for terminal in self.terminals:
+                self.model['runway_to_terminal'][(flight, runway, terminal)].SetBounds(0, int(not self._closed(runway, arrival)))
+                self.model['terminal_to_runway'][(flight, terminal, runway)].SetBounds(0, int(not self._closed(runway, departure)))
+
+    def _legs(self, flight):
+        for runway in self.runways:
+            for terminal in self.terminals:
+                yield self.model['runway_to_terminal'][(flight, runway, terminal)]
+                yield self.model['terminal_to_runway'][(flight, terminal, runway)]
+
+    def _fix(self, flight):
+        arrival_runway, terminal, departure_runway = self.allocation[flight]
+        for runway in self.runways:
+            for allotted in self.terminals:
+                on = int(runway == arrival_runway and allotted == terminal)
+                self.model['runway_to_terminal'][(flight, runway, allotted)].SetBounds(on, on)
+                on = int(runway == departure_runway and allotted == terminal)
+                self.model['terminal_to_runway'][(flight, allotted, runway)].SetBounds(on, on)
+        self.fixed.add(flight)
+
+    def _ground_time(self, flight):
+        flight_schedule = self.task3_df['Flight schedule']
+        return _minutes(flight_schedule.loc[flight, 'Arrival']), _minutes(flight_schedule.loc[flight, 'Departure'])
+
+    def set_times(self, flight, arrival, departure):
+        '''Moves a flight, arrival and departure as datetime.time like in the Flight schedule sheet'''
+        self.disruptions.append(self._ground_time(flight))
+        self.task3_df['Flight schedule'].loc[flight, ['Arrival', 'Departure']] = [arrival, departure]
+        self.disruptions.append(self._ground_time(flight))
+        self._reset_bounds(flight)
+        self._refresh_capacity_rows()
+
+    def add_flight(self, flight, arrival, departure):
+        if flight in self.model['flight_constraints']:
+            raise KeyError("{} is already part of the model".format(flight))
+        self.task3_df['Flight schedule'].loc[flight] = [arrival, departure]
+        add_compact_airport_flight(self.solver, self.task3_df, self.model, flight)
+        for leg in self._legs(flight):
+            self.cutoff.SetCoefficient(leg, self.solver.Objective().GetCoefficient(leg))
+        self.disruptions.append(self._ground_time(flight))
+        self._reset_bounds(flight)
+        self._refresh_capacity_rows()
+
+    def cancel_flight(self, flight):
+        # The variables stay in the solver, switched off
+        self.disruptions.append(self._ground_time(flight))
+        self.cancelled.add(flight)
+        self.task3_df['Flight schedule'] = self.task3_df['Flight schedule'].drop(flight)
+        self.model['flight_constraints'][flight].SetBounds(0, 0)
+        self._reset_bounds(flight)
+        self._refresh_capacity_rows()
+        if self.allocation is not None:
+            self.allocation.pop(flight, None)
+
+    def close_runway(self, runway, start=None, end=None):
+        '''No landing or take off on runway from start up to end (datetime.time, the whole day by default)'''
+        start = 0 if start is None else _minutes(start)
+        end = 24 * 60 if end is None else _minutes(end)
+        self.closures.append((runway, start, end))
+        self.disruptions.append((start, end))
+        for flight in self.task3_df['Flight schedule'].index:
+            arrival, departure = self._ground_time(flight)
+            if start <= arrival < end or start <= departure < end:
+                self._reset_bounds(flight)
+
+    def set_gates(self, terminal, gates):
+        '''Number of open gates of a terminal for the whole day'''
+        self.task3_df['Terminal capacity'].loc[terminal, 'Gates'] = gates
+        for (resource, _), row in self.model['capacity_constraints'].items():
+            if resource == terminal:
+                row.SetUb(gates)
+        if self.allocation is None:
+            self.disruptions.append((0, 24 * 60))
+            return
+        # Only the flights at the terminal when it is over its new capacity have to move
+        for (resource, _), on_ground in self.members.items():
+            if resource == terminal:
+                # Flights added since the last solve have no allocation yet, they already count as disrupted
+                at_terminal = [flight for flight in on_ground
+                               if flight in self.allocation and self.allocation[flight][1] == terminal]
+                if len(at_terminal) > gates:
+                    self.disruptions += [self._ground_time(flight) for flight in at_terminal]
+
+    def _current_distance(self):
+        # Taxi distance of the current allocation if it is still a solution of the changed day, else None
+        flight_schedule = self.task3_df['Flight schedule']
+        if self.allocation is None or any(flight not in self.allocation for flight in flight_schedule.index):
+            return None
+        for flight, arrival, departure in zip(flight_schedule.index, flight_schedule['Arrival'],
+                                              flight_schedule['Departure']):
+            arrival_runway, _, departure_runway = self.allocation[flight]
+            if self._closed(arrival_runway, _minutes(arrival)) or self._closed(departure_runway, _minutes(departure)):
+                return None
+        if airport_conflicts(self.task3_df, self.allocation):
+            return None
+        return airport_taxi_distance(self.task3_df, self.allocation)
+
+    def solve(self, radius=15, time_limit=None):
+        '''Re-optimizes the flights whose ground time comes within radius minutes of a change since the last solve.
+        radius=None, or no current allocation, solves the whole day.'''
+        flight_schedule = self.task3_df['Flight schedule']
+        flights = list(flight_schedule.index)
+        fixed = set()
+        if radius is not None and self.allocation is not None:
+            for flight, arrival, departure in zip(flights, flight_schedule['Arrival'], flight_schedule['Departure']):
+                arrival, departure = _minutes(arrival), _minutes(departure)
+                if flight in self.allocation and not any(arrival - radius < end and start < departure + radius
+                                                         for start, end in self.disruptions):
+                    fixed.add(flight)
+        for flight in self.fixed - fixed:
+            self._reset_bounds(flight)
+        for flight in fixed - self.fixed:
+            self._fix(flight)
+
+        distance = self._current_distance()
+        self.cutoff.SetUb(self.solver.infinity() if distance is None else distance)
+        if time_limit is not None:
+            self.solver.SetTimeLimit(int(time_limit * 1000))
+
+        self.status = self.solver.Solve()
+        if fixed and self.status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            # The neighbourhood was too small, free everything
+            for flight in fixed:
+                self._reset_bounds(flight)
+            fixed = set()
+            self.status = self.solver.Solve()
+        self.free_flights = len(flights) - len(fixed)
+
+        if self.status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            # Fixed flights keep their allocation, only read the others
+            moved = [flight for flight in flights if flight not in fixed]
+            allocation = {} if self.allocation is None else self.allocation
+            for flight in moved:
+                terminal = [terminal for terminal in self.terminals
+                            if self.model['terminal'][(flight, terminal)].solution_value() > 0.5][0]
+                arrival = [runway for runway in self.runways
+                           if self.model['runway_to_terminal'][(flight, runway, terminal)].solution_value() > 0.5][0]
+                departure = [runway for runway in self.runways
+                             if self.model['terminal_to_runway'][(flight, terminal, runway)].solution_value() > 0.5][0]
+                allocation[flight] = (arrival, terminal, departure)
+            self.allocation = {flight: allocation[flight] for flight in flights}
+            self.distance = self.solver.Objective().Value()
+            self.disruptions = []
+        return self.status
+
+    def objective_value(self):
+        return self.distance
+
+
+def task3(formulation='full', horizon=None, method='cbc', workers=8, time_limit=60.0):
+    '''formulation is 'full' for the model of build_airport_model or 'compact' for build_compact_airport_model.
+    horizon=(window, step) in minutes solves the day with solve_airport_rolling_horizon instead. method='cp-sat'
+    solves the interval model of solve_airport_cp_sat with workers search workers and method='greedy' only runs
+    greedy_airport_allocation. Otherwise the greedy allocation is the hint of cp-sat, and its distance the objective
+    cutoff of cbc and the fallback when cbc finds nothing within time_limit seconds. cbc and cp-sat stop after
+    time_limit seconds.'''
+    task3_df = load_airport_data()
+    flight_schedule = task3_df['Flight schedule']
+    taxi_distances = task3_df['Taxi distances']
+    terminal_capacity = task3_df['Terminal capacity']
+
+    print("Flight schedule: \n")
+    print(flight_schedule)
+    print("\ntaxi distances: \n")
+    print("\n", taxi_distances)
+    print("\nterminal capacity: \n")
+    print("\n", terminal_capacity)
+
+    time_slots = airport_time_index(flight_schedule)[0]
+
+    greedy = greedy_airport_allocation(task3_df)
+    if method == 'greedy':
+        if greedy is None:
+            print("Failed to find the solution")
+            exit()
+        print("\nGreedy allocation found and total taxi distance for all flights = ",
+              airport_taxi_distance(task3_df, greedy))
+        print_airport_allocation(task3_df, greedy, time_slots)
+        return
+
+    if method == 'cp-sat':
+        status, allocation, distance, stats = solve_airport_cp_sat(task3_df, workers, time_limit, hint=greedy)
+        if allocation is None:
+            print("Failed to find the solution")
+            exit()
+        print("\nCP-SAT: {} workers, {:.2f} s, bound {}".format(stats['workers'], stats['wall_time'], stats['bound']))
+        if status == pywraplp.Solver.OPTIMAL:
+            print("\nOptimal solution found and objective value (total taxi distance for all flights) = ", distance)
+        else:
+            print("\nTime limit reached, best total taxi distance for all flights = ", distance)
+        assert print_airport_allocation(task3_df, allocation, time_slots) == distance
+        return
+
+    if horizon is not None:
+        try:
+            allocation, distance, stats = solve_airport_rolling_horizon(task3_df, *horizon)
+        except ValueError as error:
+            print("Failed to find the solution:", error)
+            exit()
+        print("\nRolling horizon: {} windows, at most {} flights per window".format(stats['windows'],
+                                                                                  stats['largest_window']))
+        print("\nSolution found and total taxi distance for all flights = ", distance)
+        print_airport_allocation(task3_df, allocation, time_slots)
+        return
+
+    solver = pywraplp.Solver('AirportTaxiway', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    if formulation == 'compact':
+        model = build_compact_airport_model(task3_df, solver)
+    else:
+        model = build_airport_model(task3_df, solver)
+
+    print("\nno of arr run alloc dec vars: ", len(model['arrival']))
+    print("no of dep run alloc dec vars: ", len(model['departure']))
+    print("no of term alloc dec vars: ", len(model['terminal']))
+    print("{} formulation: {} variables, {} constraints, {} nonzeros".format(formulation, *model_size(solver)))
+
+    # K) Solve the linear program and determine the optimal total taxi distances for all flights
+    if greedy is not None:
+        add_objective_cutoff(solver, airport_taxi_distance(task3_df, greedy))
+    if time_limit is not None:
+        solver.SetTimeLimit(int(time_limit * 1000))
+    status = solver.Solve()
+
+    if status == pywraplp.Solver.OPTIMAL:
+        print("\nOptimal solution found and objective value (total taxi distance for all flights) = ", solver.Objective().Value())
+        allocation = airport_allocation(task3_df, model)
+    elif status == pywraplp.Solver.FEASIBLE:
+        print("\nTime limit reached, best total taxi distance for all flights = ", solver.Objective().Value())
+        allocation = airport_allocation(task3_df, model)
+    elif greedy is not None:
+        # Nothing at or below the greedy distance within the time limit, keep the greedy allocation
+        print("\nTime limit reached, greedy total taxi distance for all flights = ", airport_taxi_distance(task3_df, greedy))
+        print_airport_allocation(task3_df, greedy, time_slots)
+        return
+    else:
+        print("Failed to find the solution")
+        exit()
+
+    tot_taxi_distance = print_airport_allocation(task3_df, allocation, time_slots)
+    assert tot_taxi_distance == solver.Objective().Value()      # The taxi distances should match the solver objective
 
 
 if __name__ == "__main__":
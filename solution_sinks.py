@@ -0,0 +1,127 @@
+'''Solution callbacks that collect every solution of a CP-SAT search without printing it.
+
+CountSink only counts, ArraySink copies the values of a fixed list of variables into a preallocated array and
+StreamSink writes them to a JSON lines or Parquet file in batches. All of them stop the search after limit solutions.
+The values of a solution are taken from one copy of the solver response instead of one Value call per variable.
+'''
+import json
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+SINK_MODES = ('count', 'array', 'stream')
+
+
+class SolutionSink(cp_model.CpSolverSolutionCallback):
+    '''Counts solutions and stops the search after limit of them (None for all). Subclasses store the values.'''
+
+    def __init__(self, limit=None):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.limit_ = limit
+        self.solutions_ = 0
+
+    def OnSolutionCallback(self):
+        self.solutions_ += 1
+        self.store()
+        if self.limit_ is not None and self.solutions_ >= self.limit_:
+            self.StopSearch()
+
+    def store(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CountSink(SolutionSink):
+    '''Counts the solutions without reading a single value'''
+
+
+class _ValueSink(SolutionSink):
+    def __init__(self, variables, limit=None):
+        SolutionSink.__init__(self, limit)
+        self.variables_ = list(variables)
+        self.indices_ = [variable.Index() for variable in self.variables_]
+
+    def solution_values(self):
+        solution = self.Response().solution
+        return [solution[index] for index in self.indices_]
+
+
+class ArraySink(_ValueSink):
+    '''Copies solution k into row k of a capacity x len(variables) array allocated up front. The search stops when
+    the array is full.'''
+
+    def __init__(self, variables, capacity, limit=None):
+        _ValueSink.__init__(self, variables, capacity if limit is None else min(limit, capacity))
+        self.buffer_ = np.empty((capacity, len(self.variables_)), dtype=np.int64)
+
+    def store(self):
+        self.buffer_[self.solutions_ - 1] = self.solution_values()
+
+    def values(self):
+        return self.buffer_[:self.solutions_]
+
+
+class StreamSink(_ValueSink):
+    '''Writes the solutions to path, one JSON object per line or one Parquet row per solution when path ends in
+    .parquet (needs pyarrow). Columns are named after the variables unless names are given. Rows are written batch
+    solutions at a time; close() writes the rest.'''
+
+    def __init__(self, variables, path, names=None, limit=None, batch=1000):
+        _ValueSink.__init__(self, variables, limit)
+        self.names_ = [variable.Name() for variable in self.variables_] if names is None else list(names)
+        self.batch_ = batch
+        self.rows_ = []
+        self.parquet_ = path.endswith('.parquet')
+        if self.parquet_:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("Writing solutions to Parquet needs pyarrow, write them to a .jsonl file instead")
+            self.pyarrow_ = pyarrow
+            schema = pyarrow.schema([(name, pyarrow.int64()) for name in self.names_])
+            self.file_ = pyarrow.parquet.ParquetWriter(path, schema)
+        else:
+            self.file_ = open(path, 'w')
+
+    def store(self):
+        self.rows_.append(self.solution_values())
+        if len(self.rows_) >= self.batch_:
+            self.flush()
+
+    def flush(self):
+        if not self.rows_:
+            return
+        if self.parquet_:
+            columns = np.array(self.rows_, dtype=np.int64).T
+            self.file_.write_table(self.pyarrow_.table(dict(zip(self.names_, columns))))
+        else:
+            self.file_.writelines(json.dumps(dict(zip(self.names_, row))) + '\n' for row in self.rows_)
+        self.rows_ = []
+
+    def close(self):
+        if self.file_ is not None:
+            self.flush()
+            self.file_.close()
+            self.file_ = None
+
+
+def solution_sink(mode, variables, names=None, path=None, limit=None, capacity=10000):
+    '''Sink of the given mode (count, array or stream) over variables, as used by the constraint programming tasks'''
+    if mode == 'count':
+        return CountSink(limit)
+    if mode == 'array':
+        return ArraySink(variables, capacity, limit)
+    if mode == 'stream':
+        if path is None:
+            raise ValueError("The stream sink needs a path")
+        return StreamSink(variables, path, names, limit)
+    raise ValueError("Unknown sink mode {!r}, expected one of {}".format(mode, SINK_MODES))
@@ -0,0 +1,188 @@
+'''Fast TSP engines working directly on a distance matrix (numpy array, tour = array of town positions).
+
+The improvement moves assume symmetric distances, like the Distances sheet of task2.
+'''
+import time
+
+import numpy as np
+
+# Held-Karp keeps 2^(n-1) x (n-1) costs, about 370 MB at 22 towns
+HELD_KARP_MAX_TOWNS = 22
+
+
+def tour_length(tour, distances):
+    return distances[tour, np.roll(tour, -1)].sum()
+
+
+def nearest_neighbour_tour(distances, start=0):
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=int)
+    tour[0] = start
+    visited[start] = True
+    for k in range(1, n):
+        tour[k] = np.argmin(np.where(visited, np.inf, distances[tour[k - 1]]))
+        visited[tour[k]] = True
+    return tour
+
+
+def greedy_edge_tour(distances, start=0):
+    '''Adds the shortest remaining legs that keep every town at degree <= 2 and close no cycle before the last one'''
+    n = len(distances)
+    if n < 3:
+        return np.arange(n)
+    i, j = np.triu_indices(n, 1)
+    order = np.argsort(distances[i, j], kind='stable')
+    degree = np.zeros(n, dtype=int)
+    parent = list(range(n))
+
+    def root(town):
+        while parent[town] != town:
+            parent[town] = parent[parent[town]]
+            town = parent[town]
+        return town
+
+    neighbours = [[] for _ in range(n)]
+    legs = 0
+    for a, b in zip(i[order].tolist(), j[order].tolist()):
+        if degree[a] == 2 or degree[b] == 2 or root(a) == root(b):
+            continue
+        parent[root(a)] = root(b)
+        degree[a] += 1
+        degree[b] += 1
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+        legs += 1
+        if legs == n - 1:
+            break
+    # The legs form a single path, walk it from one end
+    tour = [int(np.flatnonzero(degree < 2)[0])]
+    previous = -1
+    while len(tour) < n:
+        following = [town for town in neighbours[tour[-1]] if town != previous][0]
+        previous = tour[-1]
+        tour.append(following)
+    tour = np.array(tour)
+    return np.roll(tour, -int(np.flatnonzero(tour == start)[0]))
+
+
+def two_opt(tour, distances, deadline=None):
+    '''Reverses tour segments while that shortens the tour. For every first leg all second legs are scored at once.'''
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            if deadline is not None and time.perf_counter() > deadline:
+                return tour
+            a, b = tour[i], tour[i + 1]
+            c = tour[i + 2:]
+            d = np.append(tour[i + 3:], tour[0])
+            delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+            if i == 0:
+                delta[-1] = 0       # Last leg shares town 0 with the first one
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = i + 2 + k
+                tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+                improved = True
+    return tour
+
+
+def or_opt(tour, distances, deadline=None, max_segment=3):
+    '''Moves segments of 1 to max_segment towns, possibly reversed, to the leg where they fit best'''
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            if n < length + 3:
+                break
+            for i in range(n):
+                if deadline is not None and time.perf_counter() > deadline:
+                    return tour
+                # Rotate so that the segment sits at positions 1..length, between p = rotated[0] and q
+                rotated = np.roll(tour, -i)
+                segment = rotated[1:length + 1]
+                rest = np.concatenate((rotated[:1], rotated[length + 1:]))
+                first, last = segment[0], segment[-1]
+                p, q = rest[0], rest[1]
+                removal_gain = distances[p, first] + distances[last, q] - distances[p, q]
+                u, v = rest, np.roll(rest, -1)
+                forward = distances[u, first] + distances[last, v] - distances[u, v]
+                backward = distances[u, last] + distances[first, v] - distances[u, v]
+                forward[0] = backward[0] = np.inf       # Putting it back where it was
+                k_forward, k_backward = int(np.argmin(forward)), int(np.argmin(backward))
+                if min(forward[k_forward], backward[k_backward]) < removal_gain - 1e-9:
+                    if forward[k_forward] <= backward[k_backward]:
+                        k, moved = k_forward, segment
+                    else:
+                        k, moved = k_backward, segment[::-1]
+                    tour = np.concatenate((rest[:k + 1], moved, rest[k + 1:]))
+                    improved = True
+    return tour
+
+
+def heuristic_tour(distances, start=0, time_limit=1.0, construction='nearest'):
+    '''Construction (nearest neighbour or greedy edge) followed by 2-opt and Or-opt until no move improves the tour
+    or time_limit seconds have passed. Returns the tour starting at start and its length.'''
+    deadline = time.perf_counter() + time_limit
+    distances = np.asarray(distances, dtype=float)
+    if construction == 'greedy':
+        tour = greedy_edge_tour(distances, start)
+    else:
+        tour = nearest_neighbour_tour(distances, start)
+    length = tour_length(tour, distances)
+    while time.perf_counter() < deadline:
+        tour = or_opt(two_opt(tour, distances, deadline), distances, deadline)
+        new_length = tour_length(tour, distances)
+        if new_length >= length - 1e-9:
+            break
+        length = new_length
+    tour = np.roll(tour, -int(np.flatnonzero(tour == start)[0]))
+    return tour, tour_length(tour, distances)
+
+
+def held_karp_tour(distances, start=0):
+    '''Exact tour by dynamic programming over subsets (Held-Karp), O(2^n n^2) time and O(2^n n) memory.
+
+    cost[mask, j] is the shortest path that leaves start, visits the other towns in mask and ends at town j. All
+    masks with the same number of towns are computed together, one array operation per last town.'''
+    distances = np.asarray(distances, dtype=float)
+    n = len(distances)
+    if n > HELD_KARP_MAX_TOWNS:
+        raise ValueError("Held-Karp is limited to {} towns, got {}".format(HELD_KARP_MAX_TOWNS, n))
+    others = np.array([town for town in range(n) if town != start])
+    m = len(others)
+    if m == 0:
+        return np.array([start]), 0.0
+    d = distances[np.ix_(others, others)]
+    masks = np.arange(1 << m)
+    size = np.zeros(1 << m, dtype=int)
+    for k in range(m):
+        size += (masks >> k) & 1
+    cost = np.full((1 << m, m), np.inf)
+    parent = np.zeros((1 << m, m), dtype=np.int8)
+    cost[1 << np.arange(m), np.arange(m)] = distances[start, others]
+    for towns in range(2, m + 1):
+        layer = masks[size == towns]
+        for j in range(m):
+            ending = layer[(layer >> j) & 1 == 1]
+            candidates = cost[ending ^ (1 << j)] + d[:, j]
+            best = np.argmin(candidates, axis=1)
+            cost[ending, j] = candidates[np.arange(len(ending)), best]
+            parent[ending, j] = best
+
+    full = (1 << m) - 1
+    closing = cost[full] + distances[others, start]
+    last = int(np.argmin(closing))
+    length = closing[last]
+    # Walk the parents back from the last town
+    path = []
+    mask = full
+    while mask:
+        path.append(last)
+        mask, last = mask ^ (1 << last), int(parent[mask, last])
+    return np.concatenate(([start], others[path[::-1]])), length
@@ -0,0 +1,153 @@
+'''On-disk cache for the Excel workbooks read by the tasks.
+
+Every sheet of a workbook is stored column by column in one .npz archive next to a manifest that records the size,
+modification time and SHA-256 of the workbook it came from. read_workbook serves later reads from those files and
+rebuilds them as soon as the workbook changes.
+'''
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIRECTORY = ".workbook_cache"
+MANIFEST = "manifest.json"
+SHEETS = "sheets.npz"
+
+
+def _file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _cache_directory(path, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRECTORY)
+    return os.path.join(cache_dir, os.path.basename(path))
+
+
+def _write_json(path, content):
+    temporary = path + ".tmp"
+    with open(temporary, 'w') as f:
+        json.dump(content, f)
+    os.replace(temporary, path)
+
+
+def _encode_column(values):
+    # Returns (kind, arrays) so that every column is stored as plain numpy arrays without pickling where possible
+    if values.dtype != object:
+        return 'native', {'values': values}
+    missing = pd.isnull(values)
+    present = values[~missing]
+    if all(isinstance(value, str) for value in present):
+        return 'str', {'values': np.where(missing, '', values).astype(str), 'missing': missing}
+    if all(isinstance(value, datetime.time) for value in present):
+        microseconds = [0 if m else ((v.hour * 60 + v.minute) * 60 + v.second) * 1000000 + v.microsecond
+                        for v, m in zip(values, missing)]
+        return 'time', {'values': np.array(microseconds, dtype=np.int64), 'missing': missing}
+    return 'object', {'values': values}
+
+
+def _decode_column(kind, arrays):
+    values = arrays['values']
+    if kind == 'native':
+        return values
+    if kind == 'object':
+        return values.astype(object)
+    missing = arrays['missing']
+    if kind == 'str':
+        decoded = values.astype(object)
+    else:
+        decoded = np.array([datetime.time(int(v // 3600000000), int(v // 60000000 % 60), int(v // 1000000 % 60),
+                                          int(v % 1000000)) for v in values.tolist()], dtype=object)
+    decoded[missing] = np.nan
+    return decoded
+
+
+def _encode_sheet(frame, prefix, arrays):
+    kinds = []
+    for i, column in enumerate(frame.columns):
+        kind, column_arrays = _encode_column(frame[column].to_numpy())
+        kinds.append(kind)
+        for name, array in column_arrays.items():
+            arrays['{}{}_{}'.format(prefix, name, i)] = array
+    return [str(column) for column in frame.columns], kinds
+
+
+def _decode_sheet(stored, prefix, columns, kinds):
+    data = {}
+    for i, (column, kind) in enumerate(zip(columns, kinds)):
+        keys = {name: '{}{}_{}'.format(prefix, name, i) for name in ('values', 'missing')}
+        data[column] = _decode_column(kind, {name: stored[key] for name, key in keys.items() if key in stored})
+    return pd.DataFrame(data, columns=columns)
+
+
+def _rebuild(path, directory, stat, sha256):
+    os.makedirs(directory, exist_ok=True)
+    sheets = pd.read_excel(path, sheet_name=None)
+    manifest = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256, 'sheets': []}
+    arrays = {}
+    for i, (sheet, frame) in enumerate(sheets.items()):
+        prefix = "s{}_".format(i)
+        columns, kinds = _encode_sheet(frame, prefix, arrays)
+        manifest['sheets'].append({'name': sheet, 'prefix': prefix, 'columns': columns, 'kinds': kinds})
+
+    # All sheets go into one archive, written before the manifest that points at it
+    temporary = os.path.join(directory, SHEETS + ".tmp.npz")
+    np.savez(temporary, **arrays)
+    os.replace(temporary, os.path.join(directory, SHEETS))
+    _write_json(os.path.join(directory, MANIFEST), manifest)
+    return manifest
+
+
+def _load_manifest(path, directory):
+    stat = os.stat(path)
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+
+    # Same size and modification time: trust the cache without reading the workbook
+    if manifest and manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+        return manifest
+
+    # The file was touched, only rebuild if its contents actually changed
+    sha256 = _file_hash(path)
+    if manifest and manifest['sha256'] == sha256:
+        manifest['size'], manifest['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        _write_json(os.path.join(directory, MANIFEST), manifest)
+        return manifest
+    return _rebuild(path, directory, stat, sha256)
+
+
+def read_workbook(path, sheet_name=None, cache_dir=None):
+    '''Drop-in replacement for pd.read_excel(path, sheet_name=...) backed by the cache.
+
+    sheet_name can be None (dict of all sheets), a sheet name or a list of sheet names, as with pd.read_excel.'''
+    directory = _cache_directory(path, cache_dir)
+    manifest = _load_manifest(path, directory)
+    entries = {entry['name']: entry for entry in manifest['sheets']}
+
+    if sheet_name is None:
+        names = list(entries)
+    elif isinstance(sheet_name, str):
+        names = [sheet_name]
+    else:
+        names = list(sheet_name)
+    for name in names:
+        if name not in entries:
+            raise ValueError("Worksheet named '{}' not found in {}".format(name, path))
+
+    allow_pickle = any('object' in entries[name]['kinds'] for name in names)
+    with np.load(os.path.join(directory, SHEETS), allow_pickle=allow_pickle) as stored:
+        sheets = {name: _decode_sheet(stored, entries[name]['prefix'], entries[name]['columns'], entries[name]['kinds'])
+                  for name in names}
+    if isinstance(sheet_name, str):
+        return sheets[sheet_name]
+    return sheets